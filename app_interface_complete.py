@@ -2,20 +2,44 @@
 """
 Interface Graphique Élégante - Reconnaissance Langue des Signes
 Avec boutons pour Chiffres, Lettres et Actions Spéciales
+
+Démarrage rapide (background_load=True, SIGN_BACKGROUND_LOAD=1: par défaut): la fenêtre et la
+caméra s'affichent immédiatement, le modèle (et TensorFlow) est chargé dans
+un thread; les boutons de mode restent en état "chargement" jusqu'à ce qu'il
+soit prêt. Les temps jusqu'à la première image et la première prédiction
+sont affichés dans la console.
+
+Cadence adaptative (SIGN_TARGET_FPS=30, frame_scheduler.py): l'image est
+affichée à la cadence visée et la prédiction n'est lancée que lorsque le
+budget CPU (SIGN_CPU_BUDGET) le permet; le délai root.after() tient compte
+du temps passé dans chaque tour.
 """
 
+import time
+
+APP_START = time.perf_counter()  # origine des temps de démarrage
+
+import threading
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
-import operator
+import os
+
+from inference_session import InferenceSession, artifact_for
+from gating import make_gate
+from instrumentation import make_profiler
+from prediction_cache import make_cache, close_cache, model_fingerprint
+from pipeline import LatestFrameGrabber, InferenceWorker, pipeline_stats
+from preprocessing import RoiPreprocessor, roi_bounds
+from frame_loop import SteadyFrameLoop
+from frame_sources import make_source
+from frame_scheduler import make_scheduler
 
 class SignLanguageApp:
-    def __init__(self, root):
+    def __init__(self, root, engine='keras', pipelined=False, profiler=None, background_load=True, source=None,
+                 scheduler=None):
         self.root = root
         self.root.title("Reconnaissance de la Langue des Signes")
         self.root.geometry("1300x750")
@@ -25,34 +49,108 @@ class SignLanguageApp:
         self.mode = None  # 'chiffres', 'lettres', ou 'actions'
         self.running = False
         self.cap = None
+        self.source = source  # source d'images (frame_sources.py), sinon make_source()
         self.model = None
+        self.engine = engine  # 'keras', 'numpy', 'int8' ou 'tflite'
+        
+        # Mode pipeline: capture / inférence / affichage dans des threads séparés
+        self.pipelined = pipelined
+        self.grabber = None
+        self.worker = None
+        self.frames_rendered = 0
+        self.result_seq = 0
+        
+        # Instrumentation optionnelle (SIGN_TRACE=1, SIGN_TRACE_FILE=trace.jsonl)
+        self.profiler = profiler if profiler is not None else make_profiler()
+        
+        # Réutilisation de la prédiction si la ROI n'a pas changé (SIGN_GATE=1)
+        self.gate = make_gate()
+        
+        # Cache LRU des prédictions par masque binaire (SIGN_CACHE=1, SIGN_CACHE_FILE=...),
+        # lié au modèle une fois chargé (load_model)
+        self.cache = make_cache()
+        
+        # Tampons réutilisés à chaque image (thread de l'interface): capture,
+        # ROI, tenseur d'entrée et top-k par mode
+        self.loop = SteadyFrameLoop()
+        
+        # Cadences d'affichage et d'inférence (SIGN_TARGET_FPS, SIGN_CPU_BUDGET)
+        self.scheduler = scheduler if scheduler is not None else make_scheduler()
+        
+        # Temps de démarrage (secondes depuis APP_START)
+        self.startup_times = {}
+        self.model_error = None
+        
+        if background_load:
+            # Interface et caméra d'abord, modèle chargé en arrière-plan
+            self.create_widgets()
+            self.set_mode_buttons_loading(True)
+            self.start_camera()
+            self.load_model_async()
+        else:
+            # Charger le modèle
+            self.load_model()
+            
+            # Créer l'interface
+            self.create_widgets()
+            
+            # Démarrer la caméra
+            self.start_camera()
         
-        # Charger le modèle
-        self.load_model()
-        
-        # Créer l'interface
-        self.create_widgets()
-        
-        # Démarrer la caméra
-        self.start_camera()
+    def log_startup(self, event):
+        """Mémorise et affiche le temps écoulé depuis le lancement pour 'event'"""
+        if event in self.startup_times:
+            return
+        self.startup_times[event] = time.perf_counter() - APP_START
+        print(f"⏱️  {event}: {self.startup_times[event]:.2f} s après le lancement")
         
     def load_model(self):
         """Charge le modèle CNN"""
         try:
-            self.model = keras.Sequential([
-                layers.Conv2D(32, (3, 3), activation='relu', input_shape=(64, 64, 1)),
-                layers.MaxPooling2D(pool_size=(2, 2)),
-                layers.Conv2D(32, (3, 3), activation='relu'),
-                layers.MaxPooling2D(pool_size=(2, 2)),
-                layers.Flatten(),
-                layers.Dense(128, activation='relu'),
-                layers.Dense(29, activation='softmax')
-            ])
-            self.model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-            self.model.load_weights("model-bw.h5")
-            print("✓ Modèle chargé avec succès!")
+            # Modèle construit une fois, prédiction compilée et échauffée
+            # Artefact unique (SIGN_MODEL ou model-bw.signmodel) s'il existe, sinon JSON + HDF5
+            model = InferenceSession(engine=self.engine, artifact_path=artifact_for(self.engine))
+            # Cache persistant lié au modèle réellement chargé, avant sa première utilisation
+            if self.cache is not None:
+                self.cache.bind(model_fingerprint(model))
+            self.model = model
+            print(f"✓ Modèle chargé avec succès! (moteur {self.engine}, {self.model.load_time:.2f} s)")
         except Exception as e:
+            self.model_error = e
             print(f"✗ Erreur de chargement du modèle: {e}")
+        self.log_startup('modèle prêt')
+        
+    def load_model_async(self):
+        """Charge le modèle dans un thread; l'interface le récupère via check_model_loaded"""
+        self.model_thread = threading.Thread(target=self.load_model, name='model-loader', daemon=True)
+        self.model_thread.start()
+        self.root.after(100, self.check_model_loaded)
+        
+    def check_model_loaded(self):
+        """Réactive les boutons de mode une fois le chargement terminé (thread Tk)"""
+        if self.model_thread.is_alive():
+            self.root.after(100, self.check_model_loaded)
+            return
+        if self.model is not None:
+            self.set_mode_buttons_loading(False)
+            self.status_label.config(text="Mode: Aucun", fg='#ECF0F1')
+        else:
+            self.status_label.config(text="✗ Modèle indisponible", fg='#E74C3C')
+            
+    def set_mode_buttons_loading(self, loading):
+        """État 'chargement' des boutons de mode (désactivés) ou état normal"""
+        buttons = [
+            (self.btn_chiffres, "🔢 DÉTECTER LES CHIFFRES"),
+            (self.btn_lettres, "🔤 DÉTECTER LES LETTRES"),
+            (self.btn_actions, "⚡ DÉTECTER LES ACTIONS"),
+        ]
+        for button, text in buttons:
+            if loading:
+                button.config(text="⏳ Chargement du modèle...", state=tk.DISABLED, cursor='watch')
+            else:
+                button.config(text=text, state=tk.NORMAL, cursor='hand2')
+        if loading:
+            self.status_label.config(text="⏳ Chargement du modèle...", fg='#F1C40F')
             
     def create_widgets(self):
         """Crée l'interface graphique"""
@@ -230,92 +328,164 @@ class SignLanguageApp:
         
     def start_camera(self):
         """Démarre la capture vidéo"""
-        self.cap = cv2.VideoCapture(0)
+        # Source et réglages de capture: SIGN_SOURCE, SIGN_CAPTURE_* (frame_sources.py)
+        self.cap = self.source if self.source is not None else make_source()
         self.running = True
+        if self.pipelined:
+            # Capture et inférence dans leurs propres threads
+            self.grabber = LatestFrameGrabber(self.cap).start()
+            # Le thread d'inférence a ses propres tampons de prétraitement
+            self.worker = InferenceWorker(self.model, RoiPreprocessor(),
+                                          gate=self.gate, cache=self.cache).start()
         self.update_frame()
         
     def update_frame(self):
         """Met à jour le flux vidéo"""
         if not self.running:
             return
+        
+        self.scheduler.begin_tick()
+        if self.pipelined:
+            self.render_latest()
+            self.root.after(self.scheduler.end_tick(), self.update_frame)
+            return
             
-        ret, frame = self.cap.read()
+        self.profiler.begin_frame()
+        ret, frame = self.loop.read(self.cap)
         if ret:
-            frame = cv2.flip(frame, 1)
-            
-            # ROI
-            h, w = frame.shape[:2]
-            x1 = int(0.5 * w)
-            y1 = 10
-            x2 = w - 10
-            y2 = int(0.5 * w)
+            self.profiler.mark('capture')
+            # Miroir en place et ROI (vue sur l'image)
+            x1, y1, x2, y2 = self.loop.extract()
             
             # Dessiner le cadre
             cv2.rectangle(frame, (x1-2, y1-2), (x2+2, y2+2), (52, 152, 219), 3)
             
-            # Extraire ROI
-            roi = frame[y1:y2, x1:x2]
-            
-            # Prétraitement
-            roi_processed = cv2.resize(roi, (64, 64))
-            roi_processed = cv2.cvtColor(roi_processed, cv2.COLOR_BGR2GRAY)
-            _, roi_processed = cv2.threshold(roi_processed, 120, 255, cv2.THRESH_BINARY)
-            roi_normalized = roi_processed.astype('float32') / 255.0
-            
-            # Prédiction si mode actif
+            # Prédiction si mode actif et due (sinon les labels gardent le dernier résultat)
             if self.mode and self.model:
-                result = self.model.predict(roi_normalized.reshape(1, 64, 64, 1), verbose=0)
-                self.update_predictions(result[0])
+                if self.scheduler.should_infer():
+                    with self.scheduler.inference():
+                        # Prétraitement dans le tenseur d'entrée persistant
+                        roi_normalized = self.loop.preprocess()
+                        self.profiler.mark('preprocess')
+                        result = self.infer(roi_normalized)
+                        self.profiler.mark('predict')
+                    self.update_predictions(result)
+                    self.profiler.mark('results')
+            elif self.gate is not None:
+                self.gate.skip()
             
-            # Afficher le mode
-            if self.mode == 'chiffres':
-                cv2.putText(frame, "MODE: CHIFFRES (0-9)", (20, 50), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (52, 152, 219), 2)
-            elif self.mode == 'lettres':
-                cv2.putText(frame, "MODE: LETTRES (A-M)", (20, 50), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (155, 89, 182), 2)
-            elif self.mode == 'actions':
-                cv2.putText(frame, "MODE: ACTIONS SPECIALES", (20, 50), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (230, 126, 34), 2)
+            self.draw_mode(frame)
+            self.profiler.draw_overlay(frame)
+            self.profiler.mark('overlay')
+            self.show_frame(frame)
+            self.profiler.mark('render')
+            self.profiler.end_frame(mode=self.mode, **self.scheduler.stats())
+        
+        self.root.after(self.scheduler.end_tick(), self.update_frame)
+        
+    def render_latest(self):
+        """Mode pipeline: affiche la dernière image et le dernier résultat disponibles"""
+        self.profiler.begin_frame()
+        seq, frame = self.grabber.latest()
+        if frame is not None:
+            self.profiler.mark('capture')
+            x1, y1, x2, y2 = roi_bounds(frame)
             
-            # Convertir pour Tkinter
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_resized = cv2.resize(frame_rgb, (800, 600))
-            img = Image.fromarray(frame_resized)
-            imgtk = ImageTk.PhotoImage(image=img)
+            # Cadre dessiné avant la copie de la ROI, comme en mode direct:
+            # les deux modes prédisent sur les mêmes pixels
+            cv2.rectangle(frame, (x1-2, y1-2), (x2+2, y2+2), (52, 152, 219), 3)
             
-            self.video_label.imgtk = imgtk
-            self.video_label.configure(image=imgtk)
-        
-        self.root.after(10, self.update_frame)
-        
-    def update_predictions(self, predictions):
-        """Met à jour l'affichage des prédictions"""
-        if self.mode == 'chiffres':
-            categories = {
-                0: 'ZERO', 1: 'ONE', 2: 'TWO', 3: 'THREE', 4: 'FOUR',
-                5: 'FIVE', 6: 'SIX', 7: 'SEVEN', 8: 'EIGHT', 9: 'NINE'
-            }
-            pred_dict = {categories[i]: predictions[i] for i in range(10)}
+            if self.mode and self.model:
+                if self.scheduler.should_infer():
+                    self.worker.model = self.model
+                    self.worker.submit(seq, frame[y1:y2, x1:x2].copy(), self.mode)
+                    self.scheduler.mark_submitted()
+            elif self.gate is not None:
+                self.gate.skip()
             
+            self.draw_mode(frame)
+            self.profiler.draw_overlay(frame)
+            self.profiler.mark('overlay')
+            self.show_frame(frame)
+            self.profiler.mark('render')
+            self.frames_rendered += 1
+        
+        error = self.worker.take_error()
+        if error is not None:
+            self.status_label.config(text=f"✗ Erreur d'inférence: {error}", fg='#E74C3C')
+        
+        self.result_seq, result = self.worker.latest_result(self.result_seq)
+        # Coût et nombre d'inférences tels que produits par le thread d'inférence
+        self.scheduler.record_worker(*self.worker.totals())
+        if result is not None:
+            _, predictions, mode = result
+            # Ignorer un résultat calculé pour un mode qui n'est plus actif
+            if mode == self.mode:
+                self.update_predictions(predictions)
+                self.profiler.mark('results')
+        
+        if frame is not None:
+            self.profiler.set_totals(
+                captured=self.grabber.frames_captured,
+                inferences=self.worker.inferences,
+                dropped=self.grabber.frames_dropped + self.worker.rois_dropped
+            )
+            self.profiler.end_frame(mode=self.mode, inference_ms=round(self.worker.last_inference_time * 1000, 3),
+                                    **self.scheduler.stats())
+        
+    def infer(self, roi_normalized):
+        """Prédiction, filtrée par le ChangeGate puis le cache s'ils sont actifs"""
+        if self.gate is not None:
+            return self.gate.predict(roi_normalized, self.cached_model)
+        return self.cached_model(roi_normalized)
+        
+    def cached_model(self, x):
+        if self.cache is not None:
+            return self.cache.predict(x, self.run_model)
+        return self.run_model(x)
+        
+    def run_model(self, x):
+        self.profiler.inference()
+        if self.gate is not None:
+            return self.gate.timed_model(self.model.predict_one, x)
+        return self.model.predict_one(x)
+        
+    def draw_mode(self, frame):
+        """Affiche le mode actif sur l'image"""
+        if self.mode == 'chiffres':
+            cv2.putText(frame, "MODE: CHIFFRES (0-9)", (20, 50), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 1, (52, 152, 219), 2)
         elif self.mode == 'lettres':
-            categories = {
-                0: 'A', 1: 'B', 2: 'C', 3: 'D', 4: 'E',
-                5: 'F', 6: 'G', 7: 'H', 8: 'I', 9: 'J',
-                10: 'K', 11: 'L', 12: 'M'
-            }
-            pred_dict = {categories[i]: predictions[i] for i in range(13)}
-            
+            cv2.putText(frame, "MODE: LETTRES (A-M)", (20, 50), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 1, (155, 89, 182), 2)
         elif self.mode == 'actions':
-            categories = {
-                13: 'Creer Dossier',
-                14: 'Coppier Fichier',
-                15: 'Jeu',
-                16: 'Ecrire Fichier'
-            }
-            pred_dict = {categories[i]: predictions[i] for i in categories.keys() if i < len(predictions)}
+            cv2.putText(frame, "MODE: ACTIONS SPECIALES", (20, 50), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 1, (230, 126, 34), 2)
+        
+    def show_frame(self, frame):
+        """Convertit l'image pour Tkinter et l'affiche"""
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_resized = cv2.resize(frame_rgb, (800, 600))
+        img = Image.fromarray(frame_resized)
+        imgtk = ImageTk.PhotoImage(image=img)
+        
+        self.video_label.imgtk = imgtk
+        self.video_label.configure(image=imgtk)
+        if 'première image' not in self.startup_times:
+            self.log_startup('première image')
+        
+    def pipeline_stats(self):
+        """Compteurs du mode pipeline (images capturées, abandonnées, inférences...)"""
+        if not self.pipelined or self.grabber is None:
+            return {}
+        return pipeline_stats(self.grabber, self.worker, self.frames_rendered)
         
-        sorted_pred = sorted(pred_dict.items(), key=operator.itemgetter(1), reverse=True)
+    def update_predictions(self, predictions):
+        """Met à jour l'affichage des prédictions"""
+        if 'première prédiction' not in self.startup_times:
+            self.log_startup('première prédiction')
+        # Top 4 du mode (indices précalculés, np.argpartition)
+        sorted_pred = self.loop.top_k(self.mode, predictions)
         
         for i in range(min(4, len(sorted_pred))):
             sign, conf = sorted_pred[i]
@@ -358,15 +528,33 @@ class SignLanguageApp:
     def quit_app(self):
         """Ferme l'application proprement"""
         self.running = False
+        self.profiler.close()
+        if self.gate is not None:
+            print(f"Filtrage par changement: {self.gate.stats()}")
+        if self.scheduler.enabled:
+            print(f"Cadences: {self.scheduler.stats()}")
+        if self.pipelined and self.grabber is not None:
+            print(f"Statistiques pipeline: {self.pipeline_stats()}")
+            self.grabber.stop()
+            self.worker.stop()
+        close_cache(self.cache)
         if self.cap:
             self.cap.release()
-        cv2.destroyAllWindows()
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # OpenCV sans interface graphique (opencv-python-headless)
         self.root.quit()
         self.root.destroy()
 
 # Lancement de l'application
 if __name__ == "__main__":
     root = tk.Tk()
-    app = SignLanguageApp(root)
+    app = SignLanguageApp(
+        root,
+        engine=os.environ.get('SIGN_ENGINE', 'keras'),
+        pipelined=os.environ.get('SIGN_PIPELINE', '0') == '1',
+        background_load=os.environ.get('SIGN_BACKGROUND_LOAD', '1') == '1'
+    )
     root.protocol("WM_DELETE_WINDOW", app.quit_app)
     root.mainloop()
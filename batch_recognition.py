@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+Reconnaissance Hors Ligne par Lots - Reconnaissance Langue des Signes
+Étiquette des vidéos enregistrées ou des dossiers d'images sans caméra
+
+Les images sont lues et prétraitées à la volée (générateurs), regroupées en
+lots, et chaque lot est prédit en un seul appel. Les résultats top-k de
+chaque image sont écrits en CSV ou en JSONL (selon l'extension de sortie).
+
+Entrées acceptées:
+- un fichier vidéo (chaque image passe par miroir + ROI + seuil, comme en direct)
+- un dossier d'images, par ex. DataSet/test/<classe>/*.jpg
+  (les images 64x64 du dataset sont déjà des masques: seul le seuil est réappliqué)
+- un dossier d'enregistrements vidéo (après les images éventuelles)
+
+Mode parallèle (--workers N): les fichiers sont découpés en tâches (paquets
+d'images, plages d'images des vidéos) réparties sur un pool de processus.
+Chaque processus charge le modèle une seule fois (initialiseur du pool); le
+processus principal ne lit que les noms des classes (en-tête de l'artefact
+ou architecture JSON), sans construire de modèle. Une plage vidéo commence
+par une recherche (CAP_PROP_POS_FRAMES) dont la position est vérifiée: si
+elle n'est pas exacte (GOP longs, certains backends), la plage est atteinte
+en décodant la vidéo depuis le début. Les
+résultats reviennent dans l'ordre des tâches, donc la sortie est identique
+au mode séquentiel. Ctrl+C annule les tâches restantes et garde les résultats
+déjà écrits.
+
+Utilisation:
+    python batch_recognition.py DataSet/test -o resultats.csv
+    python batch_recognition.py session.mp4 -o resultats.jsonl --mode lettres --batch-size 128
+    python batch_recognition.py archives/ -o resultats.csv --workers 0     # tous les cœurs
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from categories import mode_labels
+from preprocessing import IMAGE_SIZE, extract_roi, preprocess_roi
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+def list_files(directory, extensions):
+    """Liste triée des fichiers d'un dossier (récursif) ayant l'une des extensions"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def list_images(directory):
+    """Liste triée des images d'un dossier (récursif)"""
+    return list_files(directory, IMAGE_EXTENSIONS)
+
+
+def list_videos(directory):
+    """Liste triée des vidéos d'un dossier (récursif)"""
+    return list_files(directory, VIDEO_EXTENSIONS)
+
+
+def iter_video_frames(path, start=0, stop=None):
+    """Génère (source, numero_image, image) pour les images [start, stop) d'une vidéo"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Impossible d'ouvrir la vidéo: {path}")
+    try:
+        if start:
+            cap = seek_video(cap, path, start)
+        index = start
+        while stop is None or index < stop:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield path, index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def seek_video(cap, path, start):
+    """Place la vidéo sur l'image 'start'; retourne la capture (rouverte si la recherche est inexacte)"""
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start:
+        return cap
+    # Position incertaine: décodage séquentiel jusqu'au début de la plage
+    cap.release()
+    cap = cv2.VideoCapture(path)
+    for _ in range(start):
+        if not cap.grab():
+            break
+    return cap
+
+
+def iter_image_files(paths):
+    """Génère (source, 0, image) pour chaque fichier image lisible"""
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"⚠️ Image illisible ignorée: {path}", file=sys.stderr)
+            continue
+        yield path, 0, image
+
+
+def iter_frames(source):
+    """Génère les images d'une vidéo, ou d'un dossier (images puis vidéos)"""
+    if os.path.isdir(source):
+        yield from iter_image_files(list_images(source))
+        for path in list_videos(source):
+            yield from iter_video_frames(path)
+    else:
+        yield from iter_video_frames(source)
+
+
+def iter_preprocessed(frames, roi='auto', flip=True):
+    """Applique le prétraitement du système en direct à un flux d'images
+
+    roi='frame': image caméra -> miroir + ROI + seuil
+    roi='mask' : image déjà recadrée (64x64 du dataset) -> seuil seulement
+    roi='auto' : 'mask' si l'image fait 64x64, sinon 'frame'
+    """
+    for source, index, image in frames:
+        is_mask = roi == 'mask' or (roi == 'auto' and image.shape[:2] == (IMAGE_SIZE, IMAGE_SIZE))
+        if not is_mask:
+            image = extract_roi(image, flip=flip)
+        yield source, index, preprocess_roi(image)
+
+
+def iter_batches(items, batch_size):
+    """Regroupe un flux (source, index, x) en lots (metas, tableau N x 64 x 64 x 1)"""
+    metas = []
+    batch = np.empty((batch_size, IMAGE_SIZE, IMAGE_SIZE, 1), dtype=np.float32)
+    for source, index, x in items:
+        batch[len(metas), :, :, 0] = x
+        metas.append((source, index))
+        if len(metas) == batch_size:
+            yield metas, batch
+            metas = []
+            batch = np.empty_like(batch)
+    if metas:
+        yield metas, batch[:len(metas)]
+
+
+def top_k(probabilities, indices, k):
+    """Top-k restreint aux indices d'un mode: retourne [(indice, prob), ...] par ligne"""
+    indices = np.asarray(indices)
+    scores = probabilities[:, indices]
+    k = min(k, len(indices))
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    best = np.take_along_axis(best, order, axis=1)
+    return indices[best], np.take_along_axis(best_scores, order, axis=1)
+
+
+def folder_label(source, root):
+    """Classe attendue d'après le dossier parent (layout DataSet/<mode>/<classe>)"""
+    if not os.path.isdir(root):
+        return ''
+    relative = os.path.relpath(os.path.dirname(source), root)
+    return '' if relative == '.' else relative.split(os.sep)[0]
+
+
+class ResultWriter:
+    """Écrit les résultats top-k en CSV ou en JSONL"""
+
+    def __init__(self, path, k):
+        self.k = k
+        self.jsonl = path.lower().endswith(('.jsonl', '.json'))
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        if not self.jsonl:
+            self.csv = csv.writer(self.file)
+            header = ['source', 'image', 'dossier']
+            for rank in range(1, k + 1):
+                header += [f'top{rank}_signe', f'top{rank}_prob']
+            self.csv.writerow(header)
+
+    def write(self, source, index, truth, labels, probs):
+        if self.jsonl:
+            record = {
+                'source': source,
+                'image': index,
+                'dossier': truth,
+                'top_k': [{'signe': l, 'prob': round(float(p), 6)} for l, p in zip(labels, probs)],
+            }
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            row = [source, index, truth]
+            for label, prob in zip(labels, probs):
+                row += [label, f'{prob:.6f}']
+            self.csv.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+def write_batch_results(writer, metas, probabilities, indices, names, k, root):
+    """Écrit le top-k de chaque image d'un lot"""
+    name_of = dict(zip(indices, names))
+    best, scores = top_k(probabilities, indices, k)
+    for (source, index), row_best, row_scores in zip(metas, best, scores):
+        writer.write(source, index, folder_label(source, root),
+                     [name_of[i] for i in row_best], row_scores)
+
+
+def video_frame_count(path):
+    cap = cv2.VideoCapture(path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+
+def make_tasks(source, chunk_size):
+    """Découpe l'entrée en tâches, dans l'ordre de iter_frames
+
+    ('images', [chemins])           paquet d'images
+    ('video', chemin, début, fin)   plage d'images d'une vidéo (fin None = jusqu'au bout)
+    """
+    if os.path.isdir(source):
+        images, videos = list_images(source), list_videos(source)
+    else:
+        images, videos = [], [source]
+    tasks = [('images', images[i:i + chunk_size]) for i in range(0, len(images), chunk_size)]
+    for path in videos:
+        count = video_frame_count(path)
+        if count <= 0:
+            # Nombre d'images inconnu: toute la vidéo dans une seule tâche
+            tasks.append(('video', path, 0, None))
+            continue
+        for start in range(0, count, chunk_size):
+            # La dernière plage va jusqu'au bout (CAP_PROP_FRAME_COUNT est parfois approximatif)
+            stop = start + chunk_size if start + chunk_size < count else None
+            tasks.append(('video', path, start, stop))
+    return tasks
+
+
+# État d'un processus du pool (rempli par _init_worker)
+_worker = {}
+
+
+def _init_worker(engine, artifact_path, indices, top_k_count, batch_size, roi, flip):
+    """Initialiseur du pool: charge le modèle une fois par processus"""
+    # Ctrl+C est géré par le processus principal uniquement
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cv2.setNumThreads(1)
+    from inference_session import InferenceSession
+
+    _worker.update(
+        session=InferenceSession(engine=engine, artifact_path=artifact_path),
+        indices=indices, k=top_k_count, batch_size=batch_size, roi=roi, flip=flip,
+    )
+
+
+def _process_task(task):
+    """Traite une tâche dans un processus du pool: retourne (metas, indices top-k, probabilités)"""
+    if task[0] == 'images':
+        frames = iter_image_files(task[1])
+    else:
+        frames = iter_video_frames(task[1], task[2], task[3])
+    items = iter_preprocessed(frames, roi=_worker['roi'], flip=_worker['flip'])
+    all_metas, all_best, all_scores = [], [], []
+    for metas, batch in iter_batches(items, _worker['batch_size']):
+        best, scores = top_k(_worker['session'].predict_batch(batch), _worker['indices'], _worker['k'])
+        all_metas += metas
+        all_best.append(best)
+        all_scores.append(scores)
+    if not all_metas:
+        return [], [], []
+    return all_metas, np.concatenate(all_best), np.concatenate(all_scores)
+
+
+def run_parallel(args, artifact_path, indices, names, writer):
+    """Répartit les tâches sur le pool; écrit les résultats dans l'ordre. Retourne (images, interrompu)"""
+    workers = args.workers or os.cpu_count() or 1
+    tasks = make_tasks(args.source, args.chunk_size)
+    print(f"✓ {len(tasks)} tâches de {args.chunk_size} images max, {workers} processus")
+
+    # Un thread BLAS par processus: les cœurs sont déjà tous occupés par le pool
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(variable, '1')
+
+    name_of = dict(zip(indices, names))
+    count = done = 0
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(args.engine, artifact_path, indices, args.top_k, args.batch_size, args.roi, not args.no_flip),
+    )
+    try:
+        # map() rend les résultats dans l'ordre des tâches
+        for metas, best, scores in executor.map(_process_task, tasks):
+            for (source, index), row_best, row_scores in zip(metas, best, scores):
+                writer.write(source, index, folder_label(source, args.source),
+                             [name_of[i] for i in row_best], row_scores)
+            count += len(metas)
+            done += 1
+            print(f"\r  {count} images traitées | tâches {done}/{len(tasks)}", end='', flush=True)
+    except KeyboardInterrupt:
+        print(f"\n⚠️ Interrompu: tâches restantes annulées ({done}/{len(tasks)} terminées)")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return count, True
+    executor.shutdown()
+    return count, False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reconnaissance hors ligne de vidéos ou de dossiers d'images")
+    parser.add_argument('source', help="fichier vidéo ou dossier d'images")
+    parser.add_argument('-o', '--output', default='resultats.csv', help="fichier de sortie .csv ou .jsonl")
+    parser.add_argument('--batch-size', type=int, default=64, help="images par appel de prédiction")
+    parser.add_argument('--top-k', type=int, default=3, help="nombre de prédictions par image")
+    parser.add_argument('--mode', default='tous', choices=['tous', 'chiffres', 'lettres', 'actions'],
+                        help="sorties du modèle à considérer (comme les boutons de l'interface)")
+    parser.add_argument('--engine', default='numpy', choices=['numpy', 'keras'], help="moteur d'inférence")
+    parser.add_argument('--model', help="artefact du modèle (par défaut SIGN_MODEL ou model-bw.signmodel s'il existe)")
+    parser.add_argument('--roi', default='auto', choices=['auto', 'frame', 'mask'],
+                        help="type d'image d'entrée (voir iter_preprocessed)")
+    parser.add_argument('--no-flip', action='store_true', help="ne pas appliquer l'effet miroir")
+    parser.add_argument('--workers', type=int, help="pool de N processus (0 = un par cœur; absent = un seul processus)")
+    parser.add_argument('--chunk-size', type=int, default=512, help="images par tâche en mode parallèle")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from inference_session import InferenceSession, artifact_for, read_model_classes
+
+    print("="*60)
+    print("🎞️  RECONNAISSANCE HORS LIGNE PAR LOTS")
+    print("="*60)
+
+    if not os.path.exists(args.source):
+        print(f"✗ Erreur: {args.source} n'existe pas")
+        return 1
+
+    artifact_path = artifact_for(args.engine, args.model)
+    if args.workers is None:
+        session = InferenceSession(engine=args.engine, artifact_path=artifact_path)
+        print(f"✓ Modèle chargé (moteur {args.engine})")
+        num_classes, class_names = session.num_classes, session.class_names
+    else:
+        # Le modèle est chargé par chaque processus du pool: ici, seulement les classes
+        num_classes, class_names = read_model_classes(artifact_path)
+    indices, names = mode_labels(args.mode, num_classes)
+    if args.mode == 'tous' and class_names is not None:
+        # Noms des classes enregistrés dans l'artefact
+        names = [class_names[i] for i in indices]
+
+    writer = ResultWriter(args.output, args.top_k)
+    count = 0
+    interrupted = False
+    start = time.perf_counter()
+    try:
+        if args.workers is not None:
+            count, interrupted = run_parallel(args, artifact_path, indices, names, writer)
+        else:
+            frames = iter_frames(args.source)
+            items = iter_preprocessed(frames, roi=args.roi, flip=not args.no_flip)
+            for metas, batch in iter_batches(items, args.batch_size):
+                probabilities = session.predict_batch(batch)
+                write_batch_results(writer, metas, probabilities, indices, names, args.top_k, args.source)
+                count += len(metas)
+                print(f"\r  {count} images traitées", end='', flush=True)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⚠️ Interrompu")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n\n✓ {count} images en {elapsed:.1f} s ({count / max(elapsed, 1e-9):.1f} images/s)")
+    print(f"✓ Résultats écrits dans {args.output}")
+    return 130 if interrupted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la Première Convolution Binaire - Reconnaissance Langue des Signes
+Compare la convolution par table (masque binaire) à la convolution float
+
+L'entrée du modèle est un masque seuillé: chaque fenêtre 3x3 vaut l'un des
+512 motifs possibles. La première couche (Conv2D 32 filtres + ReLU) devient
+une table 512 x 32 indexée par le motif à 9 bits de chaque position.
+
+Chemins mesurés (première couche seule, puis modèle complet):
+- float im2col        : conv2d_valid du moteur NumPy
+- table binaire       : binary_conv2d_lut
+- table, compacté     : indice calculé sur les mots np.packbits (forward_packed)
+- keras Conv2D        : si TensorFlow est installé
+
+Vérifie aussi que les sorties sont identiques sur des masques aléatoires.
+
+Utilisation:
+    python benchmark_binary_conv.py [nombre_iterations] [taille_lot]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from numpy_inference import NumpyCNN, apply_activation, binary_conv2d_lut, conv2d_valid, packed_pattern_index
+
+
+def measure(fn, runs):
+    """Retourne les durées (en ms) de 'runs' appels à fn()"""
+    timings = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def report(name, timings, reference=None):
+    mean = timings.mean()
+    line = (f"  {name:<24} moy {mean:7.3f} ms | p50 {np.percentile(timings, 50):7.3f} ms"
+            f" | p95 {np.percentile(timings, 95):7.3f} ms")
+    if reference is not None:
+        line += f" | x{reference / mean:5.1f}"
+    print(line)
+
+
+def keras_first_layer(layer):
+    """Conv2D Keras avec les poids de la première couche, sinon None"""
+    try:
+        import tensorflow as tf
+    except ImportError:
+        return None
+    kh, kw = layer['kernel_size']
+    filters = layer['kernel'].shape[1]
+    conv = tf.keras.layers.Conv2D(filters, (kh, kw), activation=layer['activation'])
+    conv.build((None, 64, 64, 1))
+    conv.set_weights([layer['kernel'].reshape(kh, kw, 1, filters), layer['bias']])
+    forward = tf.function(lambda x: conv(x))
+    return lambda x: forward(tf.convert_to_tensor(x)).numpy()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    print("="*60)
+    print("🔲 BENCHMARK CONVOLUTION BINAIRE (PREMIÈRE COUCHE)")
+    print("="*60)
+
+    model = NumpyCNN.from_files()
+    if model.binary_lut is None:
+        print("✗ Première couche non compatible (attendu: Conv2D sur une entrée à 1 canal)")
+        return 1
+    layer = model.layers[0]
+
+    rng = np.random.default_rng(0)
+    bits = (rng.random((batch, 64, 64)) > 0.5).astype(np.uint8)
+    x = bits[..., np.newaxis].astype(np.float32)
+    packed = np.packbits(bits.reshape(batch, -1), axis=1)
+
+    def float_conv():
+        return apply_activation(conv2d_valid(x, layer['kernel'], layer['bias'], layer['kernel_size']),
+                                layer['activation'])
+
+    def lut_conv():
+        return binary_conv2d_lut(bits, model.binary_lut, layer['kernel_size'])
+
+    def packed_conv():
+        return model.packed_lut[packed_pattern_index(packed, 64, 64, layer['kernel_size'])]
+
+    # Vérification: sorties identiques (première couche et modèle complet)
+    float_out, lut_out = float_conv(), lut_conv()
+    layer_diff = max(float(np.abs(float_out - lut_out).max()), float(np.abs(float_out - packed_conv()).max()))
+    float_model = NumpyCNN(model.layers, model.input_shape, binary_first_layer=False)
+    float_probs = float_model.forward(x)
+    model_diff = max(float(np.abs(float_probs - model.forward(x)).max()),
+                     float(np.abs(float_probs - model.forward_packed(packed)).max()))
+    print(f"\nÉcart max première couche: {layer_diff:.3g} | modèle complet: {model_diff:.3g}")
+    if layer_diff > 1e-5 or model_diff > 1e-5:
+        print("✗ Les sorties diffèrent")
+        return 1
+    print("✓ Sorties identiques")
+
+    print(f"\n📐 Première couche ({runs} itérations, lot de {batch}):")
+    reference = measure(float_conv, runs)
+    report("float im2col", reference)
+    report("table binaire", measure(lut_conv, runs), reference.mean())
+    report("table, compacté", measure(packed_conv, runs), reference.mean())
+    keras_conv = keras_first_layer(layer)
+    if keras_conv is not None:
+        keras_conv(x)
+        report("keras Conv2D", measure(lambda: keras_conv(x), runs), reference.mean())
+    else:
+        print("  keras Conv2D             (TensorFlow non installé)")
+
+    print(f"\n📐 Modèle complet ({runs} itérations, lot de {batch}):")
+    reference = measure(lambda: float_model.forward(x), runs)
+    report("float", reference)
+    report("première couche binaire", measure(lambda: model.forward(x), runs), reference.mean())
+    report("binaire, compacté", measure(lambda: model.forward_packed(packed), runs), reference.mean())
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-Benchmark de l'Inférence - Reconnaissance Langue des Signes
+Compare le coût par image de model.predict() et d'InferenceSession
+
+Chemins mesurés (une image 64x64 binaire par appel):
+- keras model.predict(x, verbose=0)    : appel actuel des scripts
+- InferenceSession('keras').predict_one : tf.function à signature fixe
+- InferenceSession('numpy').predict_one : moteur NumPy pur
+
+Utilisation:
+    python benchmark_inference.py [nombre_iterations]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from inference_session import InferenceSession
+
+
+def measure(predict, x, runs):
+    """Retourne les durées (en ms) de 'runs' appels à predict(x)"""
+    timings = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        predict(x)
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def report(name, timings, reference=None):
+    mean = timings.mean()
+    line = (f"  {name:<34} moy {mean:7.3f} ms | p50 {np.percentile(timings, 50):7.3f} ms"
+            f" | p95 {np.percentile(timings, 95):7.3f} ms")
+    if reference is not None:
+        line += f" | x{reference / mean:5.1f}"
+    print(line)
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print("="*60)
+    print("⏱️  BENCHMARK INFÉRENCE PAR IMAGE")
+    print("="*60)
+
+    rng = np.random.default_rng(0)
+    x = (rng.random((64, 64)) > 0.5).astype('float32')
+    x_batch = x.reshape(1, 64, 64, 1)
+
+    results = []
+    reference = None
+
+    try:
+        keras_session = InferenceSession(engine='keras')
+        keras_model = keras_session.model
+        keras_model.predict(x_batch, verbose=0)  # échauffement équitable
+        timings = measure(lambda v: keras_model.predict(v, verbose=0), x_batch, runs)
+        reference = timings.mean()
+        results.append(("keras model.predict", timings))
+        results.append(("InferenceSession(keras).predict_one",
+                        measure(keras_session.predict_one, x, runs)))
+
+        same = np.allclose(keras_model.predict(x_batch, verbose=0)[0],
+                           keras_session.predict_one(x), atol=1e-5)
+        print(f"\n{'✓' if same else '✗'} Résultats identiques entre predict et predict_one")
+    except ImportError:
+        print("\n⚠️ TensorFlow non installé: chemins Keras ignorés")
+
+    numpy_session = InferenceSession(engine='numpy')
+    results.append(("InferenceSession(numpy).predict_one",
+                    measure(numpy_session.predict_one, x, runs)))
+
+    print(f"\nRésultats ({runs} itérations, lot de 1):")
+    for name, timings in results:
+        report(name, timings, reference)
+
+    if reference is not None:
+        best = min(timings.mean() for _, timings in results)
+        print(f"\n✓ Gain par image: {reference - best:.3f} ms")
+    print("="*60)
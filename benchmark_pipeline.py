@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark par Étape du Pipeline - Reconnaissance Langue des Signes
+Mesure le coût de chaque étape de la boucle image, sans caméra
+
+Étapes mesurées (comme dans demo_signes_complete.py et update_frame):
+flip, découpe ROI, resize 64x64, niveaux de gris, seuil, normalisation,
+prédiction, dessin des overlays, conversion RGB, resize 800x600,
+conversion PIL / ImageTk.PhotoImage (si un affichage est disponible).
+
+Les images viennent d'un générateur synthétique (ou d'une vidéo avec --video)
+aux résolutions caméra courantes (480p, 720p, 1080p). Les percentiles
+p50/p95/p99 sont affichés et enregistrés en JSON; --compare signale les
+régressions par rapport à un résultat précédent.
+
+Utilisation:
+    python benchmark_pipeline.py -o bench.json
+    python benchmark_pipeline.py -o bench_new.json --compare bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from preprocessing import IMAGE_SIZE, THRESHOLD, roi_bounds
+
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+PERCENTILES = (50, 95, 99)
+
+
+def synthetic_frames(width, height, count, seed=0):
+    """Images BGR déterministes: bruit de fond + forme claire qui bouge dans la ROI"""
+    from frame_sources import SyntheticSource
+
+    source = SyntheticSource(width, height, fps=0, seed=seed)
+    for _ in range(count):
+        yield source.read()[1]
+
+
+def video_frames(path, width, height, count):
+    """Images d'une vidéo, redimensionnées à la résolution demandée (en boucle)"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Impossible d'ouvrir la vidéo: {path}")
+    produced = 0
+    try:
+        while produced < count:
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+                if not ret:
+                    return
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            yield frame
+            produced += 1
+    finally:
+        cap.release()
+
+
+class StageTimer:
+    """Accumule les durées (ms) de chaque étape"""
+
+    def __init__(self):
+        self.samples = {}
+        self._last = None
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.samples.setdefault(stage, []).append((now - self._last) * 1000)
+        self._last = now
+
+
+def run_frame(frame, model, timer, tk_image):
+    """Exécute une itération de la boucle en chronométrant chaque étape"""
+    timer.start()
+    frame = cv2.flip(frame, 1)
+    timer.mark('flip')
+
+    x1, y1, x2, y2 = roi_bounds(frame)
+    roi = frame[y1:y2, x1:x2]
+    timer.mark('roi_slice')
+
+    roi_processed = cv2.resize(roi, (IMAGE_SIZE, IMAGE_SIZE))
+    timer.mark('resize_64')
+    roi_processed = cv2.cvtColor(roi_processed, cv2.COLOR_BGR2GRAY)
+    timer.mark('gray')
+    _, roi_processed = cv2.threshold(roi_processed, THRESHOLD, 255, cv2.THRESH_BINARY)
+    timer.mark('threshold')
+    roi_normalized = roi_processed.astype('float32') / 255.0
+    timer.mark('normalize')
+
+    result = model.predict_one(roi_normalized)
+    timer.mark('predict')
+
+    cv2.rectangle(frame, (x1-2, y1-2), (x2+2, y2+2), (52, 152, 219), 3)
+    cv2.putText(frame, "MODE: CHIFFRES (0-9)", (20, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (52, 152, 219), 2)
+    cv2.putText(frame, f"Confiance: {result.max() * 100:.1f}%", (10, 110),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    timer.mark('overlay')
+
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    timer.mark('to_rgb')
+    frame_resized = cv2.resize(frame_rgb, (800, 600))
+    timer.mark('resize_display')
+    img = Image.fromarray(frame_resized)
+    timer.mark('pil_image')
+    if tk_image is not None:
+        tk_image(image=img)
+        timer.mark('photoimage')
+
+
+def summarize(samples):
+    """Percentiles par étape et de bout en bout"""
+    stats = {}
+    for stage, values in samples.items():
+        values = np.asarray(values)
+        stats[stage] = {f'p{p}': float(np.percentile(values, p)) for p in PERCENTILES}
+        stats[stage]['mean'] = float(values.mean())
+    total = np.sum([np.asarray(v) for v in samples.values()], axis=0)
+    stats['total'] = {f'p{p}': float(np.percentile(total, p)) for p in PERCENTILES}
+    stats['total']['mean'] = float(total.mean())
+    return stats
+
+
+def print_table(name, stats):
+    print(f"\n📐 {name}")
+    print(f"  {'étape':<16}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for stage, values in stats.items():
+        print(f"  {stage:<16}{values['p50']:>10.3f}{values['p95']:>10.3f}{values['p99']:>10.3f}")
+
+
+def compare(current, previous, tolerance, min_delta_ms):
+    """Liste des régressions: (résolution, étape, percentile, avant, après)"""
+    regressions = []
+    for resolution, stages in current['results'].items():
+        old_stages = previous.get('results', {}).get(resolution)
+        if old_stages is None:
+            continue
+        for stage, values in stages.items():
+            old = old_stages.get(stage)
+            if old is None:
+                continue
+            for key in ('p50', 'p95'):
+                before, after = old[key], values[key]
+                if after > before * (1 + tolerance) and after - before > min_delta_ms:
+                    regressions.append((resolution, stage, key, before, after))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark par étape de la boucle de reconnaissance")
+    parser.add_argument('--frames', type=int, default=300, help="images mesurées par résolution")
+    parser.add_argument('--warmup', type=int, default=20, help="images ignorées au début")
+    parser.add_argument('--resolutions', default='480p,720p,1080p', help="liste parmi " + ','.join(RESOLUTIONS))
+    parser.add_argument('--video', help="vidéo enregistrée à utiliser au lieu des images synthétiques")
+    parser.add_argument('--engine', default='numpy', choices=['numpy', 'keras'], help="moteur d'inférence")
+    parser.add_argument('--no-tk', action='store_true', help="ne pas mesurer ImageTk.PhotoImage")
+    parser.add_argument('-o', '--output', help="fichier JSON des résultats")
+    parser.add_argument('--compare', help="résultat JSON précédent à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="hausse relative tolérée (0.15 = 15%%)")
+    parser.add_argument('--min-delta', type=float, default=0.05, help="hausse absolue ignorée en dessous (ms)")
+    return parser.parse_args(argv)
+
+
+def make_tk_image():
+    """ImageTk.PhotoImage si un affichage Tk est disponible, sinon None"""
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+        return ImageTk.PhotoImage
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from inference_session import InferenceSession
+
+    print("="*60)
+    print("⏱️  BENCHMARK PAR ÉTAPE DU PIPELINE")
+    print("="*60)
+
+    model = InferenceSession(engine=args.engine)
+    tk_image = None if args.no_tk else make_tk_image()
+    if tk_image is None:
+        print("ℹ️  Pas d'affichage Tk: étape 'photoimage' ignorée")
+
+    report = {
+        'engine': args.engine,
+        'frames': args.frames,
+        'source': args.video or 'synthetic',
+        'machine': platform.platform(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': {},
+    }
+
+    for name in args.resolutions.split(','):
+        width, height = RESOLUTIONS[name]
+        total = args.frames + args.warmup
+        if args.video:
+            frames = video_frames(args.video, width, height, total)
+        else:
+            frames = synthetic_frames(width, height, total)
+
+        timer = StageTimer()
+        for i, frame in enumerate(frames):
+            if i == args.warmup:
+                timer.samples.clear()
+            run_frame(frame, model, timer, tk_image)
+
+        stats = summarize(timer.samples)
+        report['results'][name] = stats
+        print_table(f"{name} ({width}x{height})", stats)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Résultats enregistrés: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(report, previous, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"\n✗ {len(regressions)} régression(s) par rapport à {args.compare}:")
+            for resolution, stage, key, before, after in regressions:
+                print(f"  • {resolution} {stage} {key}: {before:.3f} ms -> {after:.3f} ms "
+                      f"(+{(after / before - 1) * 100:.0f}%)")
+            return 1
+        print(f"\n✓ Aucune régression par rapport à {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark du Prétraitement - Reconnaissance Langue des Signes
+Vérifie et mesure preprocessing.py contre la chaîne recopiée dans les scripts
+
+Référence: le code qui figurait dans data_set_capture.py,
+demo_signes_complete.py et SignLanguageApp.update_frame (une allocation par
+étape). Chemins mesurés:
+- référence            : cv2.flip -> découpe -> resize -> gris -> seuil -> /255
+- RoiPreprocessor      : mêmes étapes dans des tampons préalloués
+- preprocess_batch     : une pile d'images -> tenseur (N, 64, 64, 1)
+
+Les sorties doivent être identiques au bit près (masques et tenseurs), sur
+des images synthétiques, du bruit centré sur le seuil, des ROI de tailles
+variées et des ROI déjà en niveaux de gris. Code de sortie 1 sinon.
+
+Utilisation:
+    python benchmark_preprocessing.py
+    python benchmark_preprocessing.py --frames 256 --width 1280 --height 720
+"""
+
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmark_pipeline import synthetic_frames
+from preprocessing import IMAGE_SIZE, RoiPreprocessor, preprocess_batch
+
+
+def reference_mask(frame):
+    """Chaîne d'origine des scripts: masque 0/255 et image normalisée"""
+    frame = cv2.flip(frame, 1)
+    x1 = int(0.5 * frame.shape[1])
+    y1 = 10
+    x2 = frame.shape[1] - 10
+    y2 = int(0.5 * frame.shape[1])
+    roi = frame[y1:y2, x1:x2]
+    roi_processed = cv2.resize(roi, (64, 64))
+    roi_processed = cv2.cvtColor(roi_processed, cv2.COLOR_BGR2GRAY)
+    _, roi_processed = cv2.threshold(roi_processed, 120, 255, cv2.THRESH_BINARY)
+    return roi_processed, roi_processed.astype('float32') / 255.0
+
+
+def reference_roi(roi):
+    roi_processed = cv2.resize(roi, (64, 64))
+    if roi_processed.ndim == 3:
+        roi_processed = cv2.cvtColor(roi_processed, cv2.COLOR_BGR2GRAY)
+    _, roi_processed = cv2.threshold(roi_processed, 120, 255, cv2.THRESH_BINARY)
+    return roi_processed.astype('float32') / 255.0
+
+
+def test_frames(width, height, count, seed=0):
+    """Moitié images synthétiques, moitié bruit flou centré sur le seuil (cas limites)"""
+    rng = np.random.default_rng(seed)
+    frames = list(synthetic_frames(width, height, count - count // 2, seed))
+    for _ in range(count // 2):
+        noise = rng.normal(120, 25, size=(height, width, 3)).clip(0, 255).astype(np.uint8)
+        frames.append(cv2.GaussianBlur(noise, (5, 5), 0))
+    return np.stack(frames)
+
+
+def check_parity(frames):
+    """Compare chaque chemin à la référence; retourne la liste des écarts"""
+    failures = []
+    expected = [reference_mask(frame) for frame in frames]
+    expected_tensor = np.stack([normalized for _, normalized in expected])[..., np.newaxis]
+
+    preprocessor = RoiPreprocessor()
+    for i, frame in enumerate(frames):
+        roi, _ = preprocessor.extract(frame.copy())
+        mask = preprocessor.binarize(roi)
+        if not np.array_equal(mask, expected[i][0]):
+            failures.append(f"RoiPreprocessor.binarize, image {i}")
+        if not np.array_equal(preprocessor.normalize(), expected[i][1]):
+            failures.append(f"RoiPreprocessor.normalize, image {i}")
+
+    if not np.array_equal(preprocess_batch(frames, frames=True), expected_tensor):
+        failures.append("preprocess_batch(frames=True)")
+
+    # ROI de tailles variées (agrandies ou réduites), en couleur puis en gris
+    rng = np.random.default_rng(1)
+    rois = []
+    for frame in frames:
+        h, w = (int(v) for v in rng.integers(20, min(frame.shape[:2]), size=2))
+        rois.append(frame[:h, :w])
+    for name, images in (("ROI couleur", rois),
+                         ("ROI gris", [cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) for roi in rois])):
+        expected_rois = np.stack([reference_roi(roi) for roi in images])[..., np.newaxis]
+        if not np.array_equal(preprocess_batch(images), expected_rois):
+            failures.append(f"preprocess_batch({name})")
+        single = RoiPreprocessor()
+        if not all(np.array_equal(single(roi), expected_rois[i, :, :, 0]) for i, roi in enumerate(images)):
+            failures.append(f"RoiPreprocessor({name})")
+    return failures
+
+
+def measure(fn, runs):
+    """Meilleure durée (s) de 'runs' appels à fn()"""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parité et débit du prétraitement partagé")
+    parser.add_argument('--frames', type=int, default=128, help="images par mesure")
+    parser.add_argument('--width', type=int, default=640, help="largeur des images caméra")
+    parser.add_argument('--height', type=int, default=480, help="hauteur des images caméra")
+    parser.add_argument('--runs', type=int, default=5, help="répétitions (meilleure retenue)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("🧪 BENCHMARK DU PRÉTRAITEMENT")
+    print("="*60)
+
+    frames = test_frames(args.width, args.height, args.frames)
+    print(f"✓ {len(frames)} images {args.width}x{args.height}")
+
+    failures = check_parity(frames)
+    if failures:
+        print(f"✗ {len(failures)} écarts avec la chaîne d'origine:")
+        for failure in failures[:10]:
+            print(f"  • {failure}")
+        return 1
+    print("✓ Parité: masques et tenseurs identiques à la chaîne d'origine")
+
+    preprocessor = RoiPreprocessor()
+    out = np.empty((len(frames), IMAGE_SIZE, IMAGE_SIZE, 1), dtype=np.float32)
+    # Image par image: chaque image est d'abord copiée dans le tampon de
+    # capture, comme cap.read() le fait (coût identique pour les deux chemins)
+    capture = np.empty_like(frames[0])
+
+    def reference():
+        for frame in frames:
+            np.copyto(capture, frame)
+            reference_mask(capture)
+
+    def buffered():
+        for frame in frames:
+            np.copyto(capture, frame)
+            roi, _ = preprocessor.extract(capture)
+            preprocessor(roi)
+
+    def batched():
+        preprocess_batch(frames, out=out, frames=True)
+
+    print(f"\n📐 Débit ({args.runs} répétitions, meilleure retenue):")
+    baseline = measure(reference, args.runs)
+    for name, fn in (("référence", reference), ("RoiPreprocessor", buffered), ("preprocess_batch", batched)):
+        elapsed = baseline if fn is reference else measure(fn, args.runs)
+        print(f"  {name:<18} {elapsed * 1e6 / len(frames):8.1f} µs/image | "
+              f"{len(frames) / elapsed:9.0f} images/s | x{baseline / elapsed:4.1f}")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
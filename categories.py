@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Catégories par Mode - Reconnaissance Langue des Signes
+Correspondance indice de sortie du modèle -> nom du signe, pour chaque mode
+
+Tables uniques partagées par l'interface graphique, la démo et les scripts
+(serveur, reconnaissance par lots, multi-caméras); top-k par TopKSelector.
+"""
+
+import numpy as np
+
+
+MODE_CATEGORIES = {
+    'chiffres': {
+        0: 'ZERO', 1: 'ONE', 2: 'TWO', 3: 'THREE', 4: 'FOUR',
+        5: 'FIVE', 6: 'SIX', 7: 'SEVEN', 8: 'EIGHT', 9: 'NINE'
+    },
+    'lettres': {
+        0: 'A', 1: 'B', 2: 'C', 3: 'D', 4: 'E',
+        5: 'F', 6: 'G', 7: 'H', 8: 'I', 9: 'J',
+        10: 'K', 11: 'L', 12: 'M'
+    },
+    'actions': {
+        13: 'Creer Dossier',
+        14: 'Coppier Fichier',
+        15: 'Jeu',
+        16: 'Ecrire Fichier'
+    },
+}
+
+
+def mode_labels(mode, num_outputs=29):
+    """Retourne (indices, noms) des sorties à considérer pour un mode
+
+    Le mode 'tous' couvre toutes les sorties, nommées par leur indice.
+    """
+    if mode in MODE_CATEGORIES:
+        categories = MODE_CATEGORIES[mode]
+        indices = [i for i in categories if i < num_outputs]
+        return indices, [categories[i] for i in indices]
+    if mode == 'tous':
+        return list(range(num_outputs)), [str(i) for i in range(num_outputs)]
+    raise ValueError(f"Mode inconnu: {mode}")
+
+
+class TopKSelector:
+    """Meilleures sorties d'un mode, sans dictionnaire ni tri de toutes les classes
+
+    Les indices de chaque mode sont précalculés en tableaux NumPy; les scores
+    du mode sont extraits dans un tampon réutilisé (np.take out=) puis les k
+    meilleurs sont isolés par np.argpartition et seuls ceux-là sont triés.
+    """
+
+    MODES = list(MODE_CATEGORIES) + ['tous']
+
+    def __init__(self, num_outputs=29, k=4):
+        self.num_outputs = num_outputs
+        self.k = k
+        self._modes = {}
+        for mode in self.MODES:
+            indices, names = mode_labels(mode, num_outputs)
+            self._modes[mode] = (np.asarray(indices, dtype=np.intp), names,
+                                 np.empty(len(indices), dtype=np.float32))
+
+    def select(self, mode, predictions, k=None):
+        """[(nom, probabilité)] des k meilleures sorties du mode, par probabilité décroissante"""
+        indices, names, scores = self._modes[mode]
+        np.take(predictions, indices, out=scores)
+        k = min(self.k if k is None else k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(names[i], float(scores[i])) for i in top]
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Vérification des Allocations par Image - Reconnaissance Langue des Signes
+Mesure avec tracemalloc la boucle en régime établi (frame_loop.py)
+
+Une vidéo synthétique est lue par cv2.VideoCapture (aucune webcam requise).
+Après l'échauffement, chaque image passe par: capture, miroir, ROI, cadre,
+prétraitement, prédiction et top-k. Pour chaque image sont relevés le pic
+d'allocations (mémoire transitoire) et la mémoire tracée restante.
+
+Deux boucles sont comparées: l'ancienne (une copie par étape, dictionnaire
+trié) et SteadyFrameLoop. Les contrôles portent sur la boucle en régime
+établi:
+- mémoire plate: la mémoire tracée ne croît pas au fil des images
+- allocations transitoires bornées (hors moteur d'inférence)
+
+Les allocations du moteur d'inférence sont hors du périmètre des contrôles.
+Le moteur NumPy est mesuré en plus si le modèle est disponible, à titre
+indicatif: ses tableaux intermédiaires (~1,7 Mo par image, im2col et
+activations) sont alloués puis libérés à chaque image, et
+sliding_window_view remplit des caches internes de NumPy (plafonnés) bien
+après l'échauffement. Code de sortie 1 si un contrôle échoue (script manuel:
+le dépôt n'a pas de suite de tests).
+
+Utilisation:
+    python check_allocations.py
+    python check_allocations.py --frames 500 --video ma_video.avi --no-model
+"""
+
+import argparse
+import gc
+import operator
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmark_pipeline import synthetic_frames
+from categories import MODE_CATEGORIES
+from frame_loop import SteadyFrameLoop
+
+
+MODE = 'lettres'
+
+
+def write_video(path, width, height, count):
+    """Vidéo MJPG synthétique lue ensuite par cv2.VideoCapture"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Impossible d'écrire la vidéo: {path}")
+    for frame in synthetic_frames(width, height, count):
+        writer.write(frame)
+    writer.release()
+
+
+def legacy_step(cap, predict):
+    """Ancienne boucle de la démo et de l'interface (référence)"""
+    ret, frame = cap.read()
+    if not ret:
+        return False
+    frame = cv2.flip(frame, 1)
+    x1 = int(0.5 * frame.shape[1])
+    y1 = 10
+    x2 = frame.shape[1] - 10
+    y2 = int(0.5 * frame.shape[1])
+    cv2.rectangle(frame, (x1-1, y1-1), (x2+1, y2+1), (255, 0, 0), 2)
+    roi = frame[y1:y2, x1:x2]
+    roi_processed = cv2.resize(roi, (64, 64))
+    roi_processed = cv2.cvtColor(roi_processed, cv2.COLOR_BGR2GRAY)
+    _, roi_processed = cv2.threshold(roi_processed, 120, 255, cv2.THRESH_BINARY)
+    roi_normalized = roi_processed.astype('float32') / 255.0
+    result = predict(roi_normalized.reshape(1, 64, 64, 1))
+    categories = MODE_CATEGORIES[MODE]
+    pred_dict = {categories[i]: result[i] for i in categories}
+    sorted(pred_dict.items(), key=operator.itemgetter(1), reverse=True)
+    return True
+
+
+def steady_step(loop):
+    def step(cap, predict):
+        ret, frame = loop.read(cap)
+        if not ret:
+            return False
+        x1, y1, x2, y2 = loop.extract()
+        cv2.rectangle(frame, (x1-1, y1-1), (x2+1, y2+1), (255, 0, 0), 2)
+        result = predict(loop.preprocess())
+        loop.top_k(MODE, result)
+        return True
+    return step
+
+
+def measure(video, step, predict, warmup, frames):
+    """Retourne (pics par image, mémoire tracée après chaque image, mémoire retenue, snapshots)
+
+    gc.collect() vide aussi les listes libres de l'interpréteur (tuples,
+    flottants): sans cela, leur remplissage progressif ressemble à une fuite.
+    """
+    cap = cv2.VideoCapture(video)
+    try:
+        for _ in range(warmup):
+            if not step(cap, predict):
+                raise IOError(f"{video}: vidéo trop courte pour l'échauffement")
+
+        # Tableaux préalloués: le relevé lui-même ne doit rien allouer
+        peaks = np.zeros(frames, dtype=np.int64)
+        current = np.zeros(frames, dtype=np.int64)
+        gc.collect()
+        tracemalloc.start()
+        first = tracemalloc.take_snapshot()
+        base = tracemalloc.get_traced_memory()[0]
+        measured = 0
+        for i in range(frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            if not step(cap, predict):
+                break
+            now, peak = tracemalloc.get_traced_memory()
+            peaks[i] = peak - before
+            current[i] = now - base
+            measured += 1
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - base
+        last = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    finally:
+        cap.release()
+    return peaks[:measured], current[:measured], retained, first, last
+
+
+def report(name, peaks, current, retained):
+    print(f"  {name:<18} pic/image moy {peaks.mean() / 1024:8.1f} Ko | max {peaks.max() / 1024:8.1f} Ko"
+          f" | mémoire retenue {retained:+7d} o (max en cours {int(current.max()):+d} o, {len(peaks)} images)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Allocations par image de la boucle en régime établi (tracemalloc)")
+    parser.add_argument('--frames', type=int, default=300, help="images mesurées")
+    parser.add_argument('--warmup', type=int, default=30, help="images d'échauffement")
+    parser.add_argument('--width', type=int, default=640, help="largeur de la vidéo synthétique")
+    parser.add_argument('--height', type=int, default=480, help="hauteur de la vidéo synthétique")
+    parser.add_argument('--video', help="vidéo à lire au lieu de la vidéo synthétique")
+    parser.add_argument('--no-model', action='store_true', help="sans le moteur NumPy")
+    parser.add_argument('--max-growth', type=int, default=4096,
+                        help="croissance tolérée de la mémoire tracée (octets)")
+    parser.add_argument('--max-peak', type=int, default=16384,
+                        help="pic d'allocations toléré par image, hors modèle (octets)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("🧮 ALLOCATIONS PAR IMAGE (TRACEMALLOC)")
+    print("="*60)
+
+    session = None
+    if not args.no_model:
+        try:
+            from inference_session import InferenceSession
+            from model_artifact import default_artifact_path
+            session = InferenceSession(engine='numpy', artifact_path=default_artifact_path())
+            print(f"✓ Moteur NumPy chargé ({session.num_classes} classes)")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Modèle indisponible, mesure sans inférence: {e}")
+
+    # Probabilités fixes quand le modèle n'est pas mesuré
+    fixed = np.random.default_rng(0).dirichlet(np.ones(29)).astype(np.float32)
+    predictors = [("sans modèle", lambda x: fixed)]
+    if session is not None:
+        predictors.append(("moteur numpy", lambda x: session.predict_batch(x)[0]))
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video
+        if video is None:
+            video = os.path.join(tmp, 'synthetic.avi')
+            write_video(video, args.width, args.height, args.warmup + args.frames)
+            print(f"✓ Vidéo synthétique: {args.warmup + args.frames} images {args.width}x{args.height}")
+
+        for label, predict in predictors:
+            print(f"\n📐 Boucle {label} ({args.warmup} images d'échauffement):")
+            report("ancienne boucle", *measure(video, legacy_step, predict, args.warmup, args.frames)[:3])
+            peaks, current, retained, first, last = measure(video, steady_step(SteadyFrameLoop()), predict,
+                                                            args.warmup, args.frames)
+            report("SteadyFrameLoop", peaks, current, retained)
+            if predict is predictors[0][1]:
+                peaks_no_model = peaks
+            else:
+                print(f"  ℹ️ Pic avec inférence: {peaks.mean() / 1024:.0f} Ko/image alloués et libérés "
+                      f"(hors contrôle: {peaks_no_model.mean() / 1024:.1f} Ko sans modèle)")
+
+            if retained <= args.max_growth:
+                continue
+            for stat in last.compare_to(first, 'lineno')[:5]:
+                print(f"    {stat}")
+            if predict is predictors[0][1]:
+                failures.append(f"{label}: {retained} octets retenus après {len(peaks)} images")
+            else:
+                # sliding_window_view (im2col) remplit des caches internes de
+                # NumPy qui plafonnent après quelques milliers d'appels
+                print(f"  ℹ️ {retained} octets retenus par le moteur d'inférence (caches internes de NumPy)")
+        if peaks_no_model.max() > args.max_peak:
+            failures.append(f"pic de {peaks_no_model.max()} octets par image hors modèle (max {args.max_peak})")
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+    else:
+        print("✓ Allocations plates en régime établi (hors moteur d'inférence)")
+    print("="*60)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,12 +8,22 @@ Utilisation:
 2. Fais le signe devant la caméra
 3. Appuie sur la touche correspondante (0-9, A-Z, ou symboles)
 4. L'image est sauvegardée automatiquement dans le bon dossier
+5. Touche 'b' : active/désactive le mode rafale (BURST_SIZE images par appui)
+
+Les dossiers ne sont parcourus qu'une fois au démarrage (index des compteurs
+en mémoire) et les écritures JPEG sont faites par un thread en arrière-plan,
+pour ne pas bloquer l'aperçu pendant l'enregistrement.
 
 Adapté pour chemins relatifs et structure moderne
 """
 
 import cv2
 import os
+import queue
+import threading
+
+from frame_sources import make_source
+from preprocessing import RoiPreprocessor
 
 print("="*60)
 print("📸 SCRIPT DE CAPTURE DU DATASET")
@@ -22,6 +32,8 @@ print("="*60)
 # Configuration
 MODE = 'train'  # 'train' ou 'test'
 BASE_DIR = 'DataSet'
+BURST_SIZE = 10          # Images sauvegardées par appui en mode rafale
+WRITER_QUEUE_SIZE = 256  # Nombre max d'images en attente d'écriture
 
 # Définir les classes
 CLASSES = [
@@ -36,6 +48,68 @@ CLASSES = [
     'PDF_ou_Word', 'fichier_signes'
 ]
 
+# Touches spéciales pour les actions
+SPECIAL_KEYS = {
+    '*': 'Coppier_Fichier',
+    '+': 'Creer_Dossier',
+    '-': 'Jeu',
+}
+
+
+def key_to_class(key):
+    """Classe associée à une touche (0-9, A-Z ou symbole), ou None"""
+    if ord('0') <= key <= ord('9') or ord('A') <= key <= ord('Z'):
+        return chr(key)
+    return SPECIAL_KEYS.get(chr(key))
+
+
+def build_class_index(directory):
+    """Compte une seule fois les images .jpg de chaque classe"""
+    index = {}
+    for cls in CLASSES:
+        cls_dir = os.path.join(directory, cls)
+        if os.path.isdir(cls_dir):
+            with os.scandir(cls_dir) as entries:
+                index[cls] = sum(1 for e in entries if e.name.endswith('.jpg'))
+        else:
+            index[cls] = 0
+    return index
+
+
+class ImageWriter:
+    """Thread d'écriture des images avec file d'attente bornée"""
+
+    def __init__(self, maxsize=WRITER_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.written = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, filepath, image):
+        # Bloque seulement si la file est pleine (le disque ne suit plus)
+        self.queue.put((filepath, image))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            filepath, image = item
+            if cv2.imwrite(filepath, image):
+                self.written += 1
+            else:
+                self.errors += 1
+                print(f"✗ Échec d'écriture: {filepath}")
+            self.queue.task_done()
+
+    def close(self):
+        """Attend la fin des écritures en cours"""
+        self.queue.put(None)
+        self.thread.join()
+
+
 # Création de la structure de dossiers
 print(f"\n[1/3] Création de la structure de dossiers...")
 print(f"Mode: {MODE}")
@@ -57,17 +131,36 @@ print(f"✓ Structure de {len(CLASSES)} classes créée!")
 
 # Initialiser la caméra
 print("\n[2/3] Initialisation de la caméra...")
-cap = cv2.VideoCapture(0)
+# Source et réglages de capture: SIGN_SOURCE, SIGN_CAPTURE_* (frame_sources.py)
+cap = make_source()
 
 if not cap.isOpened():
     print("✗ Erreur: Impossible d'accéder à la caméra")
     exit(1)
 
-print("✓ Caméra initialisée!")
+print(f"✓ Caméra initialisée! {cap.describe()}")
 
 # Définir le répertoire de travail
 directory = os.path.join(BASE_DIR, MODE)
 
+# Index des compteurs: un seul parcours des dossiers au démarrage
+count = build_class_index(directory)
+print(f"✓ Index chargé: {sum(count.values())} images existantes")
+
+writer = ImageWriter()
+preprocessor = RoiPreprocessor()
+burst_mode = False
+burst_class = None
+burst_remaining = 0
+
+
+def save_roi(cls, image):
+    """Réserve le prochain numéro de fichier et confie l'écriture au thread"""
+    filepath = os.path.join(directory, cls, f'{count[cls]}.jpg')
+    count[cls] += 1
+    writer.submit(filepath, image.copy())
+    return count[cls]
+
 print("\n[3/3] Démarrage de la capture...")
 print("\n📋 INSTRUCTIONS:")
 print("- Fais le signe devant la caméra")
@@ -77,6 +170,7 @@ print("  • A-Z pour les lettres")
 print("  • * pour Copier_Fichier")
 print("  • + pour Créer_Dossier")
 print("  • - pour Jeu")
+print(f"  • b pour le mode rafale ({BURST_SIZE} images par appui)")
 print("  • ESC pour quitter")
 print("\n" + "="*60 + "\n")
 
@@ -87,17 +181,8 @@ while True:
         print("Erreur de lecture de la caméra")
         break
     
-    # Effet miroir pour utilisation intuitive
-    frame = cv2.flip(frame, 1)
-    
-    # Compter les images existantes pour quelques classes principales
-    count = {
-        '0': len([f for f in os.listdir(os.path.join(directory, '0')) if f.endswith('.jpg')]) if os.path.exists(os.path.join(directory, '0')) else 0,
-        '1': len([f for f in os.listdir(os.path.join(directory, '1')) if f.endswith('.jpg')]) if os.path.exists(os.path.join(directory, '1')) else 0,
-        '2': len([f for f in os.listdir(os.path.join(directory, '2')) if f.endswith('.jpg')]) if os.path.exists(os.path.join(directory, '2')) else 0,
-        'A': len([f for f in os.listdir(os.path.join(directory, 'A')) if f.endswith('.jpg')]) if os.path.exists(os.path.join(directory, 'A')) else 0,
-        'B': len([f for f in os.listdir(os.path.join(directory, 'B')) if f.endswith('.jpg')]) if os.path.exists(os.path.join(directory, 'B')) else 0,
-    }
+    # Effet miroir pour utilisation intuitive (en place); roi est une vue
+    roi, (x1, y1, x2, y2) = preprocessor.extract(frame)
     
     # Afficher les informations sur l'écran
     cv2.putText(frame, f"MODE: {MODE.upper()}", (10, 30), 
@@ -108,25 +193,18 @@ while True:
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
     cv2.putText(frame, f"A: {count['A']}  B: {count['B']}", (10, 120), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+    if burst_mode:
+        burst_text = f"RAFALE: {burst_class} ({burst_remaining})" if burst_remaining else f"RAFALE x{BURST_SIZE}"
+        cv2.putText(frame, burst_text, (10, 145), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
     cv2.putText(frame, "Appuyez sur ESC pour quitter", (10, frame.shape[0] - 20), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
     
-    # Définir la région d'intérêt (ROI)
-    x1 = int(0.5 * frame.shape[1])
-    y1 = 10
-    x2 = frame.shape[1] - 10
-    y2 = int(0.5 * frame.shape[1])
-    
     # Dessiner le cadre ROI
     cv2.rectangle(frame, (x1-1, y1-1), (x2+1, y2+1), (255, 0, 0), 2)
     
-    # Extraire la ROI
-    roi = frame[y1:y2, x1:x2]
-    roi_resized = cv2.resize(roi, (64, 64))
-    
-    # Prétraitement: conversion en niveaux de gris et seuillage
-    roi_gray = cv2.cvtColor(roi_resized, cv2.COLOR_BGR2GRAY)
-    _, roi_thresh = cv2.threshold(roi_gray, 120, 255, cv2.THRESH_BINARY)
+    # Prétraitement: redimension, niveaux de gris et seuillage (tampons réutilisés)
+    roi_thresh = preprocessor.binarize(roi)
     
     # Afficher les images
     cv2.imshow("Capture Dataset - Frame Principale", frame)
@@ -140,45 +218,36 @@ while True:
         print("\n>>> Arrêt de la capture...")
         break
     
-    # Capturer pour les chiffres (0-9)
-    if key >= ord('0') and key <= ord('9'):
-        cls = chr(key)
-        filepath = os.path.join(directory, cls, f'{count.get(cls, 0)}.jpg')
-        cv2.imwrite(filepath, roi_thresh)
-        print(f"✓ Image sauvegardée: {cls}/ ({count.get(cls, 0) + 1} images)")
-    
-    # Capturer pour les lettres (A-Z)
-    elif key >= ord('A') and key <= ord('Z'):
-        cls = chr(key)
-        cls_dir = os.path.join(directory, cls)
-        if os.path.exists(cls_dir):
-            num_images = len([f for f in os.listdir(cls_dir) if f.endswith('.jpg')])
-            filepath = os.path.join(cls_dir, f'{num_images}.jpg')
-            cv2.imwrite(filepath, roi_thresh)
-            print(f"✓ Image sauvegardée: {cls}/ ({num_images + 1} images)")
-    
-    # Touches spéciales pour actions
-    elif key == ord('*'):
-        cls_dir = os.path.join(directory, 'Coppier_Fichier')
-        num_images = len([f for f in os.listdir(cls_dir) if f.endswith('.jpg')])
-        cv2.imwrite(os.path.join(cls_dir, f'{num_images}.jpg'), roi_thresh)
-        print(f"✓ Image sauvegardée: Coppier_Fichier/ ({num_images + 1} images)")
-    
-    elif key == ord('+'):
-        cls_dir = os.path.join(directory, 'Creer_Dossier')
-        num_images = len([f for f in os.listdir(cls_dir) if f.endswith('.jpg')])
-        cv2.imwrite(os.path.join(cls_dir, f'{num_images}.jpg'), roi_thresh)
-        print(f"✓ Image sauvegardée: Creer_Dossier/ ({num_images + 1} images)")
-    
-    elif key == ord('-'):
-        cls_dir = os.path.join(directory, 'Jeu')
-        num_images = len([f for f in os.listdir(cls_dir) if f.endswith('.jpg')])
-        cv2.imwrite(os.path.join(cls_dir, f'{num_images}.jpg'), roi_thresh)
-        print(f"✓ Image sauvegardée: Jeu/ ({num_images + 1} images)")
+    # Rafale en cours: une ROI par image, sans bloquer l'aperçu
+    if burst_remaining > 0:
+        total = save_roi(burst_class, roi_thresh)
+        burst_remaining -= 1
+        if burst_remaining == 0:
+            print(f"✓ Rafale terminée: {burst_class}/ ({total} images)")
+    
+    # Activer/désactiver le mode rafale
+    if key == ord('b'):
+        burst_mode = not burst_mode
+        print(f">>> Mode rafale {'activé' if burst_mode else 'désactivé'}")
+        continue
+    
+    # Capturer pour les chiffres (0-9), les lettres (A-Z) et les actions (*, +, -)
+    cls = key_to_class(key)
+    if cls is not None and cls in count:
+        if burst_mode:
+            burst_class = cls
+            burst_remaining = BURST_SIZE
+        else:
+            total = save_roi(cls, roi_thresh)
+            print(f"✓ Image sauvegardée: {cls}/ ({total} images)")
 
 # Libération des ressources
 cap.release()
 cv2.destroyAllWindows()
 
+print("Écriture des images en attente...")
+writer.close()
+print(f"✓ {writer.written} images écrites ({writer.errors} échecs)")
+
 print("\n✓ Capture terminée avec succès!")
 print("="*60)
@@ -2,52 +2,41 @@
 """
 Reconnaissance de la langue des signes - Version Complète avec Actions
 Compatible Python 3.13 + TensorFlow 2.20 + Keras 3.x
-Reconstruit le modèle manuellement pour compatibilité totale
+Modèle chargé par InferenceSession: artefact unique (model-bw.signmodel)
+s'il existe, sinon model-bw.json + model-bw.h5
 """
 
 import numpy as np
 import cv2
-import operator
 import os
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
+
+from inference_session import InferenceSession, artifact_for
+from gating import make_gate
+from instrumentation import make_profiler
+from prediction_cache import make_cache, close_cache
+from frame_loop import SteadyFrameLoop
+from frame_sources import make_source
+
+# Moteur d'inférence: 'keras' (TensorFlow), 'numpy' (numpy_inference.py, sans TensorFlow),
+# 'int8' (fichier compressé, calcul float) ou 'tflite' (calcul int8), quantifiés par quantize_model.py
+INFERENCE_ENGINE = os.environ.get('SIGN_ENGINE', 'keras')
 
 print("="*60)
 print("SYSTÈME DE RECONNAISSANCE DE LA LANGUE DES SIGNES")
 print("="*60)
 
-# Reconstruction manuelle du modèle
-print("\n[1/3] Reconstruction du modèle...")
+# Chargement du modèle
+print("\n[1/3] Chargement du modèle...")
 try:
-    model = keras.Sequential([
-        layers.Conv2D(32, (3, 3), activation='relu', input_shape=(64, 64, 1)),
-        layers.MaxPooling2D(pool_size=(2, 2)),
-        layers.Conv2D(32, (3, 3), activation='relu'),
-        layers.MaxPooling2D(pool_size=(2, 2)),
-        layers.Flatten(),
-        layers.Dense(128, activation='relu'),
-        layers.Dense(29, activation='softmax')
-    ])
-    
-    print("✓ Architecture du modèle créée")
-    
-    model.compile(
-        optimizer='adam',
-        loss='categorical_crossentropy',
-        metrics=['accuracy']
-    )
-    
-    print("✓ Modèle compilé")
-    model.load_weights("model-bw.h5")
-    print("✓ Poids chargés avec succès!")
-    print(f"  Architecture: {len(model.layers)} couches")
-    
-    loaded_model = model
+    # Session partagée: modèle construit une fois, prédiction compilée et échauffée
+    # Artefact unique (SIGN_MODEL ou model-bw.signmodel) s'il existe, sinon JSON + HDF5
+    loaded_model = InferenceSession(engine=INFERENCE_ENGINE, artifact_path=artifact_for(INFERENCE_ENGINE))
+    print(f"✓ Modèle chargé (moteur {INFERENCE_ENGINE}) en {loaded_model.load_time:.2f} s")
+    print(f"✓ Échauffement terminé en {loaded_model.warmup_time * 1000:.0f} ms")
     
 except FileNotFoundError:
-    print("✗ Erreur: Le fichier model-bw.h5 n'a pas été trouvé!")
-    print("\nAssurez-vous que model-bw.h5 est dans le même dossier que ce script.")
+    print("✗ Erreur: Le fichier du modèle n'a pas été trouvé!")
+    print("\nAssurez-vous que model-bw.signmodel (ou model-bw.json + model-bw.h5) est dans le même dossier que ce script.")
     input("\nAppuyez sur Entrée pour quitter...")
     exit(1)
 except Exception as e:
@@ -55,27 +44,12 @@ except Exception as e:
     input("\nAppuyez sur Entrée pour quitter...")
     exit(1)
 
-# Dictionnaires de catégories
-categorie_nombres = {
-    0: 'ZERO', 1: 'ONE', 2: 'TWO', 3: 'THREE', 4: 'FOUR', 
-    5: 'FIVE', 6: 'SIX', 7: 'SEVEN', 8: 'EIGHT', 9: 'NINE'
-}
-
-categorie_alphabet = {
-    0: 'A', 1: 'B', 2: 'C', 3: 'D', 4: 'E',
-    5: 'F', 6: 'G', 7: 'H', 8: 'I', 9: 'J',
-    10: 'K', 11: 'L', 12: 'M'
-}
-
-categorie_actions = {
-    0: 'Creer Dossier',
-    1: 'Coppier Fichier', 
-    2: 'Jeu',
-    3: 'Ecrire Fichier'
-}
+# Touche du mode -> catégories de categories.py
+DEMO_MODES = {"1": 'chiffres', "2": 'lettres', "3": 'actions'}
 
 print("\n[2/3] Initialisation de la caméra...")
-cap = cv2.VideoCapture(0)
+# Source et réglages de capture: SIGN_SOURCE, SIGN_CAPTURE_* (frame_sources.py)
+cap = make_source()
 
 if not cap.isOpened():
     print("✗ Erreur: Impossible d'accéder à la caméra")
@@ -85,7 +59,7 @@ if not cap.isOpened():
     input("\nAppuyez sur Entrée pour quitter...")
     exit(1)
 
-print("✓ Caméra initialisée!")
+print(f"✓ Caméra initialisée! {cap.describe()}")
 
 print("\n[3/3] Démarrage de la détection...")
 print("\nCONSIGNES:")
@@ -98,48 +72,70 @@ print("\n" + "="*60 + "\n")
 
 mode = None
 
+# Tampons réutilisés à chaque image: capture, ROI, tenseur d'entrée, top-k
+loop = SteadyFrameLoop(k=3)
+
+# Instrumentation optionnelle (SIGN_TRACE=1, SIGN_TRACE_FILE=trace.jsonl)
+profiler = make_profiler()
+
+# Réutilisation de la prédiction si la ROI n'a pas changé (SIGN_GATE=1)
+gate = make_gate()
+
+# Cache LRU des prédictions par masque binaire (SIGN_CACHE=1, SIGN_CACHE_FILE=...)
+cache = make_cache(session=loaded_model)
+
+
+def predict_one(x):
+    return loaded_model.predict_batch(x)[0]
+
+
+def run_model(x):
+    profiler.inference()
+    if gate is not None:
+        return gate.timed_model(predict_one, x)
+    return predict_one(x)
+
+
+def cached_model(x):
+    if cache is not None:
+        return cache.predict(x, run_model)
+    return run_model(x)
+
+
 try:
     while True:
-        ret, frame = cap.read()
+        profiler.begin_frame()
+        ret, frame = loop.read(cap)
         if not ret:
             print("Erreur de lecture de la caméra")
             break
+        profiler.mark('capture')
         
-        frame = cv2.flip(frame, 1)
-        
-        # Définir la région d'intérêt (ROI)
-        x1 = int(0.5 * frame.shape[1])
-        y1 = 10
-        x2 = frame.shape[1] - 10
-        y2 = int(0.5 * frame.shape[1])
+        # Miroir en place et région d'intérêt (ROI, vue sur l'image)
+        x1, y1, x2, y2 = loop.extract()
         
         cv2.rectangle(frame, (x1-1, y1-1), (x2+1, y2+1), (255, 0, 0), 2)
         
-        roi = frame[y1:y2, x1:x2]
-        
-        # Prétraitement de l'image
-        roi_processed = cv2.resize(roi, (64, 64))
-        roi_processed = cv2.cvtColor(roi_processed, cv2.COLOR_BGR2GRAY)
-        _, roi_processed = cv2.threshold(roi_processed, 120, 255, cv2.THRESH_BINARY)
+        # Prétraitement de l'image dans le tenseur d'entrée persistant (1, 64, 64, 1)
+        roi_normalized = loop.preprocess()
         
-        cv2.imshow("Image traitee", roi_processed)
+        cv2.imshow("Image traitee", loop.mask)
+        profiler.mark('preprocess')
         
-        roi_normalized = roi_processed.astype('float32') / 255.0
-        
-        # Prédiction
-        result = loaded_model.predict(roi_normalized.reshape(1, 64, 64, 1), verbose=0)
+        # Prédiction (uniquement si un mode est actif)
+        if mode is not None:
+            if gate is not None:
+                result = gate.predict(roi_normalized, cached_model)
+            else:
+                result = cached_model(roi_normalized)
+        elif gate is not None:
+            gate.skip()
+        profiler.mark('predict')
         
         # Affichage selon le mode
         if mode == "1":
             # Mode NOMBRES
-            prediction_nombres = {
-                'ZERO': result[0][0], 'ONE': result[0][1], 'TWO': result[0][2],
-                'THREE': result[0][3], 'FOUR': result[0][4], 'FIVE': result[0][5],
-                'SIX': result[0][6], 'SEVEN': result[0][7], 'EIGHT': result[0][8],
-                'NINE': result[0][9]
-            }
-            prediction_sorted = sorted(prediction_nombres.items(), 
-                                       key=operator.itemgetter(1), reverse=True)
+            prediction_sorted = loop.top_k(DEMO_MODES[mode], result, k=1)
             
             detected_sign = prediction_sorted[0][0]
             confidence = prediction_sorted[0][1] * 100
@@ -153,15 +149,7 @@ try:
             
         elif mode == "2":
             # Mode ALPHABET
-            prediction_alphabet = {
-                'A': result[0][0], 'B': result[0][1], 'C': result[0][2],
-                'D': result[0][3], 'E': result[0][4], 'F': result[0][5],
-                'G': result[0][6], 'H': result[0][7], 'I': result[0][8],
-                'J': result[0][9], 'K': result[0][10], 'L': result[0][11],
-                'M': result[0][12]
-            }
-            prediction_sorted = sorted(prediction_alphabet.items(), 
-                                       key=operator.itemgetter(1), reverse=True)
+            prediction_sorted = loop.top_k(DEMO_MODES[mode], result, k=1)
             
             detected_sign = prediction_sorted[0][0]
             confidence = prediction_sorted[0][1] * 100
@@ -174,15 +162,8 @@ try:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             
         elif mode == "3":
-            # Mode ACTIONS
-            prediction_actions = {
-                'Creer Dossier': result[0][13],
-                'Coppier Fichier': result[0][14],
-                'Jeu': result[0][15],
-                'Ecrire Fichier': result[0][16]
-            }
-            prediction_sorted = sorted(prediction_actions.items(), 
-                                       key=operator.itemgetter(1), reverse=True)
+            # Mode ACTIONS (top 3)
+            prediction_sorted = loop.top_k(DEMO_MODES[mode], result)
             
             detected_sign = prediction_sorted[0][0]
             confidence = prediction_sorted[0][1] * 100
@@ -208,9 +189,14 @@ try:
             cv2.putText(frame, "'1' = Nombres | '2' = Alphabet | '3' = Actions", (10, 60), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
         
+        profiler.draw_overlay(frame, (10, frame.shape[0] - 40))
+        profiler.mark('overlay')
+        
         cv2.imshow("Detection de la langue des signes", frame)
         
         key = cv2.waitKey(10) & 0xFF
+        profiler.mark('display')
+        profiler.end_frame(mode=mode)
         
         if key == 27:  # ESC
             break
@@ -231,6 +217,10 @@ except Exception as e:
     import traceback
     traceback.print_exc()
 finally:
+    profiler.close()
+    if gate is not None:
+        print(f"\nFiltrage par changement: {gate.stats()}")
+    close_cache(cache)
     cap.release()
     cv2.destroyAllWindows()
     print("\n✓ Programme terminé avec succès!")
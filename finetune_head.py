@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Réentraînement Rapide de la Tête - Reconnaissance Langue des Signes
+Ajoute de nouveaux signes sans réentraîner les convolutions
+
+Les deux blocs Conv2D + MaxPooling sont gelés: chaque image du dataset les
+traverse une seule fois (moteur NumPy) et son vecteur de caractéristiques
+(sortie du Flatten, 6272 valeurs) est rangé dans un cache np.memmap:
+
+    DataSet/features/features.npy   float32 (capacité, 6272)
+    DataSet/features/index.json     chemin -> (ligne, mtime, taille) + empreinte des convolutions
+
+Aux exécutions suivantes, seules les images nouvelles ou modifiées (mtime ou
+taille différents) sont recalculées; le cache entier est invalidé si les
+poids des convolutions changent. Seule la tête Dense(128) -> softmax est
+ensuite entraînée (Keras) sur les caractéristiques en cache: quelques
+secondes au lieu d'heures. Les colonnes des classes déjà connues du modèle
+de base (artefact) servent de point de départ.
+
+Pas d'augmentation de données: les caractéristiques sont celles des images
+d'origine.
+
+Utilisation:
+    python finetune_head.py                        # DataSet/train + DataSet/test -> model-bw.signmodel
+    python finetune_head.py --features-only        # met seulement le cache à jour
+    python finetune_head.py --export-h5            # écrit aussi model-bw.json / model-bw.h5
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from model_artifact import ARTIFACT_PATH, default_artifact_path, load_artifact, save_artifact
+from numpy_inference import NumpyCNN, load_h5_weights, save_h5_weights
+from pack_dataset import list_classes, list_samples, read_mask
+
+
+FEATURE_DIR = 'DataSet/features'
+FEATURES_FILE = 'features.npy'
+INDEX_FILE = 'index.json'
+
+
+def conv_fingerprint(model):
+    """Empreinte des poids des couches gelées (jusqu'au Flatten)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for layer in model.layers[:model.feature_stop]:
+        for key in ('kernel', 'bias'):
+            if key in layer:
+                digest.update(np.ascontiguousarray(layer[key]).tobytes())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """Caractéristiques par image dans un np.memmap, indexées par chemin et mtime"""
+
+    def __init__(self, directory, model_id, dim):
+        self.directory = directory
+        self.model_id = model_id
+        self.dim = dim
+        self.features_path = os.path.join(directory, FEATURES_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        index = None
+        if os.path.exists(self.index_path) and os.path.exists(self.features_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('model_id') != model_id or index.get('dim') != dim:
+                print("⚠️ Convolutions modifiées: cache de caractéristiques invalidé")
+                index = None
+
+        if index is None:
+            self.entries = {}
+            self.free = []
+            self.features = open_memmap(self.features_path, mode='w+', dtype=np.float32, shape=(0, dim))
+        else:
+            self.entries = index['entries']
+            self.free = index['free']
+            self.features = open_memmap(self.features_path, mode='r+')
+
+        # Compteurs de la dernière mise à jour
+        self.computed = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _grow(self, capacity):
+        """Agrandit le fichier memmap (copie dans un nouveau fichier puis remplacement)"""
+        tmp_path = self.features_path + '.tmp.npy'
+        grown = open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, self.dim))
+        grown[:len(self.features)] = self.features
+        grown.flush()
+        del grown
+        self.features = None
+        os.replace(tmp_path, self.features_path)
+        self.features = open_memmap(self.features_path, mode='r+')
+
+    def _allocate(self, count):
+        """Réserve 'count' lignes (lignes libérées d'abord)"""
+        rows = [self.free.pop() for _ in range(min(count, len(self.free)))]
+        used = {entry[0] for entry in self.entries.values()} | set(rows) | set(self.free)
+        end = max(used) + 1 if used else 0
+        needed = count - len(rows)
+        if end + needed > len(self.features):
+            self._grow(max(end + needed, 2 * len(self.features), 1024))
+        rows += list(range(end, end + needed))
+        return rows
+
+    def update(self, paths, keys, extract, batch_size=256):
+        """Lignes du cache pour chaque image; calcule les images nouvelles ou modifiées"""
+        self.computed = self.reused = 0
+        stale = []
+        for path, key in zip(paths, keys):
+            entry = self.entries.get(key)
+            if entry is not None and tuple(entry[1:]) == self.signature(path):
+                self.reused += 1
+            else:
+                if entry is not None:
+                    # Image modifiée: sa ligne est recalculée sur place
+                    self.free.append(entry[0])
+                    del self.entries[key]
+                stale.append((path, key))
+
+        rows = self._allocate(len(stale))
+        for start in range(0, len(stale), batch_size):
+            chunk = stale[start:start + batch_size]
+            x = np.stack([read_mask(path) for path, _ in chunk])[..., np.newaxis] / np.float32(255.0)
+            chunk_rows = rows[start:start + len(chunk)]
+            self.features[chunk_rows] = extract(x)
+            for (path, key), row in zip(chunk, chunk_rows):
+                self.entries[key] = [row, *self.signature(path)]
+            self.computed += len(chunk)
+            print(f"\r  {self.computed}/{len(stale)} images calculées", end='', flush=True)
+        if stale:
+            print()
+        return np.array([self.entries[key][0] for key in keys], dtype=np.int64)
+
+    def prune(self, keys):
+        """Libère les lignes des images qui ne sont plus dans le dataset"""
+        keep = set(keys)
+        removed = [key for key in self.entries if key not in keep]
+        for key in removed:
+            self.free.append(self.entries.pop(key)[0])
+        return len(removed)
+
+    def save(self):
+        self.features.flush()
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model_id': self.model_id, 'dim': self.dim,
+                       'entries': self.entries, 'free': self.free}, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def load_base_model(args):
+    """(architecture, poids, noms des classes ou None) du modèle de base"""
+    artifact_path = args.base or default_artifact_path()
+    if artifact_path is not None:
+        artifact = load_artifact(artifact_path)
+        weights = {name: [np.array(a) for a in arrays] for name, arrays in artifact.weights.items()}
+        print(f"✓ Modèle de base: {artifact_path}")
+        return artifact.architecture, weights, artifact.class_names
+    with open(args.json, 'r') as json_file:
+        architecture = json.load(json_file)
+    print(f"✓ Modèle de base: {args.json} + {args.weights}")
+    return architecture, load_h5_weights(args.weights), None
+
+
+def head_layer_names(architecture):
+    """Noms des couches Dense de la tête (dans l'ordre)"""
+    config = architecture['config']
+    layers = config['layers'] if isinstance(config, dict) else config
+    return [l['config']['name'] for l in layers if l['class_name'] == 'Dense']
+
+
+def with_output_units(architecture, units):
+    """Copie de l'architecture avec 'units' sorties sur la dernière couche Dense"""
+    architecture = copy.deepcopy(architecture)
+    config = architecture['config']
+    layers = config['layers'] if isinstance(config, dict) else config
+    [l for l in layers if l['class_name'] == 'Dense'][-1]['config']['units'] = units
+    return architecture
+
+
+def train_head(x_train, y_train, x_test, y_test, base_head, class_map, args):
+    """Entraîne Dense(128) -> softmax sur les caractéristiques; retourne [[k1, b1], [k2, b2]]"""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    num_classes = y_train.shape[1]
+    head = keras.Sequential([
+        layers.Input(shape=(x_train.shape[1],)),
+        layers.Dense(base_head[0][0].shape[1], activation='relu'),
+        layers.Dense(num_classes, activation='softmax'),
+    ])
+    # Point de départ: couche cachée du modèle de base, colonnes des classes déjà connues
+    head.layers[0].set_weights(base_head[0])
+    kernel, bias = head.layers[1].get_weights()
+    for new_index, old_index in class_map.items():
+        kernel[:, new_index] = base_head[1][0][:, old_index]
+        bias[new_index] = base_head[1][1][old_index]
+    head.layers[1].set_weights([kernel, bias])
+
+    head.compile(optimizer=keras.optimizers.Adam(args.learning_rate),
+                 loss='categorical_crossentropy', metrics=['accuracy'])
+    validation = (x_test, y_test) if len(x_test) else None
+    monitor = 'val_loss' if validation else 'loss'
+    head.fit(x_train, y_train, batch_size=args.batch_size, epochs=args.epochs, shuffle=True,
+             validation_data=validation, verbose=2,
+             callbacks=[keras.callbacks.EarlyStopping(monitor=monitor, patience=args.patience,
+                                                      restore_best_weights=True)])
+    if validation:
+        loss, accuracy = head.evaluate(x_test, y_test, verbose=0)
+        print(f"✓ Précision validation: {accuracy * 100:.2f}% (loss {loss:.4f})")
+    return [layer.get_weights() for layer in head.layers]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Réentraînement de la tête dense sur caractéristiques en cache")
+    parser.add_argument('--base-dir', default='DataSet', help="dossier contenant train/ et test/")
+    parser.add_argument('--cache-dir', default=FEATURE_DIR, help="cache des caractéristiques")
+    parser.add_argument('--base', help="artefact du modèle de base (par défaut SIGN_MODEL ou model-bw.signmodel)")
+    parser.add_argument('--json', default='model-bw.json', help="architecture de base (sans artefact)")
+    parser.add_argument('--weights', default='model-bw.h5', help="poids de base (sans artefact)")
+    parser.add_argument('-o', '--output', default=ARTIFACT_PATH, help="artefact produit")
+    parser.add_argument('--export-h5', action='store_true', help="écrit aussi model-bw.json et model-bw.h5")
+    parser.add_argument('--features-only', action='store_true', help="met seulement le cache à jour")
+    parser.add_argument('--epochs', type=int, default=50, help="époques maximales de la tête")
+    parser.add_argument('--patience', type=int, default=5, help="arrêt anticipé")
+    parser.add_argument('--batch-size', type=int, default=64, help="taille des lots")
+    parser.add_argument('--learning-rate', type=float, default=1e-3, help="pas d'apprentissage (Adam)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    print("="*60)
+    print("⚡ RÉENTRAÎNEMENT RAPIDE DE LA TÊTE")
+    print("="*60)
+
+    train_dir = os.path.join(args.base_dir, 'train')
+    test_dir = os.path.join(args.base_dir, 'test')
+    if not os.path.isdir(train_dir):
+        print(f"✗ Erreur: {train_dir} n'existe pas")
+        return 1
+
+    print("\n[1/3] Modèle de base...")
+    architecture, weights, base_classes = load_base_model(args)
+    model = NumpyCNN.from_config(architecture, weights)
+    dim = int(np.prod(model.features(np.zeros((1,) + model.input_shape, np.float32)).shape[1:]))
+
+    print("\n[2/3] Caractéristiques des convolutions gelées...")
+    classes = list_classes(train_dir)
+    train = list_samples(train_dir, classes)
+    test = list_samples(test_dir, classes) if os.path.isdir(test_dir) else []
+    paths = [path for path, _ in train + test]
+    keys = [os.path.relpath(path, args.base_dir).replace(os.sep, '/') for path in paths]
+
+    cache = FeatureCache(args.cache_dir, conv_fingerprint(model), dim)
+    cache_start = time.perf_counter()
+    rows = cache.update(paths, keys, model.features)
+    removed = cache.prune(keys)
+    cache.save()
+    print(f"✓ {len(classes)} classes, {len(train)} images train, {len(test)} images test")
+    print(f"✓ Cache: {cache.computed} calculées, {cache.reused} réutilisées, {removed} supprimées "
+          f"({time.perf_counter() - cache_start:.1f} s)")
+    if args.features_only:
+        return 0
+
+    print("\n[3/3] Entraînement de la tête...")
+    labels = np.array([label for _, label in train + test])
+    one_hot = np.eye(len(classes), dtype=np.float32)[labels]
+    x_train, x_test = cache.features[rows[:len(train)]], cache.features[rows[len(train):]]
+    y_train, y_test = one_hot[:len(train)], one_hot[len(train):]
+
+    hidden, output = head_layer_names(architecture)[-2:]
+    class_map = {}
+    if base_classes is not None:
+        old_index = {name: i for i, name in enumerate(base_classes)}
+        class_map = {i: old_index[name] for i, name in enumerate(classes) if name in old_index}
+        print(f"✓ {len(class_map)} classes connues du modèle de base, {len(classes) - len(class_map)} nouvelles")
+    (hidden_weights, output_weights) = train_head(x_train, y_train, x_test, y_test,
+                                                  [weights[hidden], weights[output]], class_map, args)
+
+    weights[hidden], weights[output] = hidden_weights, output_weights
+    architecture = with_output_units(architecture, len(classes))
+    save_artifact(args.output, architecture, weights, classes,
+                  metadata={'finetuned_from': args.base or default_artifact_path() or args.weights,
+                            'created': time.strftime('%Y-%m-%dT%H:%M:%S')})
+    print(f"✓ Artefact enregistré: {args.output}")
+    if args.export_h5:
+        config = architecture['config']
+        layer_names = [l['config']['name'] for l in (config['layers'] if isinstance(config, dict) else config)
+                       if l['class_name'] != 'InputLayer']
+        with open(args.json, 'w') as json_file:
+            json.dump(architecture, json_file)
+        save_h5_weights(args.weights, weights, layer_names)
+        print(f"✓ Modèle exporté: {args.json} + {args.weights}")
+
+    print(f"\n🎉 Terminé en {time.perf_counter() - start:.1f} s")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
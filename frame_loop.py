@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Boucle Image par Image en Régime Établi - Reconnaissance Langue des Signes
+Capture, miroir, prétraitement et top-k sans allocation par image (hors modèle)
+
+Après la première image, chaque étape réécrit les mêmes tampons:
+- capture: cap.read(image=tampon) remplit l'image précédente (réallouée
+  seulement si la caméra change de résolution)
+- miroir: en place, la ROI est une vue sur le tampon de capture
+- prétraitement: tampons préalloués (RoiPreprocessor), tenseur d'entrée
+  (1, 64, 64, 1) persistant passé tel quel au modèle
+- top-k: np.argpartition sur les indices du mode (TopKSelector), au lieu
+  d'un dictionnaire classe -> probabilité trié à chaque image
+
+Restent les allocations du moteur d'inférence (~1,7 Mo par image avec le
+moteur NumPy) et du rendu (texte, Tk), libérées à chaque image: la mémoire
+tracée reste plate, ce que vérifie check_allocations.py avec tracemalloc.
+Ces allocations ne sont pas supprimées par cette boucle.
+
+Une instance par thread: le tampon de capture et le tenseur sont réécrits
+à chaque image.
+"""
+
+from categories import TopKSelector
+from preprocessing import RoiPreprocessor
+
+
+class SteadyFrameLoop:
+    """Tampons d'une boucle capture -> prétraitement -> top-k, réutilisés d'une image à l'autre"""
+
+    def __init__(self, flip=True, k=4):
+        self.frame = None  # tampon de capture (alloué par la première lecture)
+        self.preprocessor = RoiPreprocessor(flip)
+        self.k = k
+        self._selector = None
+        self._roi = None
+
+    def read(self, cap):
+        """Lit l'image suivante dans le tampon de capture: (ret, image)"""
+        ret, frame = cap.read(self.frame)
+        if ret:
+            self.frame = frame
+        return ret, frame
+
+    def extract(self):
+        """Miroir en place de l'image lue; retourne la ROI (x1, y1, x2, y2)
+
+        Le prétraitement lit la ROI dans l'image: ce qui y est dessiné avant
+        preprocess() en fait partie, comme dans la chaîne d'origine.
+        """
+        self._roi, bounds = self.preprocessor.extract(self.frame)
+        return bounds
+
+    def preprocess(self):
+        """ROI -> tenseur d'entrée persistant (1, 64, 64, 1); masque 0/255 dans self.mask"""
+        self.preprocessor.binarize(self._roi)
+        self.preprocessor.normalize()
+        return self.preprocessor.tensor
+
+    @property
+    def mask(self):
+        return self.preprocessor.mask
+
+    @property
+    def tensor(self):
+        return self.preprocessor.tensor
+
+    def top_k(self, mode, predictions, k=None):
+        """[(nom, probabilité)] des meilleures sorties du mode (indices précalculés)"""
+        if self._selector is None or self._selector.num_outputs != len(predictions):
+            self._selector = TopKSelector(len(predictions), self.k)
+        return self._selector.select(mode, predictions, k)
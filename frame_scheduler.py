@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Ordonnancement Adaptatif de l'Inférence - Reconnaissance Langue des Signes
+Tient une cadence d'affichage cible en espaçant les prédictions
+
+Par défaut, update_frame prédit à chaque tour et se replanifie avec
+root.after(10), quel que soit le temps passé: sur une machine lente
+l'affichage s'effondre, sur une machine rapide le CPU tourne pour rien.
+AdaptiveScheduler:
+- mesure en continu (moyenne glissante exponentielle) le coût d'un tour
+  d'affichage (capture, cadre, conversion, Tk) et celui d'une prédiction
+  (prétraitement + modèle)
+- découple les deux cadences: l'image est affichée à chaque tour, la
+  prédiction seulement quand elle est due (les labels gardent le dernier
+  résultat)
+- choisit la cadence d'affichage (la cible, ou ce que le budget CPU permet)
+  puis la cadence d'inférence qui tient dans le reste du budget, sans
+  descendre sous un plancher
+- renvoie le délai root.after() jusqu'au tour suivant, d'après le temps déjà
+  passé dans le tour
+
+Les deux coûts sont du temps CPU de thread (time.thread_time): l'attente
+de la caméra dans cap.read() n'en fait pas partie, et un CPU chargé par
+d'autres processus ne gonfle pas les coûts. En mode pipeline, le coût d'une
+prédiction vient des compteurs du thread d'inférence (temps CPU cumulé,
+résultats produits), pas des ROI soumises (une ROI écrasée n'est pas
+comptée). Le budget CPU est la part d'un cœur que la boucle peut occuper
+(1.0 = un cœur entier).
+
+Les cadences choisies et mesurées sont exposées par stats(): trace
+SIGN_TRACE_FILE, console à la fermeture, latency_harness.py.
+
+Activation (désactivée par défaut: FixedScheduler, prédiction à chaque tour
+et root.after(10)):
+    SIGN_TARGET_FPS=30           -> cadence d'affichage visée
+    SIGN_CPU_BUDGET=0.8          -> part d'un cœur pour la boucle
+    SIGN_MIN_INFERENCE_FPS=2     -> plancher de la cadence d'inférence
+"""
+
+import os
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+DEFAULT_CPU_BUDGET = 0.8
+DEFAULT_MIN_INFERENCE_FPS = 2.0
+FIXED_DELAY_MS = 10  # délai d'origine de update_frame
+
+
+class FixedScheduler:
+    """Comportement d'origine: prédiction à chaque tour, root.after(10)"""
+
+    enabled = False
+
+    def begin_tick(self):
+        pass
+
+    def should_infer(self):
+        return True
+
+    def inference(self):
+        return nullcontext()
+
+    def mark_submitted(self):
+        pass
+
+    def record_worker(self, inferences, results, cpu_time):
+        pass
+
+    def end_tick(self):
+        return FIXED_DELAY_MS
+
+    def stats(self):
+        return {}
+
+
+FIXED_SCHEDULER = FixedScheduler()
+
+
+class AdaptiveScheduler:
+    """Cadences d'affichage et d'inférence ajustées aux coûts mesurés"""
+
+    enabled = True
+
+    def __init__(self, target_fps, cpu_budget=DEFAULT_CPU_BUDGET,
+                 min_inference_fps=DEFAULT_MIN_INFERENCE_FPS, smoothing=0.1, window=1.0):
+        if target_fps <= 0 or cpu_budget <= 0:
+            raise ValueError("cadence cible et budget CPU doivent être positifs")
+        self.target_fps = target_fps
+        self.cpu_budget = cpu_budget
+        self.min_inference_fps = min(min_inference_fps, target_fps)
+        self.smoothing = smoothing
+        self.window = window
+
+        # Coûts estimés (s): tour d'affichage seul, prédiction
+        self.frame_cost = None
+        self.inference_cost = None
+
+        # Cadences choisies et délai du dernier tour
+        self.display_fps = target_fps
+        self.inference_fps = target_fps
+        self.delay_ms = 0
+
+        # Cadences mesurées (fenêtre glissante)
+        self.ticks = 0
+        self.inferences = 0
+        self.measured_display_fps = 0.0
+        self.measured_inference_fps = 0.0
+        self._history = deque()
+
+        self._tick_start = None
+        self._tick_cpu = 0.0
+        self._inference_cpu = 0.0
+        self._next_inference = 0.0
+        self._worker_totals = None  # (inférences, résultats, temps CPU) au dernier relevé
+
+    def begin_tick(self):
+        self._tick_start = time.perf_counter()
+        self._tick_cpu = time.thread_time()
+        self._inference_cpu = 0.0
+
+    def should_infer(self):
+        """Vrai si une prédiction est due (tolérance d'un demi-tour d'affichage)"""
+        return time.perf_counter() >= self._next_inference - 0.5 / self.display_fps
+
+    @contextmanager
+    def inference(self):
+        """Prédiction dans le thread de l'interface: mesure son temps CPU"""
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            cost = time.thread_time() - cpu
+            self._inference_cpu += cost
+            self.inference_cost = self._smooth(self.inference_cost, cost)
+            self.inferences += 1
+            self.mark_submitted()
+
+    def mark_submitted(self):
+        """Prédiction lancée (ou ROI soumise) à ce tour: la suivante est due dans 1/inference_fps"""
+        start = self._tick_start if self._tick_start is not None else time.perf_counter()
+        self._next_inference = start + 1.0 / self.inference_fps
+
+    def record_worker(self, inferences, results, cpu_time):
+        """Compteurs cumulés du thread d'inférence (InferenceWorker.totals())"""
+        if self._worker_totals is not None:
+            inferences0, results0, cpu_time0 = self._worker_totals
+            self.inferences += inferences - inferences0
+            if results > results0:
+                self.inference_cost = self._smooth(self.inference_cost,
+                                                   (cpu_time - cpu_time0) / (results - results0))
+        self._worker_totals = (inferences, results, cpu_time)
+
+    def end_tick(self):
+        """Met à jour coûts et cadences; retourne le délai root.after() en ms"""
+        now = time.perf_counter()
+        elapsed = now - self._tick_start
+        cost = max(0.0, time.thread_time() - self._tick_cpu - self._inference_cpu)
+        self.frame_cost = self._smooth(self.frame_cost, cost)
+        self._adapt()
+
+        self.ticks += 1
+        self._history.append((now, self.ticks, self.inferences))
+        while len(self._history) > 2 and now - self._history[0][0] > self.window:
+            self._history.popleft()
+        t0, ticks0, inferences0 = self._history[0]
+        if now > t0:
+            self.measured_display_fps = (self.ticks - ticks0) / (now - t0)
+            self.measured_inference_fps = (self.inferences - inferences0) / (now - t0)
+
+        self.delay_ms = max(1, int(round((1.0 / self.display_fps - elapsed) * 1000)))
+        return self.delay_ms
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def _adapt(self):
+        """Cadence d'affichage puis d'inférence qui tiennent dans le budget CPU"""
+        frame_cost = self.frame_cost or 0.0
+        inference_cost = self.inference_cost or 0.0
+        display_fps = self.target_fps
+        if frame_cost > 0:
+            display_fps = min(display_fps, self.cpu_budget / frame_cost)
+        inference_fps = display_fps
+        if inference_cost > 0:
+            remaining = self.cpu_budget - display_fps * frame_cost
+            inference_fps = min(display_fps, max(self.min_inference_fps, remaining / inference_cost))
+            # Le plancher d'inférence passe avant la fluidité de l'affichage
+            if frame_cost > 0 and display_fps * frame_cost + inference_fps * inference_cost > self.cpu_budget:
+                display_fps = max(inference_fps, (self.cpu_budget - inference_fps * inference_cost) / frame_cost)
+        self.display_fps = max(1.0, display_fps)
+        self.inference_fps = max(min(self.min_inference_fps, self.display_fps), inference_fps)
+
+    def cpu_load(self):
+        """Part d'un cœur estimée aux cadences choisies"""
+        return (self.display_fps * (self.frame_cost or 0.0)
+                + self.inference_fps * (self.inference_cost or 0.0))
+
+    def stats(self):
+        """Cadences choisies et mesurées, coûts estimés (pour la surveillance)"""
+        return {
+            'target_fps': self.target_fps,
+            'cpu_budget': self.cpu_budget,
+            'display_fps': round(self.display_fps, 2),
+            'inference_fps': round(self.inference_fps, 2),
+            'measured_display_fps': round(self.measured_display_fps, 2),
+            'measured_inference_fps': round(self.measured_inference_fps, 2),
+            'frame_cost_ms': round((self.frame_cost or 0.0) * 1000, 3),
+            'inference_cost_ms': round((self.inference_cost or 0.0) * 1000, 3),
+            'cpu_load': round(self.cpu_load(), 3),
+            'delay_ms': self.delay_ms,
+        }
+
+
+def make_scheduler(target_fps=None, cpu_budget=None, min_inference_fps=None):
+    """AdaptiveScheduler si une cadence cible est donnée (argument ou SIGN_TARGET_FPS), sinon FixedScheduler"""
+    if target_fps is None:
+        target_fps = float(os.environ.get('SIGN_TARGET_FPS', 0) or 0)
+    if target_fps <= 0:
+        return FIXED_SCHEDULER
+    if cpu_budget is None:
+        cpu_budget = float(os.environ.get('SIGN_CPU_BUDGET', DEFAULT_CPU_BUDGET))
+    if min_inference_fps is None:
+        min_inference_fps = float(os.environ.get('SIGN_MIN_INFERENCE_FPS', DEFAULT_MIN_INFERENCE_FPS))
+    return AdaptiveScheduler(target_fps, cpu_budget=cpu_budget, min_inference_fps=min_inference_fps)
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Sources d'Images - Reconnaissance Langue des Signes
+Caméra, fichier vidéo, dossier d'images ou images synthétiques, interchangeables
+
+Toutes les sources ont l'interface de cv2.VideoCapture utilisée par les
+scripts: read(image=None) -> (ret, image), isOpened(), release() et
+get(propId) pour la résolution et la cadence. Comme cv2.VideoCapture,
+read() remplit le tableau image passé s'il a la bonne taille (boucle sans
+allocation, frame_loop.py). Chaque source numérote ses images (frame_id)
+et horodate la dernière lecture (timestamp, time.perf_counter()).
+
+- CameraSource: résolution, cadence et CAP_PROP_BUFFERSIZE demandés au
+  pilote; en mode grab_latest, les images déjà en attente dans le tampon
+  du pilote sont jetées et seule la plus récente est décodée
+- VideoFileSource / ImageDirectorySource: relecture, à la cadence du
+  fichier (ou fps), en boucle
+- SyntheticSource: images déterministes (fond bruité + forme claire qui se
+  déplace dans la ROI), identiques à benchmark_pipeline.synthetic_frames;
+  pour les tests et la CI sans webcam
+
+Une cadence fps=0 lit les fichiers et les images synthétiques aussi vite
+que possible. Les valeurs réellement appliquées par le pilote peuvent
+différer de celles demandées: describe() les donne.
+
+Configuration des scripts (make_source):
+    SIGN_SOURCE=0                  caméra (indice), vidéo, dossier d'images, synthetic[:fps]
+    SIGN_CAPTURE_WIDTH=320         résolution demandée (largeur, hauteur)
+    SIGN_CAPTURE_HEIGHT=240
+    SIGN_CAPTURE_FPS=30            cadence demandée
+    SIGN_CAPTURE_BUFFER=1          CAP_PROP_BUFFERSIZE (images en attente dans le pilote)
+    SIGN_GRAB_LATEST=1             jette les images en attente à chaque lecture
+
+Utilisation (mesure des réglages d'une source):
+    python frame_sources.py --source 0 --width 320 --height 240 --buffer 1 --grab-latest
+    python frame_sources.py --source synthetic --frames 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+
+DEFAULT_WIDTH = 640
+DEFAULT_HEIGHT = 480
+DEFAULT_FPS = 30.0
+
+
+class FrameSource:
+    """Base des sources non caméra: cadence, numérotation et copie dans le tableau de l'appelant"""
+
+    def __init__(self, width, height, fps):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_id = -1       # numéro de la dernière image lue
+        self.timestamp = None    # time.perf_counter() de la dernière lecture
+        self.frames_read = 0
+        self.frames_discarded = 0
+        self._next = time.perf_counter()
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def release(self):
+        self._opened = False
+
+    def get(self, prop):
+        """Sous-ensemble de cv2.VideoCapture.get: résolution et cadence"""
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width or 0)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height or 0)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        return 0.0
+
+    def describe(self):
+        return {'source': type(self).__name__, 'width': self.width, 'height': self.height, 'fps': self.fps}
+
+    def _pace(self):
+        """Cadence d'une caméra réelle: read() bloque jusqu'à la prochaine image"""
+        if not self.fps:
+            return
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+    def _buffer(self, image):
+        """Tableau à remplir: celui de l'appelant s'il convient, sinon un nouveau"""
+        shape = (self.height, self.width, 3)
+        if image is not None and image.shape == shape and image.dtype == np.uint8:
+            return image
+        return np.empty(shape, dtype=np.uint8)
+
+    def _deliver(self, frame, image):
+        """Copie (ou redimensionne) frame dans le tableau de sortie et horodate"""
+        if self.width is None:
+            self.height, self.width = frame.shape[:2]
+        out = self._buffer(image)
+        if frame.shape[:2] == out.shape[:2]:
+            np.copyto(out, frame)
+        else:
+            cv2.resize(frame, (self.width, self.height), dst=out)
+        return self._stamp(out)
+
+    def _stamp(self, out):
+        self.frame_id += 1
+        self.frames_read += 1
+        self.timestamp = time.perf_counter()
+        return True, out
+
+
+class SyntheticSource(FrameSource):
+    """Images synthétiques déterministes: l'image n ne dépend que de (taille, seed, n)"""
+
+    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, fps=DEFAULT_FPS, seed=0):
+        super().__init__(width, height, fps)
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 90, size=(height, width, 3), dtype=np.uint8)
+
+    def render(self, index, out):
+        """Dessine l'image numéro index dans out (H, W, 3) uint8"""
+        np.copyto(out, self.background)
+        cx = int(self.width * (0.65 + 0.1 * np.sin(index / 10)))
+        cy = int(self.height * 0.3)
+        cv2.ellipse(out, (cx, cy), (self.width // 12, self.height // 6), index % 180, 0, 360, (200, 200, 200), -1)
+        return out
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        self._pace()
+        out = self.render(self.frame_id + 1, self._buffer(image))
+        return self._stamp(out)
+
+
+class VideoFileSource(FrameSource):
+    """Fichier vidéo relu à sa cadence nominale (ou fps), en boucle"""
+
+    def __init__(self, path, width=None, height=None, fps=None, loop=True):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if fps is None:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        if width is None or height is None:
+            width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None
+            height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None
+        super().__init__(width, height, fps)
+        self.loop = loop
+        self._frame = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def read(self, image=None):
+        self._pace()
+        # Décodage direct dans le tableau de l'appelant quand la taille correspond
+        target = image if image is not None and image.shape == (self.height, self.width, 3) else self._frame
+        ret, frame = self.cap.read(target)
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(target)
+        if not ret:
+            return False, None
+        if frame is image:
+            return self._stamp(frame)
+        self._frame = frame
+        return self._deliver(frame, image)
+
+
+class ImageDirectorySource(FrameSource):
+    """Images d'un dossier (ordre alphabétique, récursif) rejouées comme un flux"""
+
+    def __init__(self, directory, width=None, height=None, fps=DEFAULT_FPS, loop=True):
+        from batch_recognition import list_images
+
+        self.directory = directory
+        self.paths = list_images(directory)
+        super().__init__(width, height, fps)
+        self.loop = loop
+        self._index = 0
+        if not self.paths:
+            self._opened = False
+
+    def read(self, image=None):
+        while self._opened:
+            if self._index >= len(self.paths):
+                if not self.loop:
+                    return False, None
+                self._index = 0
+            path = self.paths[self._index]
+            self._index += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                # Fichier illisible: ignoré, comme une image perdue
+                self.frames_discarded += 1
+                continue
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            self._pace()
+            return self._deliver(frame, image)
+        return False, None
+
+
+class CameraSource:
+    """Caméra avec résolution, cadence et tampon du pilote configurables
+
+    grab_latest: avant chaque lecture, les images déjà en attente dans le
+    tampon du pilote sont jetées (grab() sans décodage) jusqu'à ce qu'un
+    grab() attende une nouvelle image; seule celle-ci est décodée. Cela
+    borne la latence quand la boucle est plus lente que la caméra.
+    """
+
+    def __init__(self, device=0, width=None, height=None, fps=None, buffersize=None,
+                 grab_latest=False, backend=cv2.CAP_ANY):
+        self.device = device
+        self.cap = cv2.VideoCapture(device, backend)
+        self.requested = {'width': width, 'height': height, 'fps': fps, 'buffersize': buffersize}
+        for prop, value in ((cv2.CAP_PROP_FRAME_WIDTH, width), (cv2.CAP_PROP_FRAME_HEIGHT, height),
+                            (cv2.CAP_PROP_FPS, fps), (cv2.CAP_PROP_BUFFERSIZE, buffersize)):
+            if value is not None:
+                self.cap.set(prop, value)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or fps or DEFAULT_FPS
+        self.grab_latest = grab_latest
+        # Un grab() plus long qu'une demi-période a attendu une nouvelle image
+        self.drain_threshold = 0.5 / self.fps
+        self.max_drain = max(int(buffersize or 4), 1)
+        self.frame_id = -1
+        self.timestamp = None
+        self.frames_read = 0
+        self.frames_discarded = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def describe(self):
+        return {'source': f"caméra {self.device}", 'width': self.width, 'height': self.height,
+                'fps': self.fps, 'buffersize': self.cap.get(cv2.CAP_PROP_BUFFERSIZE),
+                'grab_latest': self.grab_latest, 'requested': self.requested}
+
+    def _grab_latest(self):
+        start = time.perf_counter()
+        if not self.cap.grab():
+            return False
+        for _ in range(self.max_drain):
+            if time.perf_counter() - start >= self.drain_threshold:
+                break
+            # grab() immédiat: l'image venait du tampon, on passe à la suivante
+            start = time.perf_counter()
+            if not self.cap.grab():
+                return False
+            self.frames_discarded += 1
+        return True
+
+    def read(self, image=None):
+        if self.grab_latest:
+            if not self._grab_latest():
+                return False, None
+            ret, frame = self.cap.retrieve(image)
+        else:
+            ret, frame = self.cap.read(image)
+        if ret:
+            self.frame_id += 1
+            self.frames_read += 1
+            self.timestamp = time.perf_counter()
+        return ret, frame
+
+
+def open_source(spec, width=None, height=None, fps=None, buffersize=None, grab_latest=False, seed=0):
+    """Ouvre une source: indice de caméra, synthetic[:fps], dossier d'images ou fichier vidéo"""
+    spec = str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec), width, height, fps, buffersize, grab_latest)
+    if spec.startswith('synthetic'):
+        _, _, rate = spec.partition(':')
+        return SyntheticSource(width or DEFAULT_WIDTH, height or DEFAULT_HEIGHT,
+                               float(rate) if rate else (DEFAULT_FPS if fps is None else fps), seed=seed)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, width, height, DEFAULT_FPS if fps is None else fps)
+    return VideoFileSource(spec, width, height, fps)
+
+
+def _env_number(name, kind=int):
+    value = os.environ.get(name)
+    return kind(value) if value else None
+
+
+def make_source(spec=None):
+    """Source d'après l'argument ou SIGN_SOURCE et les réglages SIGN_CAPTURE_* (caméra 0 par défaut)"""
+    if spec is None:
+        spec = os.environ.get('SIGN_SOURCE', '0')
+    return open_source(spec,
+                       width=_env_number('SIGN_CAPTURE_WIDTH'),
+                       height=_env_number('SIGN_CAPTURE_HEIGHT'),
+                       fps=_env_number('SIGN_CAPTURE_FPS', float),
+                       buffersize=_env_number('SIGN_CAPTURE_BUFFER'),
+                       grab_latest=os.environ.get('SIGN_GRAB_LATEST', '0') == '1')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure la cadence et le coût de lecture d'une source d'images")
+    parser.add_argument('--source', default=os.environ.get('SIGN_SOURCE', '0'),
+                        help="indice de caméra, vidéo, dossier d'images ou synthetic[:fps]")
+    parser.add_argument('--width', type=int, help="largeur demandée")
+    parser.add_argument('--height', type=int, help="hauteur demandée")
+    parser.add_argument('--fps', type=float, help="cadence demandée (0 = au plus vite hors caméra)")
+    parser.add_argument('--buffer', type=int, help="CAP_PROP_BUFFERSIZE (caméra)")
+    parser.add_argument('--grab-latest', action='store_true', help="jette les images en attente")
+    parser.add_argument('--frames', type=int, default=150, help="images lues")
+    parser.add_argument('--work', type=float, default=0.0,
+                        help="traitement simulé par image (ms), pour observer les images jetées")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("📷 SOURCE D'IMAGES")
+    print("="*60)
+
+    source = open_source(args.source, args.width, args.height, args.fps, args.buffer, args.grab_latest)
+    if not source.isOpened():
+        print(f"✗ Erreur: source inaccessible: {args.source}")
+        return 1
+    print(f"✓ Source ouverte: {source.describe()}")
+
+    image = None
+    reads = np.empty(args.frames)
+    start = time.perf_counter()
+    count = 0
+    try:
+        for i in range(args.frames):
+            t0 = time.perf_counter()
+            ret, image = source.read(image)
+            if not ret:
+                print("⚠️ Fin de la source")
+                break
+            reads[i] = (time.perf_counter() - t0) * 1000
+            count += 1
+            if args.work:
+                time.sleep(args.work / 1000)
+    finally:
+        source.release()
+    elapsed = time.perf_counter() - start
+    if not count:
+        print("✗ Aucune image lue")
+        return 1
+
+    reads = reads[:count]
+    print(f"\n  • Images:          {count} en {elapsed:.2f} s ({count / elapsed:.1f} fps)")
+    print(f"  • Résolution:      {image.shape[1]}x{image.shape[0]}")
+    print(f"  • read() p50/p95:  {np.percentile(reads, 50):.2f} / {np.percentile(reads, 95):.2f} ms")
+    print(f"  • Images jetées:   {source.frames_discarded}")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Filtrage par Détection de Changement - Reconnaissance Langue des Signes
+Réutilise la dernière prédiction quand la ROI binarisée n'a pas changé
+
+La ROI 64x64 seuillée est binaire: on la compacte en 512 octets et on compte
+les pixels différents (XOR + popcount) avec la dernière ROI réellement
+prédite. En dessous de la tolérance, les probabilités précédentes sont
+réutilisées. Quand l'utilisateur tient un signe immobile, la plupart des
+images ne passent plus par le modèle.
+
+Temps économisé (stats): réutilisations x coût moyen d'un appel réel au
+modèle (timed_model, après le cache éventuel), moins le coût du filtre. Les
+images sans mode actif (skipped_idle) sont comptées à part: sans filtre,
+elles ne passaient pas non plus par le modèle.
+
+En mode pipeline, predict() tourne dans le thread d'inférence et skip() /
+stats() dans celui de l'interface: l'état et les compteurs sont protégés par
+un verrou (le modèle est appelé hors verrou).
+
+Activation: SIGN_GATE=1 (tolérance en pixels: SIGN_GATE_TOLERANCE, 20 par défaut)
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from preprocessing import pack_mask
+
+
+# Nombre de bits à 1 pour chaque octet
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+DEFAULT_TOLERANCE = 20  # pixels sur 4096 (~0.5%)
+
+
+def hamming_distance(packed_a, packed_b):
+    """Nombre de bits différents entre deux masques compactés"""
+    return int(POPCOUNT_TABLE[np.bitwise_xor(packed_a, packed_b)].sum())
+
+
+class ChangeGate:
+    """Décide si une nouvelle inférence est nécessaire"""
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, max_reuse=None):
+        self.tolerance = tolerance
+        self.max_reuse = max_reuse  # force une inférence après N réutilisations
+        self._last_packed = None
+        self._last_result = None
+        self._reused = 0
+        self._lock = threading.Lock()
+
+        # Compteurs
+        self.hits = 0           # prédiction réutilisée
+        self.misses = 0         # inférence exécutée
+        self.skipped_idle = 0   # aucun mode actif: ni comparaison ni inférence
+        self.model_calls = 0    # appels réels au modèle (hors cache)
+        self.model_time = 0.0
+        self.gate_time = 0.0
+
+    def predict(self, mask, predict_fn):
+        """Retourne predict_fn(mask), ou le résultat précédent si la ROI n'a pas changé"""
+        start = time.perf_counter()
+        packed = pack_mask(mask)
+        with self._lock:
+            reuse = (self._last_packed is not None
+                     and (self.max_reuse is None or self._reused < self.max_reuse)
+                     and hamming_distance(packed, self._last_packed) <= self.tolerance)
+            self.gate_time += time.perf_counter() - start
+            if reuse:
+                self.hits += 1
+                self._reused += 1
+                return self._last_result
+
+        result = predict_fn(mask)
+        with self._lock:
+            self.misses += 1
+            self._reused = 0
+            self._last_packed = packed
+            self._last_result = result
+        return result
+
+    def timed_model(self, predict_fn, x):
+        """Appel réel du modèle: seul ce temps sert à estimer le coût d'une inférence évitée"""
+        start = time.perf_counter()
+        result = predict_fn(x)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.model_time += elapsed
+            self.model_calls += 1
+        return result
+
+    def skip(self):
+        """À appeler quand aucun mode n'est actif"""
+        with self._lock:
+            self.skipped_idle += 1
+
+    def reset(self):
+        with self._lock:
+            self._last_packed = None
+            self._last_result = None
+            self._reused = 0
+
+    def stats(self):
+        """Taux de réutilisation et temps CPU économisé par les réutilisations (estimé)"""
+        with self._lock:
+            hits, misses, skipped_idle = self.hits, self.misses, self.skipped_idle
+            model_time, model_calls, gate_time = self.model_time, self.model_calls, self.gate_time
+        checked = hits + misses
+        mean_inference = model_time / model_calls if model_calls else 0.0
+        saved = hits * mean_inference - gate_time
+        return {
+            'hits': hits,
+            'misses': misses,
+            'skipped_idle': skipped_idle,
+            'hit_rate': hits / checked if checked else 0.0,
+            'mean_inference_ms': mean_inference * 1000,
+            'gate_overhead_ms': gate_time * 1000,
+            'cpu_saved_ms': saved * 1000,
+        }
+
+
+def make_gate(enabled=None, tolerance=None):
+    """ChangeGate d'après les arguments ou SIGN_GATE / SIGN_GATE_TOLERANCE, sinon None"""
+    if enabled is None:
+        enabled = os.environ.get('SIGN_GATE', '0') == '1'
+    if not enabled:
+        return None
+    if tolerance is None:
+        tolerance = int(os.environ.get('SIGN_GATE_TOLERANCE', DEFAULT_TOLERANCE))
+    return ChangeGate(tolerance=tolerance)
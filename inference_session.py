@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Session d'Inférence - Reconnaissance Langue des Signes
+Construit le modèle une seule fois et expose un chemin de prédiction rapide
+
+model.predict() est une API orientée lots: à chaque appel Keras recrée un
+adaptateur de données et la machinerie des callbacks, ce qui coûte plus cher
+que la passe avant elle-même pour une image 64x64. La session:
+- construit le modèle et charge les poids une seule fois (sans compile())
+- enveloppe la passe avant dans un tf.function à signature d'entrée fixe
+- fait un échauffement au chargement pour que la première image ne soit pas lente
+- renvoie toujours des tableaux NumPy
+
+Utilisation:
+    from inference_session import InferenceSession
+    session = InferenceSession(engine='keras')   # ou 'numpy', 'int8', 'tflite'
+    probabilities = session.predict_one(roi_normalized)        # (29,)
+    probabilities = session.predict_batch(batch)               # (N, 29)
+
+Avec artifact_path (model_artifact.py), l'architecture, les poids, les noms
+des classes et le prétraitement viennent d'un seul fichier validé (moteurs
+numpy et keras; artifact_for() choisit l'artefact par défaut selon le moteur).
+"""
+
+import json
+import time
+
+import numpy as np
+
+
+INPUT_SHAPE = (64, 64, 1)
+NUM_OUTPUTS = 29
+
+# Modèles quantifiés produits par quantize_model.py
+INT8_PATH = "model-bw-int8.npz"
+TFLITE_PATH = "model-bw-int8.tflite"
+ENGINES = ('keras', 'numpy', 'int8', 'tflite')
+ARTIFACT_ENGINES = ('numpy', 'keras')  # int8 et tflite lisent leurs propres fichiers
+
+
+def artifact_for(engine, path=None):
+    """Artefact à passer à InferenceSession: path s'il est donné, sinon
+    default_artifact_path() pour les moteurs qui lisent l'artefact, None pour les autres"""
+    if path is not None or engine not in ARTIFACT_ENGINES:
+        return path
+    from model_artifact import default_artifact_path
+    return default_artifact_path()
+
+
+def build_keras_model(num_classes=NUM_OUTPUTS, input_shape=INPUT_SHAPE):
+    """Architecture CNN utilisée par la démo et l'interface graphique"""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    return keras.Sequential([
+        layers.Input(shape=input_shape),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D(pool_size=(2, 2)),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D(pool_size=(2, 2)),
+        layers.Flatten(),
+        layers.Dense(128, activation='relu'),
+        layers.Dense(num_classes, activation='softmax')
+    ])
+
+
+def read_model_classes(artifact_path=None, json_path="model-bw.json"):
+    """(nombre de classes, noms ou None) sans construire le modèle: en-tête de
+    l'artefact, sinon dernière couche Dense de l'architecture JSON"""
+    from model_artifact import load_artifact, output_units
+    if artifact_path is not None:
+        artifact = load_artifact(artifact_path, verify=False)
+        return artifact.num_classes, artifact.class_names
+    with open(json_path, 'r') as json_file:
+        return output_units(json.load(json_file)), None
+
+
+class InferenceSession:
+    """Modèle chargé une fois, avec prédiction compilée et échauffée"""
+
+    def __init__(self, engine='keras', json_path="model-bw.json", h5_path="model-bw.h5",
+                 num_classes=NUM_OUTPUTS, warmup=3, int8_path=INT8_PATH, tflite_path=TFLITE_PATH,
+                 artifact_path=None):
+        self.engine = engine
+        self.input_shape = INPUT_SHAPE
+        self.num_classes = num_classes
+        self.class_names = None
+        self.artifact = None
+        self.model = None
+        self._predict_fn = None
+        self.source_paths = []  # fichiers réellement chargés (empreinte du cache persistant)
+
+        start = time.perf_counter()
+        if artifact_path is not None and engine not in ARTIFACT_ENGINES:
+            raise ValueError(f"Le moteur {engine} ne lit pas d'artefact ({artifact_path}): "
+                             f"modèle quantifié produit par quantize_model.py")
+        if artifact_path is not None:
+            # Artefact unique: validé avant toute construction de modèle
+            from model_artifact import load_artifact
+            self.artifact = load_artifact(artifact_path)
+            self.artifact.check_preprocessing()
+            if self.artifact.input_shape != self.input_shape:
+                raise ValueError(f"{artifact_path}: entrée {self.artifact.input_shape}, attendu {self.input_shape}")
+            self.class_names = self.artifact.class_names
+            self.num_classes = self.artifact.num_classes
+            self.source_paths = [artifact_path]
+
+        if engine == 'numpy':
+            from numpy_inference import NumpyCNN
+            if self.artifact is not None:
+                self.model = self.artifact.build_numpy()
+            else:
+                self.model = NumpyCNN.from_files(json_path, h5_path)
+                self.source_paths = [json_path, h5_path]
+            self._predict_fn = self.model.forward
+            self.num_classes = self.model.output_size
+        elif engine == 'int8':
+            # Poids stockés en int8, déquantifiés au chargement: même calcul float que 'numpy'
+            # (fichier 4x plus petit, pas plus rapide); calcul entier: 'tflite'
+            from numpy_inference import NumpyCNN
+            self.model = NumpyCNN.from_int8(int8_path)
+            self.source_paths = [int8_path]
+            self._predict_fn = self.model.forward
+            self.num_classes = self.model.output_size
+        elif engine == 'tflite':
+            self._build_tflite(tflite_path)
+            self.source_paths = [tflite_path]
+        elif engine == 'keras':
+            self._build_keras(h5_path)
+        else:
+            raise ValueError(f"Moteur inconnu: {engine} (attendu: {', '.join(ENGINES)})")
+        self.load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.warmup(warmup)
+        self.warmup_time = time.perf_counter() - start
+
+    def _build_keras(self, h5_path):
+        import tensorflow as tf
+
+        # Pas de compile(): inutile pour l'inférence
+        if self.artifact is not None:
+            self.model = self.artifact.build_keras()
+        else:
+            self.model = build_keras_model(self.num_classes, self.input_shape)
+            self.model.load_weights(h5_path)
+            self.source_paths = [h5_path]
+
+        model = self.model
+
+        # Signature fixe (lot de taille variable): un seul traçage du graphe
+        @tf.function(input_signature=[tf.TensorSpec(shape=(None,) + self.input_shape, dtype=tf.float32)])
+        def forward(x):
+            return model(x, training=False)
+
+        def predict_fn(x):
+            return forward(tf.convert_to_tensor(x)).numpy()
+
+        self._predict_fn = predict_fn
+
+    def _build_tflite(self, tflite_path):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+
+        interpreter = Interpreter(model_path=tflite_path)
+        interpreter.allocate_tensors()
+        input_detail = interpreter.get_input_details()[0]
+        output_detail = interpreter.get_output_details()[0]
+        input_scale, input_zero = input_detail['quantization']
+        output_scale, output_zero = output_detail['quantization']
+        self.model = interpreter
+        self.num_classes = int(output_detail['shape'][-1])
+
+        def predict_one(x):
+            if input_detail['dtype'] != np.float32:
+                x = np.clip(np.round(x / input_scale + input_zero), -128, 127)
+            interpreter.set_tensor(input_detail['index'], x.astype(input_detail['dtype']))
+            interpreter.invoke()
+            y = interpreter.get_tensor(output_detail['index'])
+            if output_detail['dtype'] != np.float32:
+                y = (y.astype(np.float32) - output_zero) * output_scale
+            return y
+
+        def predict_fn(x):
+            # Interpréteur à lot fixe de 1
+            if len(x) == 1:
+                return predict_one(x)
+            return np.concatenate([predict_one(x[i:i + 1]) for i in range(len(x))])
+
+        self._predict_fn = predict_fn
+
+    def warmup(self, runs=3):
+        """Exécute quelques passes à vide (traçage du graphe, allocations)"""
+        x = np.zeros((1,) + self.input_shape, dtype=np.float32)
+        for _ in range(runs):
+            self._predict_fn(x)
+
+    def predict_batch(self, x):
+        """Prédit un lot (N, 64, 64, 1) et renvoie un tableau (N, nb_classes)"""
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[1:] != self.input_shape:
+            x = x.reshape((-1,) + self.input_shape)
+        return self._predict_fn(x)
+
+    def predict_one(self, x):
+        """Prédit une image (64, 64) ou (64, 64, 1) et renvoie un vecteur (nb_classes,)"""
+        x = np.asarray(x, dtype=np.float32).reshape((1,) + self.input_shape)
+        return self._predict_fn(x)[0]
+
+    def predict(self, x, verbose=0):
+        """Compatibilité avec keras.Model.predict (verbose ignoré)"""
+        return self.predict_batch(x)
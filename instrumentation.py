@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation de la Boucle Image - Reconnaissance Langue des Signes
+Temps par étape, FPS de capture et d'inférence, images perdues et mémoire
+
+Activation (désactivée par défaut):
+    SIGN_TRACE=1                    -> overlay compact sur la vidéo
+    SIGN_TRACE_FILE=trace.jsonl     -> en plus, un enregistrement JSON par image
+                                       (fichier tournant, 10 Mo x 3 sauvegardes)
+
+Quand l'instrumentation est désactivée, make_profiler() renvoie un objet
+NullProfiler dont toutes les méthodes sont vides: le coût se limite à
+quelques appels de méthode par image.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import cv2
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUP_COUNT = 3
+
+
+def process_rss_mb():
+    """Mémoire résidente du processus en Mo (None si indisponible)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class FrameProfiler:
+    """Mesure les étapes de chaque image et publie un résumé glissant"""
+
+    enabled = True
+
+    def __init__(self, trace_path=None, window=1.0):
+        self.window = window
+        self.frames = 0
+        self.captured = None   # fourni par le thread de capture en mode pipeline
+        self.inferences = 0
+        self.dropped = 0
+        self.stages = {}
+        self.total_ms = 0.0
+        self.capture_fps = 0.0
+        self.inference_fps = 0.0
+        self.rss_mb = process_rss_mb()
+        self._history = deque()
+        self._rss_next = 0.0
+        self._start = self._last = time.perf_counter()
+
+        self.logger = None
+        if trace_path:
+            handler = RotatingFileHandler(trace_path, maxBytes=TRACE_MAX_BYTES,
+                                          backupCount=TRACE_BACKUP_COUNT, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger = logging.getLogger(f'sign_trace.{id(self)}')
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+            self.logger.addHandler(handler)
+
+    def begin_frame(self):
+        self._start = self._last = time.perf_counter()
+        self.stages = {}
+
+    def mark(self, stage):
+        """Termine l'étape 'stage' (durée depuis la marque précédente)"""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def inference(self, count=1):
+        self.inferences += count
+
+    def set_totals(self, captured=None, inferences=None, dropped=None):
+        """Compteurs cumulés venant d'autres threads (mode pipeline)"""
+        if captured is not None:
+            self.captured = captured
+        if inferences is not None:
+            self.inferences = inferences
+        if dropped is not None:
+            self.dropped = dropped
+
+    def end_frame(self, **extra):
+        now = time.perf_counter()
+        self.frames += 1
+        self.total_ms = (now - self._start) * 1000
+
+        captured = self.frames if self.captured is None else self.captured
+        self._history.append((now, captured, self.inferences))
+        while len(self._history) > 2 and now - self._history[0][0] > self.window:
+            self._history.popleft()
+        t0, captured0, inferences0 = self._history[0]
+        if now > t0:
+            self.capture_fps = (captured - captured0) / (now - t0)
+            self.inference_fps = (self.inferences - inferences0) / (now - t0)
+
+        if now >= self._rss_next:
+            self.rss_mb = process_rss_mb()
+            self._rss_next = now + 1.0
+
+        if self.logger is not None:
+            record = {
+                'time': time.time(),
+                'frame': self.frames,
+                'stages_ms': {k: round(v, 3) for k, v in self.stages.items()},
+                'total_ms': round(self.total_ms, 3),
+                'capture_fps': round(self.capture_fps, 2),
+                'inference_fps': round(self.inference_fps, 2),
+                'dropped': self.dropped,
+                'rss_mb': None if self.rss_mb is None else round(self.rss_mb, 1),
+            }
+            record.update(extra)
+            self.logger.info(json.dumps(record))
+
+    def overlay_lines(self):
+        slowest = max(self.stages.items(), key=lambda item: item[1], default=('-', 0.0))
+        rss = '?' if self.rss_mb is None else f"{self.rss_mb:.0f}"
+        return [
+            f"CAP {self.capture_fps:4.1f} fps | INF {self.inference_fps:4.1f} fps | DROP {self.dropped}",
+            f"FRAME {self.total_ms:5.1f} ms | {slowest[0]} {slowest[1]:.1f} ms | RSS {rss} Mo",
+        ]
+
+    def draw_overlay(self, frame, origin=(20, 80)):
+        x, y = origin
+        for i, line in enumerate(self.overlay_lines()):
+            cv2.putText(frame, line, (x, y + i * 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+    def close(self):
+        if self.logger is not None:
+            for handler in list(self.logger.handlers):
+                handler.close()
+                self.logger.removeHandler(handler)
+
+
+class NullProfiler:
+    """Instrumentation désactivée: toutes les méthodes sont vides"""
+
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def inference(self, count=1):
+        pass
+
+    def set_totals(self, captured=None, inferences=None, dropped=None):
+        pass
+
+    def end_frame(self, **extra):
+        pass
+
+    def draw_overlay(self, frame, origin=(20, 80)):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def make_profiler(enabled=None, trace_path=None):
+    """Profiler actif ou NullProfiler, d'après les arguments ou SIGN_TRACE / SIGN_TRACE_FILE"""
+    if trace_path is None:
+        trace_path = os.environ.get('SIGN_TRACE_FILE') or None
+    if enabled is None:
+        enabled = os.environ.get('SIGN_TRACE', '0') == '1' or trace_path is not None
+    if not enabled:
+        return NULL_PROFILER
+    return FrameProfiler(trace_path=trace_path)
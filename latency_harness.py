@@ -0,0 +1,563 @@
+# -*- coding: utf-8 -*-
+"""
+Latence Bout en Bout - Reconnaissance Langue des Signes
+Du signe présenté à la caméra au top-1 affiché par SignLanguageApp
+
+Une source rejouée (StampedSource) alterne des scènes dont la ROI donne des
+signes différents. Chaque image porte dans ses pixels, sous la ROI, son
+numéro et son heure de capture (bande de cases noires et blanches). La vraie
+application (SignLanguageApp, avec ou sans pipeline) tourne sur cette source
+et le harnais relève:
+- publication: fin de l'inférence qui donne le nouveau signe en top-1
+- affichage du résultat: mise à jour du label Tk du top-1
+- images de retard: images capturées entre l'apparition du signe et son
+  affichage
+- âge des images affichées: numéro et heure décodés des pixels à l'affichage
+
+Chaque configuration (pipeline ou non, niveaux de charge: processus
+concurrents qui occupent le CPU) donne les distributions p50/p95/p99/max.
+Avec --target-fps, l'ordonnanceur adaptatif (frame_scheduler.py) est actif
+et ses cadences choisies sont ajoutées aux résultats.
+Le filtrage (SIGN_GATE) et le cache (SIGN_CACHE) sont désactivés: chaque
+image passe par le modèle.
+
+Sans écran: Tk sous un affichage virtuel (Xvfb, lancé s'il est installé),
+ou rendu minimal (--renderer headless): l'image est convertie comme dans
+show_frame (RGB, 800x600, PIL) sans fenêtre et la boucle root.after() est
+simulée. Résultats en JSON (-o) et comparaison à une mesure de référence
+(--baseline): code de sortie 1 si un p95 dépasse la tolérance.
+
+Utilisation:
+    python latency_harness.py --renderer headless --loads 0,1 --duration 10
+    python latency_harness.py --pipeline both -o latence.json --baseline latence_v1.json
+"""
+
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from categories import TopKSelector
+from frame_sources import DEFAULT_FPS, DEFAULT_HEIGHT, DEFAULT_WIDTH, FrameSource, SyntheticSource
+from preprocessing import RoiPreprocessor, roi_bounds
+
+
+ID_BITS = 32      # numéro d'image
+TIME_BITS = 40    # heure de capture, µs depuis l'origine de la source (~12 jours)
+STAMP_BITS = ID_BITS + TIME_BITS
+MODES = ('chiffres', 'lettres', 'actions')
+
+
+# ===== HORODATAGE DANS LES PIXELS =====
+
+def stamp_geometry(width, height):
+    """(taille d'une case, ligne du haut) de la bande, en bas de l'image, hors ROI"""
+    cell = max(2, width // 80)
+    return cell, height - cell - 2
+
+
+def encode_stamp(frame, frame_id, micros):
+    """Écrit numéro et heure dans la bande (image caméra, avant le miroir)"""
+    height, width = frame.shape[:2]
+    cell, top = stamp_geometry(width, height)
+    value = (frame_id % (1 << ID_BITS)) << TIME_BITS | (micros % (1 << TIME_BITS))
+    bits = np.array([(value >> shift) & 1 for shift in range(STAMP_BITS - 1, -1, -1)], dtype=np.uint8)
+    frame[top:top + cell, 2:2 + STAMP_BITS * cell] = np.repeat(bits * 255, cell)[np.newaxis, :, np.newaxis]
+
+
+def decode_stamp(frame, mirrored=True):
+    """(numéro, µs) lus au centre des cases; mirrored: image déjà retournée par l'application"""
+    height, width = frame.shape[:2]
+    cell, top = stamp_geometry(width, height)
+    xs = 2 + np.arange(STAMP_BITS) * cell + cell // 2
+    if mirrored:
+        xs = width - 1 - xs
+    value = 0
+    for bit in frame[top + cell // 2, xs].max(axis=-1) > 127:
+        value = value << 1 | int(bit)
+    return value >> TIME_BITS, value & ((1 << TIME_BITS) - 1)
+
+
+class StampedSource(FrameSource):
+    """Scènes rejouées à cadence fixe, chaque image horodatée dans ses pixels
+
+    La scène change toutes les 'hold' images; chaque changement est noté
+    dans self.switches: (numéro d'image, scène, heure de capture).
+    """
+
+    def __init__(self, scenes, hold, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, fps=DEFAULT_FPS):
+        super().__init__(width, height, fps)
+        self.scenes = scenes
+        self.hold = hold
+        self.epoch = time.perf_counter()
+        self.switches = []
+
+    def scene_index(self, frame_id):
+        return (frame_id // self.hold) % len(self.scenes)
+
+    def capture_time(self, micros):
+        """Heure de capture (time.perf_counter) d'une image d'après son horodatage"""
+        return self.epoch + micros / 1e6
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        self._pace()
+        scene = self.scene_index(self.frame_id + 1)
+        out = self._buffer(image)
+        np.copyto(out, self.scenes[scene])
+        ret, out = self._stamp(out)
+        encode_stamp(out, self.frame_id, int((self.timestamp - self.epoch) * 1e6))
+        if self.frame_id % self.hold == 0:
+            self.switches.append((self.frame_id, scene, self.timestamp))
+        return ret, out
+
+
+# ===== SCÈNES =====
+
+def scene_frame(mask, background):
+    """Image caméra dont la ROI (après miroir) reproduit le masque 64x64"""
+    frame = background.copy()
+    x1, y1, x2, y2 = roi_bounds(frame)
+    roi = cv2.resize(mask, (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST)
+    # Main claire sur fond sombre, de part et d'autre du seuil de binarisation
+    frame[y1:y2, x1:x2] = np.where(roi[..., np.newaxis] > 0, 200, 40).astype(np.uint8)
+    return cv2.flip(frame, 1)
+
+
+def build_scenes(session, mode, masks, width, height, count):
+    """Scènes aux top-1 distincts (prédits par la chaîne réelle): ([image], [signe])"""
+    background = SyntheticSource(width, height, fps=0).background
+    preprocessor = RoiPreprocessor()
+    selector = TopKSelector(session.num_classes, 1)
+    scenes, labels = [], []
+    for mask in masks:
+        frame = scene_frame(mask, background)
+        roi, _ = preprocessor.extract(frame.copy())
+        label = selector.select(mode, session.predict_one(preprocessor(roi)))[0][0]
+        if label not in labels:
+            scenes.append(frame)
+            labels.append(label)
+            if len(scenes) == count:
+                break
+    return scenes, labels
+
+
+# ===== APPLICATION INSTRUMENTÉE =====
+
+class TimedModel:
+    """Session d'inférence qui signale chaque résultat (thread de l'appelant)"""
+
+    def __init__(self, session, on_result):
+        self._session = session
+        self._on_result = on_result
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def predict_one(self, x):
+        result = self._session.predict_one(x)
+        self._on_result(result)
+        return result
+
+
+class LatencyProbe:
+    """Relevés horodatés ajoutés à SignLanguageApp (à placer avant elle dans les bases)"""
+
+    def __init__(self, root, source, **kwargs):
+        self.published = []   # (heure, top-1) à la fin de chaque inférence
+        self.labels = []      # (heure, top-1, dernière image capturée) à chaque mise à jour du label
+        self.shown = []       # (heure, image affichée, âge en s, images capturées depuis)
+        self._publish_selector = None
+        self._label_selector = None
+        super().__init__(root, source=source, **kwargs)
+
+    def load_model(self):
+        super().load_model()
+        if self.model is not None:
+            self.model = TimedModel(self.model, self.record_published)
+
+    def record_published(self, predictions):
+        """Thread d'inférence (mode pipeline) ou thread de l'interface"""
+        now = time.perf_counter()
+        if self._publish_selector is None:
+            self._publish_selector = TopKSelector(len(predictions), 1)
+        mode = self.mode
+        if mode is not None:
+            self.published.append((now, self._publish_selector.select(mode, predictions)[0][0]))
+
+    def update_predictions(self, predictions):
+        super().update_predictions(predictions)
+        now = time.perf_counter()
+        if self._label_selector is None:
+            self._label_selector = TopKSelector(len(predictions), 1)
+        top1 = self._label_selector.select(self.mode, predictions)[0][0]
+        self.labels.append((now, top1, self.source.frame_id))
+
+    def show_frame(self, frame):
+        frame_id, micros = decode_stamp(frame)
+        super().show_frame(frame)
+        now = time.perf_counter()
+        self.shown.append((now, frame_id, now - self.source.capture_time(micros),
+                           self.source.frame_id - frame_id))
+
+
+class HeadlessWidget:
+    """Label ou bouton sans fenêtre: garde les options configurées"""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key)
+
+
+class HeadlessRoot:
+    """Remplace tk.Tk sans écran: boucle root.after() simulée (un seul thread)"""
+
+    def __init__(self):
+        self._queue = []
+        self._seq = 0
+        self._running = False
+
+    def title(self, *args):
+        pass
+
+    def geometry(self, *args):
+        pass
+
+    def configure(self, **options):
+        pass
+
+    def protocol(self, *args):
+        pass
+
+    def after(self, ms, callback, *args):
+        self._seq += 1
+        heapq.heappush(self._queue, (time.perf_counter() + ms / 1000.0, self._seq, callback, args))
+        return self._seq
+
+    def mainloop(self):
+        self._running = True
+        while self._running and self._queue:
+            due, _, callback, args = heapq.heappop(self._queue)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            callback(*args)
+
+    def quit(self):
+        self._running = False
+
+    def destroy(self):
+        self._queue.clear()
+
+
+class HeadlessRendering:
+    """Widgets factices; show_frame fait la même conversion que l'original, sans PhotoImage"""
+
+    def create_widgets(self):
+        self.video_label = HeadlessWidget()
+        self.status_label = HeadlessWidget(text="Mode: Aucun")
+        self.btn_chiffres = HeadlessWidget()
+        self.btn_lettres = HeadlessWidget()
+        self.btn_actions = HeadlessWidget()
+        self.result_labels = [HeadlessWidget(text=f"{i+1}. --- : 0.0%") for i in range(4)]
+
+    def show_frame(self, frame):
+        from PIL import Image
+
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_resized = cv2.resize(frame_rgb, (800, 600))
+        self.video_label.configure(image=Image.fromarray(frame_resized))
+        if 'première image' not in self.startup_times:
+            self.log_startup('première image')
+
+
+def app_classes():
+    """(application Tk instrumentée, application sans écran instrumentée)"""
+    from app_interface_complete import SignLanguageApp
+
+    class TkProbeApp(LatencyProbe, SignLanguageApp):
+        pass
+
+    class HeadlessProbeApp(LatencyProbe, HeadlessRendering, SignLanguageApp):
+        pass
+
+    return TkProbeApp, HeadlessProbeApp
+
+
+# ===== CHARGE ET AFFICHAGE VIRTUEL =====
+
+def _burn_cpu():
+    while True:
+        pass
+
+
+def start_load(level):
+    """'level' processus qui occupent chacun un cœur"""
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_burn_cpu, name=f'charge-{i}', daemon=True) for i in range(level)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_load(workers):
+    for worker in workers:
+        worker.terminate()
+        worker.join()
+
+
+def start_virtual_display(display=':99'):
+    """Lance Xvfb s'il est installé et règle DISPLAY; retourne le processus ou None"""
+    if shutil.which('Xvfb') is None:
+        return None
+    process = subprocess.Popen(['Xvfb', display, '-screen', '0', '1400x800x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    if process.poll() is not None:
+        return None
+    os.environ['DISPLAY'] = display
+    return process
+
+
+# ===== MESURE =====
+
+def summarize(values, scale=1.0):
+    """p50/p95/p99/max/moyenne (multipliés par scale), None si aucune valeur"""
+    if not values:
+        return None
+    values = np.asarray(values, dtype=np.float64) * scale
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2),
+            'max': round(float(values.max()), 2), 'mean': round(float(values.mean()), 2), 'n': len(values)}
+
+
+def first_after(records, start, end, label):
+    """Premier relevé (heure, top-1, ...) de 'label' dans [start, end)"""
+    for record in records:
+        if record[0] >= end:
+            break
+        if record[0] >= start and record[1] == label:
+            return record
+    return None
+
+
+def analyze(source, labels, app, duration):
+    """Latences par changement de scène (le premier, avant le choix du mode, est ignoré)"""
+    publish, label, lag = [], [], []
+    missed = 0
+    switches = [s for s in source.switches if s[0] > 0]
+    for i, (frame_id, scene, captured) in enumerate(switches):
+        end = switches[i + 1][2] if i + 1 < len(switches) else float('inf')
+        expected = labels[scene]
+        published = first_after(app.published, captured, end, expected)
+        shown = first_after(app.labels, captured, end, expected)
+        if published is not None:
+            publish.append(published[0] - captured)
+        if shown is None:
+            missed += 1
+            continue
+        label.append(shown[0] - captured)
+        lag.append(shown[2] - frame_id)
+    return {
+        'events': len(switches),
+        'missed': missed,
+        'publish_ms': summarize(publish, 1000),
+        'label_ms': summarize(label, 1000),
+        'lag_frames': summarize(lag),
+        'display_age_ms': summarize([s[2] for s in app.shown], 1000),
+        'display_behind_frames': summarize([s[3] for s in app.shown]),
+        'captured': source.frames_read,
+        'render_fps': round(len(app.shown) / duration, 1),
+        'inferences': len(app.published),
+        'scheduler': app.scheduler.stats(),
+    }
+
+
+def run_once(app_class, make_root, scenes, labels, args, pipelined, load):
+    """Une configuration: application réelle sur la source horodatée pendant args.duration s"""
+    workers = start_load(load)
+    try:
+        source = StampedSource(scenes, args.hold, args.width, args.height, args.fps)
+        root = make_root()
+        app = app_class(root, source, engine=args.engine, pipelined=pipelined, background_load=False)
+        if app.model is None:
+            raise RuntimeError(f"modèle indisponible: {app.model_error}")
+        getattr(app, f'mode_{args.mode}')()
+        root.after(int(args.duration * 1000), app.quit_app)
+        root.mainloop()
+    finally:
+        stop_load(workers)
+    return analyze(source, labels, app, args.duration)
+
+
+def report(name, result):
+    print(f"\n📊 {name}: {result['events']} changements de signe, {result['missed']} non affichés, "
+          f"{result['render_fps']} images/s affichées, {result['inferences']} inférences")
+    rates = result['scheduler']
+    if rates:
+        print(f"  cadences choisies      affichage {rates['display_fps']:.1f} images/s | "
+              f"inférence {rates['inference_fps']:.1f} /s | CPU estimé {rates['cpu_load']:.0%}")
+    for key, title, unit in (('publish_ms', "publication top-1", 'ms'),
+                             ('label_ms', "label mis à jour", 'ms'),
+                             ('lag_frames', "images de retard", 'img'),
+                             ('display_age_ms', "âge image affichée", 'ms'),
+                             ('display_behind_frames', "retard image affichée", 'img')):
+        stats = result[key]
+        if stats is None:
+            print(f"  {title:<22} —")
+            continue
+        print(f"  {title:<22} p50 {stats['p50']:7.1f} | p95 {stats['p95']:7.1f} | "
+              f"p99 {stats['p99']:7.1f} | max {stats['max']:7.1f} {unit}")
+
+
+def compare_baseline(runs, baseline, tolerance):
+    """Régressions de p95 (publication, label, âge affiché) par rapport à la référence"""
+    reference = {(r['pipelined'], r['load']): r for r in baseline['runs']}
+    regressions = []
+    for run in runs:
+        previous = reference.get((run['pipelined'], run['load']))
+        if previous is None:
+            continue
+        for key in ('publish_ms', 'label_ms', 'display_age_ms'):
+            if run[key] is None or previous[key] is None:
+                continue
+            limit = previous[key]['p95'] * (1 + tolerance)
+            if run[key]['p95'] > limit:
+                regressions.append(f"{run['name']} {key} p95 {run[key]['p95']:.1f} > {limit:.1f} "
+                                   f"(référence {previous[key]['p95']:.1f})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latence du signe présenté au top-1 affiché (SignLanguageApp)")
+    parser.add_argument('--renderer', choices=['auto', 'tk', 'headless'], default='auto',
+                        help="Tk (DISPLAY ou Xvfb) ou rendu sans écran; auto: Tk si un affichage est disponible")
+    parser.add_argument('--engine', default='numpy', help="moteur d'inférence (keras, numpy, int8, tflite)")
+    parser.add_argument('--pipeline', choices=['off', 'on', 'both'], default='both', help="mode pipeline mesuré")
+    parser.add_argument('--loads', default='0,1', help="niveaux de charge: processus CPU concurrents (ex. 0,1,2)")
+    parser.add_argument('--duration', type=float, default=8.0, help="durée de chaque configuration (s)")
+    parser.add_argument('--mode', choices=MODES, default='lettres', help="mode de détection")
+    parser.add_argument('--scenes', type=int, default=4, help="scènes (signes distincts) alternées")
+    parser.add_argument('--hold', type=int, default=15, help="images par scène")
+    parser.add_argument('--images', help="dossier d'images de signes pour les scènes (sinon formes synthétiques)")
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH, help="largeur des images")
+    parser.add_argument('--height', type=int, default=DEFAULT_HEIGHT, help="hauteur des images")
+    parser.add_argument('--fps', type=float, default=DEFAULT_FPS, help="cadence de la source")
+    parser.add_argument('--target-fps', type=float, default=0,
+                        help="cadence d'affichage visée (SIGN_TARGET_FPS, ordonnanceur adaptatif); 0: désactivé")
+    parser.add_argument('-o', '--output', help="fichier JSON des résultats")
+    parser.add_argument('--baseline', help="résultats JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="hausse de p95 tolérée (0.25 = +25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("⏱️ LATENCE BOUT EN BOUT (SIGNE -> TOP-1 AFFICHÉ)")
+    print("="*60)
+
+    # Chaque image passe par le modèle
+    os.environ['SIGN_GATE'] = '0'
+    os.environ['SIGN_CACHE'] = '0'
+    os.environ.pop('SIGN_CACHE_FILE', None)
+    if args.target_fps:
+        os.environ['SIGN_TARGET_FPS'] = str(args.target_fps)
+
+    try:
+        from inference_session import InferenceSession, artifact_for
+        session = InferenceSession(engine=args.engine, artifact_path=artifact_for(args.engine))
+    except Exception as e:
+        print(f"✗ Modèle indisponible: {e}")
+        return 1
+
+    from server_load_generator import image_masks, synthetic_masks
+    masks = image_masks(args.images, 200) if args.images else synthetic_masks(200)
+    scenes, labels = build_scenes(session, args.mode, masks, args.width, args.height, args.scenes)
+    if len(scenes) < 2:
+        print(f"✗ Moins de deux scènes aux signes distincts en mode {args.mode}")
+        return 1
+    print(f"✓ {len(scenes)} scènes: {', '.join(labels)} ({args.hold} images chacune à {args.fps:g} images/s)")
+
+    display = None
+    renderer = args.renderer
+    if renderer != 'headless' and not os.environ.get('DISPLAY'):
+        display = start_virtual_display()
+        if display is not None:
+            print(f"✓ Affichage virtuel Xvfb ({os.environ['DISPLAY']})")
+        elif renderer == 'tk':
+            print("✗ Aucun affichage (DISPLAY) et Xvfb introuvable")
+            return 1
+    if renderer == 'auto':
+        renderer = 'tk' if os.environ.get('DISPLAY') else 'headless'
+    print(f"✓ Rendu: {renderer}")
+
+    tk_app, headless_app = app_classes()
+    if renderer == 'tk':
+        import tkinter as tk
+        app_class, make_root = tk_app, tk.Tk
+    else:
+        app_class, make_root = headless_app, HeadlessRoot
+
+    pipelines = {'off': [False], 'on': [True], 'both': [False, True]}[args.pipeline]
+    loads = [int(level) for level in args.loads.split(',')]
+    runs = []
+    try:
+        for pipelined in pipelines:
+            for load in loads:
+                name = f"{'pipeline' if pipelined else 'direct'}, charge {load}"
+                print(f"\n▶️ {name} ({args.duration:g} s)...")
+                result = run_once(app_class, make_root, scenes, labels, args, pipelined, load)
+                result.update(name=name, pipelined=pipelined, load=load)
+                runs.append(result)
+                report(name, result)
+    finally:
+        if display is not None:
+            display.terminate()
+
+    results = {
+        'config': {key: getattr(args, key) for key in
+                   ('renderer', 'engine', 'mode', 'duration', 'hold', 'width', 'height', 'fps', 'target_fps')},
+        'renderer': renderer,
+        'labels': labels,
+        'runs': runs,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Résultats enregistrés: {args.output}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_baseline(runs, json.load(f), args.tolerance)
+        print()
+        if regressions:
+            for regression in regressions:
+                print(f"✗ Régression: {regression}")
+            status = 1
+        else:
+            print(f"✓ Aucune régression par rapport à {args.baseline} (tolérance {args.tolerance:.0%})")
+    print("="*60)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Artefact de Modèle Unique - Reconnaissance Langue des Signes
+Un seul fichier: architecture, poids, noms des classes et prétraitement
+
+Le CNN était redéclaré à la main dans plusieurs scripts puis complété par
+load_weights(); rien ne garantissait que le nombre de sorties, l'ordre des
+classes ou le seuil de binarisation correspondent. L'artefact regroupe tout:
+
+    MAGIC (8 octets) | longueur de l'en-tête (uint64) | en-tête JSON
+    | tableaux bruts alignés sur 64 octets
+
+L'en-tête contient l'architecture (format Keras to_json), les noms des
+classes dans l'ordre des indices de sortie (ordre de flow_from_directory),
+les paramètres de prétraitement et la description de chaque tableau
+(couche, dtype, forme, position, CRC32). Le chargement est une seule
+projection mémoire (np.memmap): les poids ne sont pas copiés, et les
+incohérences (fichier tronqué, CRC, nombre de classes, prétraitement)
+lèvent une ValueError avant toute prédiction. Aucun compile() n'est fait.
+
+Utilisation:
+    python model_artifact.py                         # model-bw.json + model-bw.h5 -> model-bw.signmodel
+    python model_artifact.py --check model-bw.signmodel
+
+    from model_artifact import load_artifact
+    artifact = load_artifact("model-bw.signmodel")
+    model = artifact.build_numpy()      # ou artifact.build_keras()
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from preprocessing import IMAGE_SIZE, THRESHOLD
+
+
+ARTIFACT_PATH = "model-bw.signmodel"
+MAGIC = b'SIGNMDL\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+HEADER_LENGTH = struct.Struct('<Q')
+
+
+def default_preprocessing():
+    """Paramètres de prétraitement de preprocessing.py (ceux de l'entraînement)"""
+    return {
+        'image_size': IMAGE_SIZE,
+        'threshold': THRESHOLD,
+        'color': 'grayscale',
+        'scale': 1.0 / 255.0,
+        'flip': True,
+    }
+
+
+def default_artifact_path():
+    """Artefact à utiliser: SIGN_MODEL, sinon model-bw.signmodel s'il existe, sinon None"""
+    path = os.environ.get('SIGN_MODEL') or None
+    if path is None and os.path.exists(ARTIFACT_PATH):
+        path = ARTIFACT_PATH
+    return path
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def output_units(architecture):
+    """Nombre de sorties déclaré par la dernière couche Dense de l'architecture"""
+    config = architecture['config']
+    layers = config['layers'] if isinstance(config, dict) else config
+    dense = [l for l in layers if l['class_name'] == 'Dense']
+    if not dense:
+        raise ValueError("Architecture sans couche Dense")
+    return dense[-1]['config']['units']
+
+
+def save_artifact(path, architecture, weights, class_names, preprocessing=None, metadata=None):
+    """Valide puis enregistre l'artefact (écriture atomique)
+
+    weights: {nom_de_couche: [kernel, bias, ...]} comme load_h5_weights().
+    """
+    from numpy_inference import NumpyCNN
+
+    class_names = [str(name) for name in class_names]
+    # Construit le moteur NumPy: vérifie les formes des poids contre l'architecture
+    model = NumpyCNN.from_config(architecture, weights)
+    if model.output_size != len(class_names):
+        raise ValueError(f"{len(class_names)} noms de classes pour {model.output_size} sorties du modèle")
+
+    entries = []
+    arrays = []
+    offset = 0
+    for layer in sorted(weights):
+        for index, array in enumerate(weights[layer]):
+            array = np.ascontiguousarray(array, dtype=np.float32)
+            offset = _aligned(offset)
+            entries.append({
+                'layer': layer,
+                'index': index,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'offset': offset,
+                'nbytes': array.nbytes,
+                'crc32': zlib.crc32(array),
+            })
+            arrays.append(array)
+            offset += array.nbytes
+
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'architecture': architecture,
+        'class_names': class_names,
+        'preprocessing': preprocessing or default_preprocessing(),
+        'input_shape': list(model.input_shape),
+        'metadata': metadata or {},
+        'arrays': entries,
+    }).encode('utf-8')
+
+    data_start = _aligned(len(MAGIC) + HEADER_LENGTH.size + len(header))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for entry, array in zip(entries, arrays):
+            f.write(b'\x00' * (data_start + entry['offset'] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+class ModelArtifact:
+    """Artefact chargé: architecture, poids (vues memmap), classes et prétraitement"""
+
+    def __init__(self, path, architecture, weights, class_names, preprocessing, input_shape, metadata):
+        self.path = path
+        self.architecture = architecture
+        self.weights = weights
+        self.class_names = class_names
+        self.preprocessing = preprocessing
+        self.input_shape = tuple(input_shape)
+        self.metadata = metadata
+
+    @property
+    def num_classes(self):
+        return len(self.class_names)
+
+    def check_preprocessing(self, image_size=IMAGE_SIZE, threshold=THRESHOLD):
+        """Vérifie que le prétraitement du code correspond à celui de l'entraînement"""
+        expected = {'image_size': image_size, 'threshold': threshold}
+        for key, value in expected.items():
+            if self.preprocessing.get(key) != value:
+                raise ValueError(f"{self.path}: prétraitement '{key}' = {self.preprocessing.get(key)} "
+                                 f"dans l'artefact, {value} dans preprocessing.py")
+
+    def weight_list(self):
+        """Poids des couches dans l'ordre de l'architecture (pour keras set_weights)"""
+        config = self.architecture['config']
+        layers = config['layers'] if isinstance(config, dict) else config
+        names = [l['config']['name'] for l in layers]
+        return [self.weights[name] for name in names if self.weights.get(name)]
+
+    def build_numpy(self):
+        from numpy_inference import NumpyCNN
+        return NumpyCNN.from_config(self.architecture, self.weights)
+
+    def build_keras(self):
+        """Modèle Keras construit depuis l'architecture de l'artefact (lève ValueError si les poids ne correspondent pas)"""
+        try:
+            from tensorflow.keras.models import model_from_json
+        except ImportError:
+            from keras.models import model_from_json
+
+        model = model_from_json(json.dumps(self.architecture))
+        weighted = [layer for layer in model.layers if layer.weights]
+        arrays = self.weight_list()
+        if len(weighted) != len(arrays):
+            raise ValueError(f"{self.path}: {len(arrays)} couches de poids pour {len(weighted)} "
+                             f"couches à poids dans l'architecture")
+        for layer, layer_arrays in zip(weighted, arrays):
+            expected = [tuple(w.shape) for w in layer.weights]
+            found = [tuple(a.shape) for a in layer_arrays]
+            if expected != found:
+                raise ValueError(f"{self.path}: poids de '{layer.name}' de formes {found}, attendu {expected}")
+            layer.set_weights(layer_arrays)
+        return model
+
+
+def load_artifact(path=ARTIFACT_PATH, verify=True):
+    """Charge et valide un artefact par projection mémoire (lève ValueError si incohérent)"""
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    prefix = len(MAGIC) + HEADER_LENGTH.size
+    if len(data) < prefix or data[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError(f"{path}: ce n'est pas un artefact de modèle")
+    (header_length,) = HEADER_LENGTH.unpack(data[len(MAGIC):prefix].tobytes())
+    if prefix + header_length > len(data):
+        raise ValueError(f"{path}: en-tête tronqué")
+    header = json.loads(data[prefix:prefix + header_length].tobytes().decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: version de format {header.get('format_version')} non supportée")
+
+    data_start = _aligned(prefix + header_length)
+    weights = {}
+    for entry in header['arrays']:
+        start = data_start + entry['offset']
+        if start + entry['nbytes'] > len(data):
+            raise ValueError(f"{path}: fichier tronqué ({entry['layer']})")
+        raw = data[start:start + entry['nbytes']]
+        if verify and zlib.crc32(raw) != entry['crc32']:
+            raise ValueError(f"{path}: poids corrompus ({entry['layer']}, CRC32)")
+        array = raw.view(np.dtype(entry['dtype'])).reshape(entry['shape'])
+        arrays = weights.setdefault(entry['layer'], [])
+        if entry['index'] != len(arrays):
+            raise ValueError(f"{path}: poids de '{entry['layer']}' dans le désordre")
+        arrays.append(array)
+
+    architecture = header['architecture']
+    class_names = header['class_names']
+    units = output_units(architecture)
+    if units != len(class_names):
+        raise ValueError(f"{path}: {len(class_names)} noms de classes pour {units} sorties du modèle")
+
+    return ModelArtifact(path, architecture, weights, class_names, header['preprocessing'],
+                         header['input_shape'], header.get('metadata', {}))
+
+
+def read_class_names(path):
+    """Noms des classes: dossier du dataset (ordre de flow_from_directory), JSON ou une ligne par classe"""
+    if os.path.isdir(path):
+        from pack_dataset import list_classes
+        return list_classes(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            names = json.load(f)
+            # Accepte aussi class_indices {nom: indice}
+            if isinstance(names, dict):
+                names = sorted(names, key=names.get)
+            return names
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crée ou vérifie l'artefact unique du modèle")
+    parser.add_argument('--json', default='model-bw.json', help="architecture du modèle")
+    parser.add_argument('--weights', default='model-bw.h5', help="poids du modèle")
+    parser.add_argument('--classes', default='DataSet/train',
+                        help="noms des classes: dossier du dataset, fichier JSON ou texte")
+    parser.add_argument('-o', '--output', default=ARTIFACT_PATH, help="artefact produit")
+    parser.add_argument('--check', metavar='ARTEFACT', help="vérifie un artefact existant")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("📦 ARTEFACT DU MODÈLE")
+    print("="*60)
+
+    if not args.check:
+        from numpy_inference import load_h5_weights
+
+        if not os.path.exists(args.classes):
+            print(f"✗ Erreur: {args.classes} n'existe pas (noms des classes introuvables)")
+            return 1
+        with open(args.json, 'r') as json_file:
+            architecture = json.load(json_file)
+        try:
+            save_artifact(args.output, architecture, load_h5_weights(args.weights),
+                          read_class_names(args.classes),
+                          metadata={'source': [args.json, args.weights], 'created': time.strftime('%Y-%m-%dT%H:%M:%S')})
+        except ValueError as e:
+            print(f"✗ Erreur: {e}")
+            return 1
+        print(f"✓ Artefact créé: {args.output} ({os.path.getsize(args.output) / 1024:.0f} Ko)")
+
+    path = args.check or args.output
+    start = time.perf_counter()
+    try:
+        artifact = load_artifact(path)
+        artifact.check_preprocessing()
+        model = artifact.build_numpy()
+    except (OSError, ValueError) as e:
+        print(f"✗ Artefact invalide: {e}")
+        return 1
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✓ Artefact valide: {path} (chargé en {elapsed:.1f} ms)")
+    print(f"  • Entrée: {model.input_shape} | sorties: {model.output_size}")
+    print(f"  • Classes: {', '.join(artifact.class_names)}")
+    print(f"  • Prétraitement: {artifact.preprocessing}")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
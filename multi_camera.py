@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-Caméras - Reconnaissance Langue des Signes
+Plusieurs flux, un thread de capture par flux, une inférence par lot commune
+
+Chaque source (indice de caméra, fichier vidéo ou source synthétique) a son
+propre LatestFrameGrabber (pipeline.py). À chaque tick d'inférence, la ROI
+de la dernière image de chaque flux est prétraitée, toutes les ROI sont
+empilées en un seul lot, et chaque ligne du résultat est renvoyée à son flux.
+Les caméras ne sont pas synchronisées: dès qu'un flux a une nouvelle image,
+le tick attend au plus --max-wait ms que les autres flux en aient une aussi.
+Un flux sans nouvelle image à la fin de cette attente n'est pas recalculé.
+
+Rapport: FPS de capture et d'inférence par flux, images abandonnées, taille
+moyenne des lots et coût par image comparé à une prédiction par lot de 1.
+La référence (lot de 1) est mesurée sur les mêmes ROI, pendant la boucle:
+un lot sur --reference-every est aussi prédit image par image (hors compteurs).
+
+Le lot n'est rentable que si le moteur a un coût fixe par appel à amortir:
+- keras (par défaut): appel du tf.function, conversions -> le lot réduit le
+  coût par image
+- numpy: aucun coût fixe notable, la passe avant coûte autant par image
+  quelle que soit la taille du lot; le lot ne sert qu'à regrouper les flux
+- tflite: interpréteur à lot fixe de 1, les images d'un lot passent une à une
+
+Sources (--sources, séparées par des virgules):
+    0, 1, ...          caméra (indice de périphérique)
+    video.mp4          fichier vidéo (lu à sa cadence, en boucle)
+    dossier/           dossier d'images (rejouées à 30 fps, en boucle)
+    synthetic[:fps]    images synthétiques (tests sans caméra, 30 fps par défaut)
+
+Utilisation:
+    python multi_camera.py --sources synthetic,synthetic,synthetic,synthetic --duration 20
+    python multi_camera.py --sources 0,1 --mode lettres --show
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from categories import mode_labels
+from frame_sources import open_source
+from pipeline import LatestFrameGrabber
+from preprocessing import preprocess_batch, roi_bounds
+
+
+class Stream:
+    """Un flux: source, thread de capture et derniers résultats"""
+
+    def __init__(self, name, cap):
+        self.name = name
+        self.cap = cap
+        self.grabber = LatestFrameGrabber(cap)
+        self.last_frame = None
+        self.prediction = None  # (signe, probabilité)
+        self.results = 0
+
+    def stats(self, elapsed):
+        return {
+            'stream': self.name,
+            'capture_fps': self.grabber.frames_captured / elapsed if elapsed else 0.0,
+            'inference_fps': self.results / elapsed if elapsed else 0.0,
+            'frames_captured': self.grabber.frames_captured,
+            'frames_dropped': self.grabber.frames_dropped,
+            'read_failures': self.grabber.read_failures,
+            'results': self.results,
+            'prediction': self.prediction,
+        }
+
+
+class MultiStreamRunner:
+    """Tick d'inférence: dernière ROI de chaque flux -> un lot -> résultats par flux"""
+
+    def __init__(self, session, streams, mode='tous', max_wait=0.010, reference_every=50):
+        self.session = session
+        self.streams = streams
+        self.max_wait = max_wait
+        self.reference_every = reference_every
+        self.indices, self.names = mode_labels(mode, session.num_classes)
+        if mode == 'tous' and session.class_names is not None:
+            self.names = [session.class_names[i] for i in self.indices]
+        self.indices = np.asarray(self.indices)
+
+        # Compteurs de lots
+        self.batches = 0
+        self.images = 0
+        self.inference_time = 0.0
+
+        # Référence: mêmes ROI prédites une par une (un lot sur reference_every)
+        self.single_images = 0
+        self.single_time = 0.0
+
+    def measure_single(self, batch):
+        """Prédit le lot image par image (référence de l'efficacité des lots)"""
+        start = time.perf_counter()
+        for i in range(len(batch)):
+            self.session.predict_batch(batch[i:i + 1])
+        self.single_time += time.perf_counter() - start
+        self.single_images += len(batch)
+
+    def start(self):
+        for stream in self.streams:
+            stream.grabber.start()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        for stream in self.streams:
+            stream.grabber.stop()
+            stream.cap.release()
+
+    def collect(self):
+        """Nouvelles images des flux: attend jusqu'à max_wait après la première"""
+        frames = {}
+        deadline = None
+        while True:
+            for stream in self.streams:
+                if stream in frames:
+                    continue
+                _, frame = stream.grabber.latest()
+                if frame is not None:
+                    frames[stream] = frame
+            if len(frames) == len(self.streams):
+                break
+            now = time.perf_counter()
+            if frames and deadline is None:
+                deadline = now + self.max_wait
+            if deadline is None or now >= deadline:
+                break
+            time.sleep(0.001)
+        return frames
+
+    def tick(self):
+        """Un lot sur les flux qui ont une nouvelle image; retourne la taille du lot"""
+        frames = self.collect()
+        if not frames:
+            return 0
+        ready = []
+        rois = []
+        for stream in self.streams:
+            frame = frames.get(stream)
+            if frame is None:
+                continue
+            stream.last_frame = frame
+            x1, y1, x2, y2 = roi_bounds(frame)
+            rois.append(frame[y1:y2, x1:x2])
+            ready.append(stream)
+
+        batch = preprocess_batch(rois)
+        start = time.perf_counter()
+        probabilities = self.session.predict_batch(batch)
+        self.inference_time += time.perf_counter() - start
+        self.batches += 1
+        self.images += len(ready)
+        if self.reference_every and self.batches % self.reference_every == 1:
+            self.measure_single(batch)
+
+        scores = probabilities[:, self.indices]
+        best = scores.argmax(axis=1)
+        for stream, row, i in zip(ready, scores, best):
+            stream.prediction = (self.names[i], float(row[i]))
+            stream.results += 1
+        return len(ready)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        batched_ms = self.inference_time * 1000 / self.images if self.images else 0.0
+        single_ms = self.single_time * 1000 / self.single_images if self.single_images else None
+        return {
+            'elapsed_s': elapsed,
+            'streams': [stream.stats(elapsed) for stream in self.streams],
+            'batches': self.batches,
+            'mean_batch_size': self.images / self.batches if self.batches else 0.0,
+            'batch_fill': self.images / (self.batches * len(self.streams)) if self.batches else 0.0,
+            'ms_per_image_batched': batched_ms,
+            'ms_per_image_single': single_ms,
+            'batching_speedup': single_ms / batched_ms if batched_ms and single_ms else None,
+        }
+
+
+def print_stats(stats):
+    print(f"\n⏱️  {stats['elapsed_s']:.1f} s | lots: {stats['batches']} | "
+          f"taille moyenne {stats['mean_batch_size']:.2f} ({stats['batch_fill'] * 100:.0f}% des flux)")
+    print(f"  {'flux':<22}{'capture':>10}{'inférence':>12}{'perdues':>10}  prédiction")
+    for s in stats['streams']:
+        prediction = '-' if s['prediction'] is None else f"{s['prediction'][0]} ({s['prediction'][1] * 100:.0f}%)"
+        print(f"  {s['stream'][:21]:<22}{s['capture_fps']:>7.1f}fps{s['inference_fps']:>9.1f}fps"
+              f"{s['frames_dropped']:>10}  {prediction}")
+    if stats['batching_speedup'] is not None:
+        print(f"  Coût par image: {stats['ms_per_image_batched']:.3f} ms en lot vs "
+              f"{stats['ms_per_image_single']:.3f} ms seule (x{stats['batching_speedup']:.1f})")
+        if stats['batching_speedup'] < 1.0:
+            print("  ⚠️ Le lot ne réduit pas le coût par image avec ce moteur (voir --engine)")
+
+
+def show_mosaic(streams, columns):
+    """Affiche les flux en mosaïque avec leur prédiction"""
+    tiles = []
+    for stream in streams:
+        frame = stream.last_frame
+        tile = np.zeros((240, 320, 3), np.uint8) if frame is None else cv2.resize(frame, (320, 240))
+        label = stream.name if stream.prediction is None else f"{stream.name}: {stream.prediction[0]}"
+        cv2.putText(tile, label, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        tiles.append(tile)
+    while len(tiles) % columns:
+        tiles.append(np.zeros_like(tiles[0]))
+    rows = [np.hstack(tiles[i:i + columns]) for i in range(0, len(tiles), columns)]
+    cv2.imshow('Multi-cameras', np.vstack(rows))
+    return cv2.waitKey(1) & 0xFF != ord('q')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reconnaissance sur plusieurs caméras avec inférence par lot")
+    parser.add_argument('--sources', default='synthetic,synthetic',
+                        help="sources séparées par des virgules (indice, vidéo, dossier, synthetic[:fps])")
+    parser.add_argument('--engine', default='keras', choices=['numpy', 'keras', 'int8', 'tflite'],
+                        help="moteur d'inférence (keras: le lot amortit le coût par appel; numpy: pas de gain)")
+    parser.add_argument('--model', help="artefact du modèle (par défaut SIGN_MODEL ou model-bw.signmodel s'il existe)")
+    parser.add_argument('--mode', default='tous', choices=['tous', 'chiffres', 'lettres', 'actions'])
+    parser.add_argument('--max-wait', type=float, default=10.0,
+                        help="attente maximale des autres flux pour compléter un lot (ms)")
+    parser.add_argument('--reference-every', type=int, default=50,
+                        help="un lot sur N est aussi prédit image par image (référence, 0 = jamais)")
+    parser.add_argument('--duration', type=float, default=0, help="durée en secondes (0 = jusqu'à Ctrl+C)")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="intervalle du rapport (s)")
+    parser.add_argument('--show', action='store_true', help="affiche la mosaïque des flux")
+    parser.add_argument('-o', '--output', help="fichier JSON des statistiques finales")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from inference_session import InferenceSession, artifact_for
+
+    print("="*60)
+    print("🎥 RECONNAISSANCE MULTI-CAMÉRAS")
+    print("="*60)
+
+    session = InferenceSession(engine=args.engine, artifact_path=artifact_for(args.engine, args.model))
+    print(f"✓ Modèle chargé (moteur {args.engine})")
+
+    streams = []
+    for i, spec in enumerate(s.strip() for s in args.sources.split(',') if s.strip()):
+        cap = open_source(spec, seed=i)
+        if not cap.isOpened():
+            print(f"✗ Source inaccessible: {spec}")
+            for stream in streams:
+                stream.cap.release()
+            return 1
+        streams.append(Stream(f"{i}:{spec}", cap))
+    print(f"✓ {len(streams)} flux ouverts")
+
+    runner = MultiStreamRunner(session, streams, args.mode, args.max_wait / 1000, args.reference_every)
+    runner.start()
+    next_report = time.perf_counter() + args.report_interval
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    try:
+        while deadline is None or time.perf_counter() < deadline:
+            if runner.tick() == 0:
+                # Aucune nouvelle image: attendre un peu plutôt que boucler à vide
+                time.sleep(0.002)
+            if args.show and not show_mosaic(streams, columns=min(len(streams), 3)):
+                break
+            if time.perf_counter() >= next_report:
+                print_stats(runner.stats())
+                next_report += args.report_interval
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrompu")
+    finally:
+        runner.stop()
+        if args.show:
+            cv2.destroyAllWindows()
+
+    stats = runner.stats()
+    print("\n" + "="*60)
+    print("📊 BILAN")
+    print("="*60)
+    print_stats(stats)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        print(f"\n✓ Statistiques enregistrées: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
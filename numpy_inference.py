@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur d'Inférence NumPy - Reconnaissance Langue des Signes
+Exécute le CNN de model-bw.h5 sans TensorFlow ni Keras
+
+Le modèle (2 × Conv2D + MaxPooling, Flatten, Dense 128, Dense softmax) est
+décrit par model-bw.json; les poids sont lus directement dans model-bw.h5
+avec h5py. La passe avant est entièrement vectorisée:
+- convolution par im2col (sliding_window_view) + produit matriciel BLAS
+- max-pooling par simple reshape
+- couches denses par produit matriciel
+
+Première couche binaire: l'entrée est toujours un masque seuillé (0/1), donc
+chaque fenêtre 3x3 ne peut prendre que 512 motifs. La première convolution
+(ReLU comprise) est précalculée dans une table 512 x 32 et remplacée par un
+calcul d'indice à 9 bits + une lecture de table (binary_conv2d_lut).
+Si l'entrée n'est pas binaire, la convolution float est utilisée.
+Sur des masques compactés (forward_packed), l'indice est calculé sur les
+mots de 64 bits de chaque ligne (décalages et masques), sans décompacter.
+
+Utilisation:
+    from numpy_inference import NumpyCNN
+    model = NumpyCNN.from_files("model-bw.json", "model-bw.h5")
+    result = model.predict(x.reshape(1, 64, 64, 1), verbose=0)
+"""
+
+import json
+
+import h5py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+SUPPORTED_ACTIVATIONS = ('linear', 'relu', 'softmax')
+
+
+def load_h5_weights(h5_path):
+    """Lit les poids d'un fichier HDF5 Keras (format save_weights / save)
+
+    Retourne un dictionnaire {nom_de_couche: [kernel, bias, ...]} dans
+    l'ordre des attributs 'weight_names' enregistrés par Keras.
+    """
+    weights = {}
+    with h5py.File(h5_path, 'r') as f:
+        # model.save() range les poids dans un sous-groupe 'model_weights'
+        root = f['model_weights'] if 'model_weights' in f else f
+        for raw_name in root.attrs['layer_names']:
+            name = raw_name.decode('utf8') if isinstance(raw_name, bytes) else str(raw_name)
+            group = root[name]
+            arrays = []
+            for raw_weight in group.attrs.get('weight_names', []):
+                weight_name = raw_weight.decode('utf8') if isinstance(raw_weight, bytes) else str(raw_weight)
+                arrays.append(np.asarray(group[weight_name], dtype=np.float32))
+            weights[name] = arrays
+    return weights
+
+
+def save_h5_weights(h5_path, weights, layer_names):
+    """Écrit les poids au format HDF5 Keras (layer_names / weight_names), relu par load_h5_weights"""
+    with h5py.File(h5_path, 'w') as f:
+        f.attrs['layer_names'] = [name.encode('utf8') for name in layer_names]
+        f.attrs['backend'] = b'tensorflow'
+        for name in layer_names:
+            group = f.create_group(name)
+            arrays = weights.get(name, [])
+            weight_names = [f'{name}/{kind}:0' for kind in ('kernel', 'bias')[:len(arrays)]]
+            group.attrs['weight_names'] = [w.encode('utf8') for w in weight_names]
+            for weight_name, array in zip(weight_names, arrays):
+                group.create_dataset(weight_name, data=np.asarray(array, dtype=np.float32))
+
+
+def quantize_weights(weights):
+    """Quantification int8 symétrique des noyaux, une échelle par canal de sortie
+
+    Retourne {nom: [kernel_int8, scales, bias, ...]}; les biais restent en float32.
+    """
+    quantized = {}
+    for name, arrays in weights.items():
+        if not arrays:
+            quantized[name] = []
+            continue
+        kernel = arrays[0]
+        reduce_axes = tuple(range(kernel.ndim - 1))
+        scales = np.abs(kernel).max(axis=reduce_axes) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.clip(np.round(kernel / scales), -127, 127).astype(np.int8)
+        quantized[name] = [q, scales.astype(np.float32)] + list(arrays[1:])
+    return quantized
+
+
+def save_int8(path, architecture, weights):
+    """Enregistre l'architecture et les poids quantifiés int8 dans un .npz"""
+    arrays = {'architecture': np.array(json.dumps(architecture))}
+    for name, (q, scales, *rest) in ((n, a) for n, a in quantize_weights(weights).items() if a):
+        arrays[f'{name}/kernel_q'] = q
+        arrays[f'{name}/kernel_scale'] = scales
+        for i, extra in enumerate(rest):
+            arrays[f'{name}/extra_{i}'] = extra
+    np.savez_compressed(path, **arrays)
+
+
+def load_int8(path):
+    """Relit un .npz int8: retourne (architecture, poids déquantifiés en float32)
+
+    Format de stockage seulement: la passe avant reste en float32 (BLAS).
+    NumPy n'a pas de produit matriciel entier rapide, un calcul int8 x int8
+    -> int32 serait bien plus lent que le chemin float.
+    """
+    weights = {}
+    with np.load(path) as data:
+        architecture = json.loads(str(data['architecture']))
+        names = sorted({key.split('/')[0] for key in data.files if '/' in key})
+        for name in names:
+            kernel = data[f'{name}/kernel_q'].astype(np.float32) * data[f'{name}/kernel_scale']
+            extras = sorted(k for k in data.files if k.startswith(f'{name}/extra_'))
+            weights[name] = [kernel] + [data[k].astype(np.float32) for k in extras]
+    return architecture, weights
+
+
+def relu(x):
+    """ReLU en place"""
+    return np.maximum(x, 0, out=x)
+
+
+def softmax(x):
+    """Softmax numériquement stable sur le dernier axe"""
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    e /= e.sum(axis=-1, keepdims=True)
+    return e
+
+
+def apply_activation(x, activation):
+    if activation == 'relu':
+        return relu(x)
+    if activation == 'softmax':
+        return softmax(x)
+    return x
+
+
+def conv2d_valid(x, kernel, bias, kernel_size):
+    """Convolution 2D 'valid', stride 1, channels_last, par im2col
+
+    x: (N, H, W, C) float32
+    kernel: (C * kh * kw, F) déjà réordonné par prepare_conv_kernel
+    """
+    n, h, w, c = x.shape
+    kh, kw = kernel_size
+    # (N, Ho, Wo, C, kh, kw) - vue sans copie
+    windows = sliding_window_view(x, (kh, kw), axis=(1, 2))
+    ho, wo = windows.shape[1], windows.shape[2]
+    # Une seule copie pour obtenir la matrice im2col
+    cols = windows.reshape(n * ho * wo, c * kh * kw)
+    out = cols @ kernel
+    out += bias
+    return out.reshape(n, ho, wo, -1)
+
+
+def build_binary_lut(kernel, bias, activation):
+    """Table (2^(kh*kw), F) des réponses de la convolution pour chaque motif binaire
+
+    kernel: matrice (kh*kw, F) de prepare_conv_kernel (une seule entrée);
+    le bit r du motif correspond à la ligne r du noyau.
+    """
+    taps = kernel.shape[0]
+    patterns = np.arange(1 << taps)[:, np.newaxis] >> np.arange(taps) & 1
+    table = patterns.astype(np.float32) @ kernel
+    table += bias
+    return np.ascontiguousarray(apply_activation(table, activation))
+
+
+def binary_pattern_index(bits, kernel_size):
+    """Indice du motif binaire de chaque fenêtre: bits (N, H, W) 0/1 -> (N, Ho, Wo)"""
+    kh, kw = kernel_size
+    n, h, w = bits.shape
+    ho, wo = h - kh + 1, w - kw + 1
+    index = np.zeros((n, ho, wo), dtype=np.uint16)
+    for i in range(kh):
+        for j in range(kw):
+            index |= bits[:, i:i + ho, j:j + wo].astype(np.uint16) << (i * kw + j)
+    return index
+
+
+def packed_pattern_index(packed, height, width, kernel_size):
+    """Indice du motif de chaque fenêtre, calculé sur les masques compactés
+
+    packed: (N, height*width/8) octets np.packbits (width multiple de 8, <= 64).
+    Chaque ligne devient un mot de 64 bits (pixel x au bit 63-x); les motifs
+    horizontaux de kw bits sont extraits par décalage et masque, puis les kh
+    lignes sont combinées. Ordre des bits inversé par rapport à
+    binary_pattern_index: bit (kh*kw-1) - (i*kw+j) pour le pixel (i, j)
+    (voir reversed_pattern_table).
+    """
+    kh, kw = kernel_size
+    n = len(packed)
+    ho, wo = height - kh + 1, width - kw + 1
+    rows = np.zeros((n, height, 8), dtype=np.uint8)
+    rows[..., :width // 8] = packed.reshape(n, height, width // 8)
+    words = rows.view('>u8')[..., 0]
+    shifts = (64 - kw - np.arange(wo)).astype(np.uint64)
+    horizontal = ((words[..., np.newaxis] >> shifts) & np.uint64((1 << kw) - 1)).astype(np.uint16)
+    index = horizontal[:, :ho] << ((kh - 1) * kw)
+    for i in range(1, kh):
+        index |= horizontal[:, i:i + ho] << ((kh - 1 - i) * kw)
+    return index
+
+
+def reversed_pattern_table(table):
+    """Table réordonnée pour les indices de packed_pattern_index (bits inversés)"""
+    taps = int(np.log2(len(table)))
+    patterns = np.arange(len(table))
+    reversed_index = np.zeros_like(patterns)
+    for bit in range(taps):
+        reversed_index |= (patterns >> bit & 1) << (taps - 1 - bit)
+    return np.ascontiguousarray(table[reversed_index])
+
+
+def binary_conv2d_lut(bits, table, kernel_size):
+    """Convolution + activation d'un masque binaire par lecture de table"""
+    return table[binary_pattern_index(bits, kernel_size)]
+
+
+def prepare_conv_kernel(kernel):
+    """Réordonne un noyau Keras (kh, kw, C, F) en matrice (C*kh*kw, F)
+
+    L'ordre (C, kh, kw) correspond à celui de sliding_window_view, ce qui
+    évite de transposer la matrice im2col à chaque image.
+    """
+    kh, kw, c, f = kernel.shape
+    return np.ascontiguousarray(kernel.transpose(2, 0, 1, 3).reshape(c * kh * kw, f))
+
+
+def max_pool2d(x, pool):
+    """Max-pooling 'valid' avec stride = pool, par reshape"""
+    n, h, w, c = x.shape
+    ph, pw = pool
+    ho, wo = h // ph, w // pw
+    x = x[:, :ho * ph, :wo * pw, :]
+    return x.reshape(n, ho, ph, wo, pw, c).max(axis=(2, 4))
+
+
+class NumpyCNN:
+    """CNN séquentiel exécuté en NumPy pur
+
+    Remplaçant direct du modèle Keras pour l'inférence: la méthode
+    predict() accepte les mêmes entrées (N, 64, 64, 1) et renvoie les
+    mêmes probabilités (N, nb_classes).
+    """
+
+    def __init__(self, layers, input_shape, binary_first_layer=True):
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+
+        # Table de la première convolution pour les entrées binaires
+        self.binary_lut = None
+        self.packed_lut = None  # même table, indices de packed_pattern_index
+        first = layers[0] if layers else None
+        if (binary_first_layer and first is not None and first['kind'] == 'conv2d'
+                and self.input_shape[-1] == 1 and first['kernel'].shape[0] <= 16):
+            self.binary_lut = build_binary_lut(first['kernel'], first['bias'], first['activation'])
+            width = self.input_shape[1]
+            if width % 8 == 0 and width <= 64:
+                self.packed_lut = reversed_pattern_table(self.binary_lut)
+        self.output_size = None
+        for layer in reversed(layers):
+            if layer['kind'] == 'dense':
+                self.output_size = layer['kernel'].shape[1]
+                break
+
+    @classmethod
+    def from_files(cls, json_path="model-bw.json", h5_path="model-bw.h5"):
+        """Construit le moteur à partir de l'architecture JSON et des poids HDF5"""
+        with open(json_path, "r") as json_file:
+            architecture = json.load(json_file)
+        return cls.from_config(architecture, load_h5_weights(h5_path))
+
+    @classmethod
+    def from_int8(cls, npz_path):
+        """Construit le moteur à partir d'un modèle quantifié par quantize_model.py"""
+        architecture, weights = load_int8(npz_path)
+        return cls.from_config(architecture, weights)
+
+    @classmethod
+    def from_config(cls, architecture, weights):
+        """Construit le moteur à partir d'une config Keras et d'un dict de poids"""
+        if architecture.get('class_name') != 'Sequential':
+            raise ValueError(f"Modèle non supporté: {architecture.get('class_name')}")
+
+        config = architecture['config']
+        layer_configs = config['layers'] if isinstance(config, dict) else config
+
+        input_shape = None
+        layers = []
+        for layer in layer_configs:
+            kind = layer['class_name']
+            cfg = layer['config']
+            name = cfg['name']
+
+            if input_shape is None:
+                shape = cfg.get('batch_input_shape') or cfg.get('batch_shape')
+                if shape is not None:
+                    input_shape = tuple(shape[1:])
+
+            if kind == 'InputLayer':
+                continue
+
+            if kind == 'Conv2D':
+                if tuple(cfg['strides']) != (1, 1) or cfg['padding'] != 'valid':
+                    raise ValueError(f"{name}: seules les convolutions 'valid' stride 1 sont supportées")
+                if tuple(cfg.get('dilation_rate', (1, 1))) != (1, 1):
+                    raise ValueError(f"{name}: dilatation non supportée")
+                if cfg.get('data_format', 'channels_last') != 'channels_last':
+                    raise ValueError(f"{name}: seul channels_last est supporté")
+                kernel, bias = cls._layer_weights(weights, name, cfg.get('use_bias', True))
+                if tuple(kernel.shape[:2]) != tuple(cfg['kernel_size']):
+                    raise ValueError(f"{name}: taille de noyau incohérente avec le JSON")
+                layers.append({
+                    'kind': 'conv2d',
+                    'name': name,
+                    'kernel': prepare_conv_kernel(kernel),
+                    'kernel_size': tuple(kernel.shape[:2]),
+                    'bias': bias,
+                    'activation': cls._activation(name, cfg),
+                })
+
+            elif kind == 'MaxPooling2D':
+                pool = tuple(cfg['pool_size'])
+                if tuple(cfg.get('strides') or pool) != pool or cfg.get('padding', 'valid') != 'valid':
+                    raise ValueError(f"{name}: seul le pooling 'valid' avec stride = pool_size est supporté")
+                layers.append({'kind': 'maxpool', 'name': name, 'pool': pool})
+
+            elif kind == 'Flatten':
+                layers.append({'kind': 'flatten', 'name': name})
+
+            elif kind == 'Dense':
+                kernel, bias = cls._layer_weights(weights, name, cfg.get('use_bias', True))
+                if kernel.shape[1] != cfg['units']:
+                    raise ValueError(f"{name}: {kernel.shape[1]} unités dans le HDF5, {cfg['units']} dans le JSON")
+                layers.append({
+                    'kind': 'dense',
+                    'name': name,
+                    'kernel': np.ascontiguousarray(kernel),
+                    'bias': bias,
+                    'activation': cls._activation(name, cfg),
+                })
+
+            elif kind == 'Dropout':
+                # Sans effet en inférence
+                continue
+
+            else:
+                raise ValueError(f"Couche non supportée: {kind} ({name})")
+
+        if input_shape is None:
+            input_shape = (64, 64, 1)
+        return cls(layers, input_shape)
+
+    @staticmethod
+    def _layer_weights(weights, name, use_bias):
+        if name not in weights:
+            raise ValueError(f"Poids de la couche '{name}' absents du fichier HDF5")
+        arrays = weights[name]
+        kernel = arrays[0]
+        if use_bias:
+            bias = arrays[1]
+        else:
+            bias = np.zeros(kernel.shape[-1], dtype=np.float32)
+        return kernel, bias
+
+    @staticmethod
+    def _activation(name, cfg):
+        activation = cfg.get('activation', 'linear')
+        if activation not in SUPPORTED_ACTIVATIONS:
+            raise ValueError(f"{name}: activation '{activation}' non supportée")
+        return activation
+
+    def forward(self, x, stop=None):
+        """Passe avant sur un lot (N, H, W, C) float32 (couches [0, stop) si stop est donné)"""
+        if self.binary_lut is not None:
+            bits = x[..., 0] > 0.5
+            # Entrée strictement binaire: première couche par table
+            if np.array_equal(bits, x[..., 0]):
+                return self.forward_bits(bits, stop)
+        return self._forward_layers(x, self.layers[:stop])
+
+    def forward_bits(self, bits, stop=None):
+        """Passe avant sur un lot de masques binaires (N, H, W) bool ou 0/1"""
+        first = self.layers[0]
+        x = binary_conv2d_lut(np.asarray(bits, dtype=np.uint8), self.binary_lut, first['kernel_size'])
+        return self._forward_layers(x, self.layers[1:stop])
+
+    @property
+    def feature_stop(self):
+        """Nombre de couches jusqu'au Flatten inclus (partie convolutive)"""
+        kinds = [layer['kind'] for layer in self.layers]
+        if 'flatten' not in kinds:
+            raise ValueError("Modèle sans couche Flatten")
+        return kinds.index('flatten') + 1
+
+    def features(self, x):
+        """Vecteurs de caractéristiques (sortie du Flatten) d'un lot (N, H, W, C)"""
+        return self.forward(np.asarray(x, dtype=np.float32), self.feature_stop)
+
+    def forward_packed(self, packed):
+        """Passe avant sur des masques compactés (N, H*W/8 octets, comme np.packbits)"""
+        h, w = self.input_shape[:2]
+        packed = np.asarray(packed, dtype=np.uint8).reshape(len(packed), -1)
+        if self.packed_lut is not None:
+            # Indice des motifs directement depuis les mots compactés
+            first = self.layers[0]
+            x = self.packed_lut[packed_pattern_index(packed, h, w, first['kernel_size'])]
+            return self._forward_layers(x, self.layers[1:])
+        bits = np.unpackbits(packed, axis=1, count=h * w).reshape(-1, h, w)
+        if self.binary_lut is None:
+            return self._forward_layers(bits[..., np.newaxis].astype(np.float32), self.layers)
+        return self.forward_bits(bits)
+
+    @staticmethod
+    def _forward_layers(x, layers):
+        for layer in layers:
+            kind = layer['kind']
+            if kind == 'conv2d':
+                x = conv2d_valid(x, layer['kernel'], layer['bias'], layer['kernel_size'])
+                x = apply_activation(x, layer['activation'])
+            elif kind == 'maxpool':
+                x = max_pool2d(x, layer['pool'])
+            elif kind == 'flatten':
+                x = x.reshape(x.shape[0], -1)
+            elif kind == 'dense':
+                x = x @ layer['kernel']
+                x += layer['bias']
+                x = apply_activation(x, layer['activation'])
+        return x
+
+    def predict(self, x, verbose=0, batch_size=None):
+        """Même signature utile que keras.Model.predict (verbose ignoré)"""
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == len(self.input_shape):
+            x = x[np.newaxis]
+        if x.shape[1:] != self.input_shape:
+            raise ValueError(f"Entrée {x.shape[1:]} incompatible avec {self.input_shape}")
+        if batch_size is None or len(x) <= batch_size:
+            return self.forward(x)
+        return np.concatenate([self.forward(x[i:i + batch_size])
+                               for i in range(0, len(x), batch_size)])
+
+    def __call__(self, x):
+        return self.predict(x)
+
+
+if __name__ == "__main__":
+    import time
+
+    print("="*60)
+    print("MOTEUR D'INFÉRENCE NUMPY")
+    print("="*60)
+
+    start = time.perf_counter()
+    model = NumpyCNN.from_files("model-bw.json", "model-bw.h5")
+    print(f"✓ Modèle chargé en {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"  Couches: {[layer['name'] for layer in model.layers]}")
+
+    x = (np.random.rand(1, 64, 64, 1) > 0.5).astype('float32')
+    model.predict(x)
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = model.predict(x)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"✓ Inférence: {elapsed * 1000:.2f} ms / image")
+    print(f"  Somme des probabilités: {result.sum():.4f}")
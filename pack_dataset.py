@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Compactage du Dataset - Reconnaissance Langue des Signes
+Convertit DataSet/train et DataSet/test en tableaux contigus lus par np.memmap
+
+Chaque image 64x64 n'est décodée qu'une seule fois, au compactage. Ensuite
+l'entraînement et l'évaluation lisent directement les octets (mmap) sans
+décodage JPEG, et plusieurs processus partagent le même cache de pages.
+
+Fichiers produits dans le dossier de sortie (par défaut DataSet/packed):
+- train_images.npy / test_images.npy : uint8 (N, 64, 64)
+  ou (N, 64, 8) si --bitpack (masques 0/255 compactés à 1 bit par pixel)
+- train_labels.npy / test_labels.npy : indice de classe (int16)
+- index.json : noms des classes (ordre de flow_from_directory), format, tailles
+
+Utilisation:
+    python pack_dataset.py                      # DataSet -> DataSet/packed
+    python pack_dataset.py --bitpack            # 512 octets par image
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from preprocessing import IMAGE_SIZE
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff')
+INDEX_FILE = 'index.json'
+
+
+def list_classes(split_dir):
+    """Classes dans l'ordre attribué par flow_from_directory (tri des sous-dossiers)"""
+    return sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+
+
+def list_samples(split_dir, classes):
+    """Liste (chemin, indice_classe) dans l'ordre de flow_from_directory"""
+    samples = []
+    for label, cls in enumerate(classes):
+        cls_dir = os.path.join(split_dir, cls)
+        if not os.path.isdir(cls_dir):
+            continue
+        for root, dirs, files in os.walk(cls_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    samples.append((os.path.join(root, name), label))
+    return samples
+
+
+def read_mask(path):
+    """Lit une image en niveaux de gris 64x64 (interpolation 'nearest' comme Keras)"""
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise IOError(f"Image illisible: {path}")
+    if image.shape != (IMAGE_SIZE, IMAGE_SIZE):
+        image = cv2.resize(image, (IMAGE_SIZE, IMAGE_SIZE), interpolation=cv2.INTER_NEAREST)
+    return image
+
+
+def pack_split(split_dir, out_dir, split, classes, bitpack=False):
+    """Décode toutes les images d'un split et les écrit dans un .npy mappable"""
+    samples = list_samples(split_dir, classes)
+    shape = (len(samples), IMAGE_SIZE, IMAGE_SIZE // 8 if bitpack else IMAGE_SIZE)
+    images = np.lib.format.open_memmap(
+        os.path.join(out_dir, f'{split}_images.npy'), mode='w+', dtype=np.uint8, shape=shape)
+    labels = np.empty(len(samples), dtype=np.int16)
+
+    for i, (path, label) in enumerate(samples):
+        mask = read_mask(path)
+        if bitpack:
+            # Le JPEG introduit de petits artefacts: on retrouve le masque binaire
+            images[i] = np.packbits(mask >= 128, axis=-1)
+        else:
+            images[i] = mask
+        labels[i] = label
+        if (i + 1) % 1000 == 0:
+            print(f"\r  {split}: {i + 1}/{len(samples)} images", end='', flush=True)
+
+    images.flush()
+    del images
+    np.save(os.path.join(out_dir, f'{split}_labels.npy'), labels)
+    print(f"\r  {split}: {len(samples)} images compactées")
+    return len(samples)
+
+
+class PackedSplit:
+    """Split compacté ouvert en np.memmap (lecture seule)"""
+
+    def __init__(self, packed_dir, split):
+        with open(os.path.join(packed_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.classes = index['classes']
+        self.bitpacked = index['bitpacked']
+        self.images = np.load(os.path.join(packed_dir, f'{split}_images.npy'), mmap_mode='r')
+        self.labels = np.load(os.path.join(packed_dir, f'{split}_labels.npy'))
+        if len(self.images) != len(self.labels):
+            raise ValueError(f"{split}: {len(self.images)} images pour {len(self.labels)} étiquettes")
+
+    @property
+    def num_classes(self):
+        return len(self.classes)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def masks(self, indices):
+        """Images uint8 (n, 64, 64) en 0..255 pour les indices demandés"""
+        raw = self.images[indices]
+        if self.bitpacked:
+            return np.unpackbits(raw, axis=-1) * np.uint8(255)
+        return np.asarray(raw)
+
+    def batch(self, indices):
+        """Lot prêt pour le modèle: (x float32 (n, 64, 64, 1) dans [0, 1], y one-hot)"""
+        # Indices triés: lecture séquentielle dans le fichier mappé
+        indices = np.sort(np.asarray(indices))
+        x = self.masks(indices).astype(np.float32)
+        x *= 1.0 / 255
+        y = np.zeros((len(indices), self.num_classes), dtype=np.float32)
+        y[np.arange(len(indices)), self.labels[indices]] = 1.0
+        return x[..., np.newaxis], y
+
+
+def load_split(packed_dir, split):
+    return PackedSplit(packed_dir, split)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compacte le dataset en tableaux mappables en mémoire")
+    parser.add_argument('--base-dir', default='DataSet', help="dossier contenant train/ et test/")
+    parser.add_argument('--output', default=os.path.join('DataSet', 'packed'), help="dossier de sortie")
+    parser.add_argument('--bitpack', action='store_true', help="1 bit par pixel (masques binaires)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("📦 COMPACTAGE DU DATASET")
+    print("="*60)
+
+    train_dir = os.path.join(args.base_dir, 'train')
+    if not os.path.isdir(train_dir):
+        print(f"✗ Erreur: {train_dir} n'existe pas")
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    # Les classes du train définissent les indices, pour les deux splits
+    classes = list_classes(train_dir)
+    print(f"✓ {len(classes)} classes détectées")
+
+    start = time.perf_counter()
+    sizes = {}
+    for split in ['train', 'test']:
+        split_dir = os.path.join(args.base_dir, split)
+        if os.path.isdir(split_dir):
+            sizes[split] = pack_split(split_dir, args.output, split, classes, args.bitpack)
+
+    index = {
+        'classes': classes,
+        'bitpacked': args.bitpack,
+        'image_size': IMAGE_SIZE,
+        'samples': sizes,
+    }
+    with open(os.path.join(args.output, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+    print(f"\n✓ Compactage terminé en {time.perf_counter() - start:.1f} s")
+    print(f"✓ Fichiers écrits dans {args.output}/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline Multi-Threads - Reconnaissance Langue des Signes
+Sépare la capture, l'inférence et l'affichage en trois étages
+
+- LatestFrameGrabber: thread de capture qui ne garde que l'image la plus récente
+- InferenceWorker: thread d'inférence qui traite la dernière ROI soumise
+- Le thread principal (Tkinter) ne fait que l'affichage
+
+Sémantique "drop stale": chaque étage ne conserve qu'un seul emplacement.
+Une image (ou une ROI) non consommée est écrasée par la suivante et
+comptabilisée comme abandonnée, ce qui borne la latence au lieu de laisser
+les images s'accumuler.
+"""
+
+import threading
+import time
+
+import cv2
+
+
+class LatestFrameGrabber:
+    """Thread de capture: lit la caméra en continu, garde la dernière image"""
+
+    def __init__(self, cap, flip=True):
+        self.cap = cap
+        self.flip = flip
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._consumed_seq = 0
+        self._running = False
+        self._thread = None
+
+        # Compteurs
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+            if self.flip:
+                frame = cv2.flip(frame, 1)
+            with self._lock:
+                if self._frame is not None and self._consumed_seq != self._seq:
+                    # L'image précédente n'a jamais été affichée
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._seq += 1
+                self.frames_captured += 1
+
+    def latest(self):
+        """Retourne (seq, image) de la dernière image, ou (seq, None) si rien de neuf"""
+        with self._lock:
+            if self._frame is None or self._consumed_seq == self._seq:
+                return self._seq, None
+            self._consumed_seq = self._seq
+            return self._seq, self._frame
+
+
+class InferenceWorker:
+    """Thread d'inférence: prétraite et prédit la dernière ROI soumise"""
+
+    def __init__(self, model, preprocess, gate=None, cache=None):
+        # model: InferenceSession (predict_one)
+        self.model = model
+        self.preprocess = preprocess
+        self.gate = gate    # ChangeGate optionnel (gating.py)
+        self.cache = cache  # PredictionCache optionnel (prediction_cache.py)
+        self._cond = threading.Condition()
+        self._pending = None  # (seq, roi, mode)
+        self._result = None   # (seq, predictions, mode)
+        self._result_seq = 0
+        self._running = False
+        self._thread = None
+
+        # Compteurs
+        self.rois_submitted = 0
+        self.rois_dropped = 0
+        self.inferences = 0     # passages réels dans le modèle
+        self.results = 0        # résultats publiés (dont réutilisés par le filtre)
+        self.errors = 0         # ROI dont le prétraitement ou la prédiction a échoué
+        self.last_inference_time = 0.0
+        self.cpu_time = 0.0     # temps CPU du thread pour les résultats publiés (s)
+        self.error = None       # dernière exception, en attente de take_error()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, seq, roi, mode):
+        """Soumet une ROI; remplace la précédente si elle n'a pas encore été traitée"""
+        with self._cond:
+            if self._pending is not None:
+                self.rois_dropped += 1
+            self._pending = (seq, roi, mode)
+            self.rois_submitted += 1
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                seq, roi, mode = self._pending
+                self._pending = None
+
+            start, cpu = time.perf_counter(), time.thread_time()
+            try:
+                x = self.preprocess(roi)
+                if self.gate is not None:
+                    predictions = self.gate.predict(x, self._cached_model)
+                else:
+                    predictions = self._cached_model(x)
+            except Exception as e:
+                # Une ROI ou une prédiction en échec ne doit pas arrêter le thread
+                with self._cond:
+                    self.errors += 1
+                    first = self.error is None or str(self.error) != str(e)
+                    self.error = e
+                if first:
+                    print(f"⚠️ Erreur d'inférence (ROI {seq}): {e}")
+                continue
+            self.last_inference_time = time.perf_counter() - start
+
+            with self._cond:
+                self._result = (seq, predictions, mode)
+                self._result_seq += 1
+                self.results += 1
+                self.cpu_time += time.thread_time() - cpu
+
+    def _cached_model(self, x):
+        if self.cache is not None:
+            return self.cache.predict(x, self._run_model)
+        return self._run_model(x)
+
+    def _run_model(self, x):
+        self.inferences += 1
+        if self.gate is not None:
+            return self.gate.timed_model(self.model.predict_one, x)
+        return self.model.predict_one(x)
+
+    def totals(self):
+        """(passages dans le modèle, résultats publiés, temps CPU de ces résultats), cohérents entre eux"""
+        with self._cond:
+            return self.inferences, self.results, self.cpu_time
+
+    def take_error(self):
+        """Dernière exception du thread d'inférence (None sinon), effacée une fois lue"""
+        with self._cond:
+            error, self.error = self.error, None
+            return error
+
+    def latest_result(self, after=0):
+        """Retourne (num_resultat, (seq, predictions, mode)) si un résultat plus récent que 'after' existe"""
+        with self._cond:
+            if self._result is None or self._result_seq <= after:
+                return after, None
+            return self._result_seq, self._result
+
+
+def pipeline_stats(grabber, worker, frames_rendered):
+    """Regroupe les compteurs des différents étages"""
+    return {
+        'frames_captured': grabber.frames_captured,
+        'frames_dropped': grabber.frames_dropped,
+        'frames_rendered': frames_rendered,
+        'rois_submitted': worker.rois_submitted,
+        'rois_dropped': worker.rois_dropped,
+        'inferences': worker.inferences,
+        'results': worker.results,
+        'errors': worker.errors,
+        'last_inference_ms': worker.last_inference_time * 1000,
+    }
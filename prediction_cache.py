@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Cache LRU des Prédictions - Reconnaissance Langue des Signes
+Mémorise les probabilités par masque binaire 64x64 compacté
+
+Après le seuillage, chaque ROI est un masque de 4096 bits (512 octets une
+fois compacté): c'est exactement l'entrée du modèle, donc deux masques
+identiques donnent les mêmes probabilités. La clé est un hachage BLAKE2b
+(16 octets) du masque compacté.
+
+- éviction LRU bornée en nombre d'entrées et en mémoire
+- compteurs hits / misses / évictions
+- persistance optionnelle (.npz) liée à l'empreinte du modèle réellement
+  exécuté (moteur, nombre de classes, contenu de l'artefact, des poids int8
+  ou du modèle TFLite), pour qu'un cache chaud survive aux redémarrages sans
+  resservir les probabilités d'un autre modèle
+
+Activation: SIGN_CACHE=1, SIGN_CACHE_SIZE=20000, SIGN_CACHE_FILE=cache.npz
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from preprocessing import pack_mask
+
+
+KEY_SIZE = 16
+ENTRY_OVERHEAD = 200  # octets estimés par entrée (OrderedDict, objets Python)
+
+
+def mask_key(mask):
+    """Clé de cache d'un masque binaire"""
+    return hashlib.blake2b(pack_mask(mask).tobytes(), digest_size=KEY_SIZE).digest()
+
+
+def file_fingerprint(path):
+    """Empreinte du fichier de poids (invalide un cache persistant après réentraînement)"""
+    digest = hashlib.blake2b(digest_size=KEY_SIZE)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(session):
+    """Empreinte du modèle exécuté par une InferenceSession (moteur, classes, fichiers chargés)"""
+    digest = hashlib.blake2b(digest_size=KEY_SIZE)
+    digest.update(f"{session.engine}:{session.num_classes}".encode('utf-8'))
+    for path in session.source_paths:
+        digest.update(file_fingerprint(path).encode('ascii'))
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Cache LRU masque -> probabilités, borné en entrées et en octets"""
+
+    def __init__(self, max_entries=20000, max_bytes=32 * 1024 * 1024, model_id=None, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.model_id = model_id  # None tant que le modèle n'est pas connu (ni chargé ni enregistré)
+        self.path = path  # fichier de persistance (optionnel)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(value):
+        return KEY_SIZE + value.nbytes + ENTRY_OVERHEAD
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        value = np.array(value, dtype=np.float32)
+        value.setflags(write=False)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= self._entry_size(old)
+            self._entries[key] = value
+            self.bytes += self._entry_size(value)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= self._entry_size(evicted)
+                self.evictions += 1
+
+    def bind(self, model_id):
+        """Associe le cache au modèle exécuté; les entrées d'un autre modèle sont effacées"""
+        with self._lock:
+            if model_id != self.model_id:
+                self._entries.clear()
+                self.bytes = 0
+            self.model_id = model_id
+        if self.path and os.path.exists(self.path):
+            try:
+                loaded = self.load(self.path)
+                print(f"✓ Cache de prédictions chargé: {loaded} entrées ({self.path})")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Cache de prédictions ignoré ({self.path}): {e}")
+
+    def predict(self, mask, predict_fn):
+        """Probabilités en cache pour ce masque, sinon predict_fn(mask) mis en cache"""
+        key = mask_key(mask)
+        value = self.get(key)
+        if value is None:
+            value = predict_fn(mask)
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, path):
+        """Enregistre les entrées (de la plus ancienne à la plus récente)"""
+        with self._lock:
+            keys = list(self._entries.keys())
+            values = list(self._entries.values())
+        keys = np.frombuffer(b''.join(keys), dtype=np.uint8).reshape(-1, KEY_SIZE)
+        values = np.stack(values) if values else np.empty((0, 0), dtype=np.float32)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, keys=keys, values=values, model_id=np.array(self.model_id))
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Recharge un cache enregistré; ignoré si le modèle a changé. Retourne le nombre d'entrées"""
+        with np.load(path) as data:
+            if self.model_id is None or str(data['model_id']) != self.model_id:
+                return 0
+            keys, values = data['keys'], data['values']
+        for key, value in zip(keys, values):
+            self.put(key.tobytes(), value)
+        return len(keys)
+
+
+def make_cache(enabled=None, path=None, max_entries=None, session=None):
+    """PredictionCache d'après les arguments ou SIGN_CACHE / SIGN_CACHE_FILE / SIGN_CACHE_SIZE, sinon None
+
+    session: InferenceSession dont l'empreinte lie le cache persistant. Sans
+    session (modèle chargé plus tard), appeler cache.bind(model_fingerprint(session)).
+    """
+    if path is None:
+        path = os.environ.get('SIGN_CACHE_FILE') or None
+    if enabled is None:
+        enabled = os.environ.get('SIGN_CACHE', '0') == '1' or path is not None
+    if not enabled:
+        return None
+    if max_entries is None:
+        max_entries = int(os.environ.get('SIGN_CACHE_SIZE', 20000))
+
+    cache = PredictionCache(max_entries=max_entries, path=path)
+    if session is not None:
+        cache.bind(model_fingerprint(session))
+    return cache
+
+
+def close_cache(cache):
+    """Affiche les statistiques et enregistre le cache si un fichier est configuré"""
+    if cache is None:
+        return
+    print(f"Cache de prédictions: {cache.stats()}")
+    if cache.path and cache.model_id is not None:
+        cache.save(cache.path)
+        print(f"✓ Cache enregistré: {cache.path}")
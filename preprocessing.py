@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Prétraitement des Images - Reconnaissance Langue des Signes
+Extraction de la ROI et binarisation, identiques à la démo et à l'interface
+
+Chaîne: miroir -> découpe [y1:y2, x1:x2] -> redimension 64x64
+        -> niveaux de gris -> seuil binaire (120) -> float32 / 255
+
+- RoiPreprocessor: une image à la fois, dans des tampons préalloués
+- preprocess_batch: une pile d'images ou de ROI -> tenseur (N, 64, 64, 1)
+"""
+
+import cv2
+import numpy as np
+
+
+IMAGE_SIZE = 64
+THRESHOLD = 120
+
+
+def roi_bounds(frame):
+    """Coordonnées (x1, y1, x2, y2) de la région d'intérêt d'une image caméra"""
+    h, w = frame.shape[:2]
+    return int(0.5 * w), 10, w - 10, int(0.5 * w)
+
+
+def extract_roi(frame, flip=True):
+    """Applique l'effet miroir puis découpe la ROI (vue sur l'image retournée)"""
+    if flip:
+        frame = cv2.flip(frame, 1)
+    x1, y1, x2, y2 = roi_bounds(frame)
+    return frame[y1:y2, x1:x2]
+
+
+def binarize_roi(roi):
+    """ROI BGR (ou déjà en niveaux de gris) -> masque binaire uint8 64x64 (0/255)"""
+    roi = cv2.resize(roi, (IMAGE_SIZE, IMAGE_SIZE))
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    _, mask = cv2.threshold(roi, THRESHOLD, 255, cv2.THRESH_BINARY)
+    return mask
+
+
+def preprocess_roi(roi):
+    """ROI BGR -> image binaire 64x64 normalisée (float32, 0.0 / 1.0)"""
+    return binarize_roi(roi).astype('float32') / 255.0
+
+
+class RoiPreprocessor:
+    """Prétraitement image par image dans des tampons préalloués
+
+    Chaque étape écrit dans un tampon possédé par l'instance (arguments dst=
+    d'OpenCV, opérations NumPy out=): aucune allocation par image. Le masque
+    et le tenseur retournés sont réécrits à l'appel suivant; il faut une
+    instance par thread et copier ce qui doit être conservé.
+    """
+
+    def __init__(self, flip=True):
+        self.flip = flip
+        self.resized = np.empty((IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.uint8)
+        self.gray = np.empty((IMAGE_SIZE, IMAGE_SIZE), dtype=np.uint8)
+        self.mask = np.empty((IMAGE_SIZE, IMAGE_SIZE), dtype=np.uint8)
+        # Entrée du modèle (lot de 1); self.image en est une vue 64x64
+        self.tensor = np.empty((1, IMAGE_SIZE, IMAGE_SIZE, 1), dtype=np.float32)
+        self.image = self.tensor[0, :, :, 0]
+
+    def extract(self, frame):
+        """Miroir en place de l'image caméra puis ROI: (roi, (x1, y1, x2, y2))
+
+        La ROI est une vue sur frame: la binariser avant de dessiner dessus.
+        """
+        if self.flip:
+            cv2.flip(frame, 1, dst=frame)
+        x1, y1, x2, y2 = roi_bounds(frame)
+        return frame[y1:y2, x1:x2], (x1, y1, x2, y2)
+
+    def binarize(self, roi):
+        """ROI BGR (ou niveaux de gris) -> self.mask (uint8 64x64, 0/255)"""
+        if roi.ndim == 3:
+            cv2.resize(roi, (IMAGE_SIZE, IMAGE_SIZE), dst=self.resized)
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        else:
+            cv2.resize(roi, (IMAGE_SIZE, IMAGE_SIZE), dst=self.gray)
+        cv2.threshold(self.gray, THRESHOLD, 255, cv2.THRESH_BINARY, dst=self.mask)
+        return self.mask
+
+    def normalize(self):
+        """self.mask -> self.image (float32, 0.0 / 1.0)"""
+        # Copie avec conversion puis division en place: pas de tampon de conversion
+        np.copyto(self.image, self.mask)
+        np.divide(self.image, np.float32(255.0), out=self.image)
+        return self.image
+
+    def __call__(self, roi):
+        """ROI BGR -> image binaire 64x64 normalisée (vue sur self.tensor)"""
+        self.binarize(roi)
+        return self.normalize()
+
+
+def frame_rois(frames, flip=True):
+    """Pile d'images caméra (N, H, W, 3) -> vue (N, h, w, 3) sur leurs ROI
+
+    Avec flip, la ROI de l'image retournée est découpée à la position miroir
+    et reste non retournée: preprocess_batch la retourne après réduction à
+    64x64 (la redimension bilinéaire commute avec le miroir).
+    """
+    frames = np.asarray(frames)
+    x1, y1, x2, y2 = roi_bounds(frames[0])
+    if flip:
+        w = frames.shape[2]
+        x1, x2 = w - x2, w - x1
+    return frames[:, y1:y2, x1:x2]
+
+
+def preprocess_batch(images, out=None, frames=False, flip=True):
+    """Pile (ou liste) d'images -> tenseur (N, 64, 64, 1) float32 prêt pour le modèle
+
+    images: ROI BGR ou en niveaux de gris, de tailles quelconques; avec
+    frames=True, images caméra entières dont la ROI est extraite (et
+    retournée si flip). Le résultat est identique à preprocess_roi appliqué
+    à chaque image. out: tenseur préalloué à réutiliser.
+    """
+    if frames:
+        images = frame_rois(images, flip)
+    mirrored = frames and flip
+    n = len(images)
+    if out is None:
+        out = np.empty((n, IMAGE_SIZE, IMAGE_SIZE, 1), dtype=np.float32)
+    elif out.shape != (n, IMAGE_SIZE, IMAGE_SIZE, 1) or out.dtype != np.float32:
+        raise ValueError(f"tenseur de sortie {out.shape} {out.dtype}, attendu ({n}, {IMAGE_SIZE}, {IMAGE_SIZE}, 1) float32")
+    if n == 0:
+        return out
+
+    # Redimension image par image (aucune copie des ROI), puis chaque étape
+    # suivante en un seul appel sur la pile vue comme une image (N*64, 64)
+    color = images[0].ndim == 3
+    resized = np.empty((n, IMAGE_SIZE, IMAGE_SIZE, 3) if color else (n, IMAGE_SIZE, IMAGE_SIZE), dtype=np.uint8)
+    for i, image in enumerate(images):
+        cv2.resize(image, (IMAGE_SIZE, IMAGE_SIZE), dst=resized[i])
+    tall = resized.reshape((n * IMAGE_SIZE, IMAGE_SIZE) + resized.shape[3:])
+    if mirrored:
+        cv2.flip(tall, 1, dst=tall)
+    gray = cv2.cvtColor(tall, cv2.COLOR_BGR2GRAY) if color else tall
+    # Seuil binaire et normalisation en un passage: gray > 120 -> 1.0
+    np.greater(gray.reshape(n, IMAGE_SIZE, IMAGE_SIZE), THRESHOLD, out=out[..., 0])
+    return out
+
+
+def pack_mask(mask):
+    """Masque binaire 64x64 (0/1 ou 0/255, tout dtype) -> 512 octets (1 bit par pixel)"""
+    return np.packbits(np.asarray(mask).reshape(-1) > 0)
+
+
+def unpack_mask(packed):
+    """512 octets -> image binaire 64x64 float32 (0.0 / 1.0)"""
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=IMAGE_SIZE * IMAGE_SIZE)
+    return bits.reshape(IMAGE_SIZE, IMAGE_SIZE).astype(np.float32)
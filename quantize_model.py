@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Quantification INT8 du Modèle - Reconnaissance Langue des Signes
+Produit une version int8 du modèle entraîné et compare float / int8
+
+Deux variantes (quantification post-entraînement):
+- weights : poids int8 (une échelle par canal de sortie) -> model-bw-int8.npz
+            (SIGN_ENGINE=int8). Format de compression uniquement: fichier
+            4x plus petit, mais les poids sont déquantifiés en float32 au
+            chargement et le calcul est celui du moteur NumPy float (NumPy
+            n'a pas de produit matriciel entier rapide: int8 x int8 -> int32
+            y est des dizaines de fois plus lent que le float32 BLAS).
+            Latence identique au float32, seule la précision peut baisser.
+- full    : poids et activations int8, calibrés sur un échantillon de
+            DataSet/train -> model-bw-int8.tflite (SIGN_ENGINE=tflite),
+            calcul réellement entier (noyaux int8 de TFLite)
+
+Le rapport affiche côte à côte la taille du modèle, la latence CPU par
+image et la précision top-1 sur DataSet/test. Les étiquettes de test suivent
+l'indice des classes de l'entraînement (--classes: dossier DataSet/train par
+défaut, ou fichier de noms / class_indices), pas le tri des dossiers de test:
+une classe absente ou en trop dans DataSet/test ne décale pas les autres.
+
+Utilisation:
+    python quantize_model.py                       # variante 'weights'
+    python quantize_model.py --mode full           # variante TFLite int8 (TensorFlow requis)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from inference_session import INT8_PATH, TFLITE_PATH, InferenceSession, build_keras_model
+from numpy_inference import load_h5_weights, save_int8
+from model_artifact import output_units, read_class_names
+from pack_dataset import list_classes, list_samples, read_mask
+
+
+def load_images(split_dir, classes, limit=None, seed=0):
+    """Images (N, 64, 64, 1) float32 et indices de classe d'un dossier DataSet/<split>
+
+    classes: noms dans l'ordre des sorties du modèle; un dossier absent de
+    cette liste est ignoré, une classe sans dossier n'a simplement pas d'image.
+    """
+    unknown = sorted(set(list_classes(split_dir)) - set(classes))
+    if unknown:
+        print(f"⚠️ {split_dir}: dossiers hors des classes du modèle ignorés: {', '.join(unknown)}")
+    samples = list_samples(split_dir, classes)
+    if limit is not None and len(samples) > limit:
+        rng = np.random.default_rng(seed)
+        samples = [samples[i] for i in sorted(rng.choice(len(samples), limit, replace=False))]
+    x = np.empty((len(samples), 64, 64, 1), dtype=np.float32)
+    y = np.empty(len(samples), dtype=np.int32)
+    for i, (path, label) in enumerate(samples):
+        x[i, :, :, 0] = read_mask(path) / 255.0
+        y[i] = label
+    return x, y
+
+
+def quantize_weights_only(json_path, h5_path, output):
+    with open(json_path, 'r') as json_file:
+        architecture = json.load(json_file)
+    save_int8(output, architecture, load_h5_weights(h5_path))
+
+
+def quantize_full(json_path, h5_path, output, calibration):
+    import tensorflow as tf
+
+    with open(json_path, 'r') as json_file:
+        layers = json.load(json_file)['config']['layers']
+    num_classes = [l for l in layers if l['class_name'] == 'Dense'][-1]['config']['units']
+    model = build_keras_model(num_classes)
+    model.load_weights(h5_path)
+
+    def representative_dataset():
+        for i in range(len(calibration)):
+            yield [calibration[i:i + 1]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    # Calcul entièrement int8; l'entrée et la sortie restent en float32
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output, 'wb') as f:
+        f.write(converter.convert())
+
+
+def evaluate(session, x, y, runs):
+    """Latence par image (ms, lot de 1) et précision top-1"""
+    timings = np.empty(runs)
+    for i in range(runs):
+        sample = x[i % len(x)] if len(x) else np.zeros((64, 64, 1), np.float32)
+        start = time.perf_counter()
+        session.predict_one(sample)
+        timings[i] = (time.perf_counter() - start) * 1000
+    accuracy = None
+    if len(x):
+        predictions = session.predict_batch(x).argmax(axis=1)
+        accuracy = float((predictions == y).mean())
+    return np.median(timings), np.percentile(timings, 95), accuracy
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Quantification int8 post-entraînement")
+    parser.add_argument('--mode', default='weights', choices=['weights', 'full'], help="variante int8")
+    parser.add_argument('--json', default='model-bw.json', help="architecture du modèle")
+    parser.add_argument('--weights', default='model-bw.h5', help="poids float32 du modèle")
+    parser.add_argument('--output', help="fichier produit (par défaut selon le mode)")
+    parser.add_argument('--train-dir', default='DataSet/train', help="images de calibration")
+    parser.add_argument('--test-dir', default='DataSet/test', help="images d'évaluation")
+    parser.add_argument('--classes', help="noms des classes dans l'ordre des sorties: dossier, JSON ou texte "
+                                          "(par défaut les dossiers de --train-dir)")
+    parser.add_argument('--calibration-samples', type=int, default=200, help="images de calibration")
+    parser.add_argument('--runs', type=int, default=200, help="images pour la mesure de latence")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or (INT8_PATH if args.mode == 'weights' else TFLITE_PATH)
+
+    print("="*60)
+    print("🗜️  QUANTIFICATION INT8 DU MODÈLE")
+    print("="*60)
+
+    # Indice des classes de l'entraînement (ordre des sorties du modèle)
+    classes_source = args.classes or args.train_dir
+    if args.classes and not os.path.exists(args.classes):
+        print(f"✗ Erreur: {args.classes} n'existe pas")
+        return 1
+    classes = read_class_names(classes_source) if os.path.exists(classes_source) else None
+    with open(args.json, 'r') as json_file:
+        units = output_units(json.load(json_file))
+    if classes is not None and len(classes) != units:
+        print(f"✗ Erreur: {len(classes)} classes dans {classes_source} pour {units} sorties du modèle")
+        return 1
+
+    print(f"\n[1/3] Quantification ({args.mode})...")
+    if args.mode == 'weights':
+        quantize_weights_only(args.json, args.weights, output)
+    else:
+        if not os.path.isdir(args.train_dir):
+            print(f"✗ Erreur: {args.train_dir} n'existe pas (calibration impossible)")
+            return 1
+        calibration, _ = load_images(args.train_dir, classes, args.calibration_samples)
+        print(f"✓ {len(calibration)} images de calibration")
+        quantize_full(args.json, args.weights, output, calibration)
+    print(f"✓ Modèle quantifié: {output}")
+
+    print("\n[2/3] Chargement des images de test...")
+    if os.path.isdir(args.test_dir) and classes is not None:
+        x_test, y_test = load_images(args.test_dir, classes)
+        print(f"✓ {len(x_test)} images de test")
+    else:
+        if classes is None:
+            print(f"⚠️ {classes_source} introuvable (indice des classes): précision non mesurée")
+        else:
+            print(f"⚠️ {args.test_dir} introuvable: précision non mesurée")
+        x_test, y_test = np.empty((0, 64, 64, 1), np.float32), np.empty(0, np.int32)
+
+    print("\n[3/3] Comparaison float32 / int8...")
+    engine = 'int8' if args.mode == 'weights' else 'tflite'
+    variants = [
+        ('float32 (numpy)', 'numpy', os.path.getsize(args.weights)),
+        ('int8 stockage' if engine == 'int8' else 'int8 (tflite)', engine, os.path.getsize(output)),
+    ]
+    rows = []
+    for name, variant_engine, size in variants:
+        session = InferenceSession(engine=variant_engine, json_path=args.json, h5_path=args.weights,
+                                   int8_path=output, tflite_path=output)
+        p50, p95, accuracy = evaluate(session, x_test, y_test, args.runs)
+        rows.append((name, size, p50, p95, accuracy))
+
+    print(f"\n  {'modèle':<18}{'taille':>10}{'p50':>10}{'p95':>10}{'top-1':>10}")
+    for name, size, p50, p95, accuracy in rows:
+        acc = '-' if accuracy is None else f"{accuracy * 100:.2f}%"
+        print(f"  {name:<18}{size / 1024:>8.0f}Ko{p50:>8.3f}ms{p95:>8.3f}ms{acc:>10}")
+    if engine == 'int8':
+        print("\n  ℹ️ int8 stockage: poids déquantifiés en float32 au chargement, calcul float")
+        print("     (gain de taille du fichier, pas de latence); calcul entier: --mode full")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
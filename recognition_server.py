@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+Serveur de Reconnaissance - Reconnaissance Langue des Signes
+API HTTP et WebSocket (asyncio, bibliothèque standard) sans interface graphique
+
+Les clients légers envoient une image caméra, une ROI ou un masque 64x64
+déjà binarisé; le serveur renvoie le top-k pour un mode (chiffres, lettres,
+actions, comme update_predictions de l'interface, ou 'tous').
+
+Micro-lots: les requêtes concurrentes sont regroupées par MicroBatcher en un
+seul predict_batch(), au plus --max-batch images et au plus --max-wait ms
+d'attente après la première requête du lot. L'inférence tourne dans un
+thread dédié, la boucle asyncio ne fait que les entrées/sorties.
+
+Entrées (paramètre 'input'):
+- frame  : image caméra JPEG/PNG -> miroir, ROI, binarisation (comme la démo)
+- roi    : ROI déjà découpée JPEG/PNG -> binarisation
+- mask   : masque 64x64 JPEG/PNG (0/255)
+- packed : 512 octets bruts (np.packbits du masque 64x64)
+
+HTTP:
+    POST /predict?mode=lettres&top_k=3&input=packed   (corps = image ou octets)
+    GET  /health                                       (état et statistiques)
+WebSocket (GET /ws):
+    message texte  {"mode": "chiffres", "top_k": 3, "input": "packed"}  -> réglages
+    message binaire image ou octets                                      -> réponse JSON
+
+Réponse: {"mode": ..., "predictions": [{"sign": "A", "index": 0, "probability": 0.97}, ...],
+          "batch_size": 4, "latency_ms": 3.1}
+
+Utilisation:
+    python recognition_server.py --port 8765 --engine numpy --max-wait 5
+    python server_load_generator.py --port 8765 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+import numpy as np
+
+from categories import mode_labels
+from preprocessing import IMAGE_SIZE, extract_roi, preprocess_roi, unpack_mask
+
+
+MODES = ('tous', 'chiffres', 'lettres', 'actions')
+INPUTS = ('frame', 'roi', 'mask', 'packed')
+MAX_BODY_BYTES = 8 * 1024 * 1024
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+               500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """Erreur de requête client (renvoyée en HTTP 400 / message d'erreur WebSocket)"""
+
+
+def decode_input(payload, kind, flip=True):
+    """Octets reçus -> image binaire 64x64 float32 (0.0 / 1.0)"""
+    if kind == 'packed':
+        if len(payload) != IMAGE_SIZE * IMAGE_SIZE // 8:
+            raise RequestError(f"masque compacté de {len(payload)} octets, attendu {IMAGE_SIZE * IMAGE_SIZE // 8}")
+        return unpack_mask(payload)
+    if kind not in INPUTS:
+        raise RequestError(f"entrée inconnue: {kind} (attendu: {', '.join(INPUTS)})")
+    flags = cv2.IMREAD_GRAYSCALE if kind == 'mask' else cv2.IMREAD_COLOR
+    image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), flags)
+    if image is None:
+        raise RequestError("image JPEG/PNG illisible")
+    if kind == 'frame':
+        image = extract_roi(image, flip=flip)
+    return preprocess_roi(image)
+
+
+class MicroBatcher:
+    """Regroupe les requêtes concurrentes en un seul predict_batch()"""
+
+    def __init__(self, session, max_batch=32, max_wait=0.005):
+        self.session = session
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = None
+        self._task = None
+        # Un seul thread d'inférence: les lots s'exécutent l'un après l'autre
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+
+        # Compteurs
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.inference_time = 0.0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+    async def predict(self, x):
+        """(probabilités (nb_classes,), taille du lot) pour une image 64x64, calculées dans un lot"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((x, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Les requêtes déjà arrivées rejoignent le lot sans attendre
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            x = np.stack([item[0] for item in batch])
+            start = time.perf_counter()
+            try:
+                probabilities = await loop.run_in_executor(self._executor, self.session.predict_batch, x)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.inference_time += time.perf_counter() - start
+            self.requests += len(batch)
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for (_, future), row in zip(batch, probabilities):
+                if not future.done():
+                    future.set_result((row, len(batch)))
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'inference_s': round(self.inference_time, 3),
+        }
+
+
+class RecognitionServer:
+    """Serveur HTTP/WebSocket minimal au-dessus d'asyncio.start_server"""
+
+    def __init__(self, session, batcher, flip=True):
+        self.session = session
+        self.batcher = batcher
+        self.flip = flip
+        self.started = time.time()
+        self.connections = 0
+        self.errors = 0
+        self._labels = {}
+
+    def labels(self, mode):
+        """(indices, noms) d'un mode, avec les noms de classes de l'artefact pour 'tous'"""
+        if not isinstance(mode, str) or mode not in MODES:
+            raise RequestError(f"mode inconnu: {mode} (attendu: {', '.join(MODES)})")
+        if mode not in self._labels:
+            indices, names = mode_labels(mode, self.session.num_classes)
+            if mode == 'tous' and self.session.class_names is not None:
+                names = [self.session.class_names[i] for i in indices]
+            self._labels[mode] = (np.asarray(indices), names)
+        return self._labels[mode]
+
+    async def recognize(self, payload, mode='tous', top_k=3, kind='packed'):
+        """Décode, prédit (en micro-lot) et renvoie la réponse JSON (dict)"""
+        start = time.perf_counter()
+        indices, names = self.labels(mode)
+        if kind == 'packed':
+            x = decode_input(payload, kind, self.flip)
+        else:
+            # Décodage JPEG/PNG hors de la boucle asyncio
+            x = await asyncio.get_running_loop().run_in_executor(None, decode_input, payload, kind, self.flip)
+        probabilities, batch_size = await self.batcher.predict(x)
+
+        scores = probabilities[indices]
+        k = max(1, min(int(top_k), len(indices)))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return {
+            'mode': mode,
+            'predictions': [{'sign': names[i], 'index': int(indices[i]), 'probability': float(scores[i])}
+                            for i in best],
+            'batch_size': batch_size,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'engine': self.session.engine,
+            'num_classes': self.session.num_classes,
+            'uptime_s': round(time.time() - self.started, 1),
+            'connections': self.connections,
+            'errors': self.errors,
+            'batching': self.batcher.stats(),
+        }
+
+    # ----- HTTP -----
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self.send_json(writer, 400, {'error': 'requête HTTP invalide'}, keep_alive=False)
+                    break
+                try:
+                    headers = await self.read_headers(reader)
+                except (asyncio.LimitOverrunError, ValueError):
+                    # Ligne d'en-tête plus longue que la limite du StreamReader
+                    await self.send_json(writer, 431, {'error': 'en-tête trop long'}, keep_alive=False)
+                    break
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+                if url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self.handle_websocket(reader, writer, headers, query)
+                    break
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.send_json(writer, 400, {'error': 'Content-Length invalide'}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self.send_json(writer, 413, {'error': 'corps trop volumineux'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                status, response = await self.route(method, url.path, query, body)
+                await self.send_json(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def read_headers(reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    async def route(self, method, path, query, body):
+        if path == '/health':
+            return 200, self.health()
+        if path != '/predict':
+            return 404, {'error': f'chemin inconnu: {path}'}
+        if method != 'POST':
+            return 405, {'error': 'utiliser POST /predict'}
+        try:
+            return 200, await self.recognize(body, query.get('mode', 'tous'),
+                                             query.get('top_k', 3), query.get('input', 'packed'))
+        except (RequestError, ValueError) as e:
+            self.errors += 1
+            return 400, {'error': str(e)}
+        except Exception as e:
+            self.errors += 1
+            return 500, {'error': str(e)}
+
+    @staticmethod
+    async def send_json(writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    # ----- WebSocket (RFC 6455) -----
+
+    async def handle_websocket(self, reader, writer, headers, query):
+        key = headers.get('sec-websocket-key', '').encode('latin-1')
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest()).decode('ascii')
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+        settings = {'mode': query.get('mode', 'tous'), 'top_k': query.get('top_k', 3),
+                    'input': query.get('input', 'packed')}
+        while True:
+            opcode, payload = await read_ws_message(reader)
+            if opcode == 0x8:
+                writer.write(ws_frame(0x8, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == 0x9:
+                writer.write(ws_frame(0xA, payload))
+                await writer.drain()
+                continue
+            if opcode not in (0x1, 0x2):
+                continue
+            # Une erreur sur un message est renvoyée au client sans fermer la connexion
+            try:
+                if opcode == 0x1:
+                    response = self.update_settings(settings, payload)
+                else:
+                    response = await self.recognize(payload, settings['mode'], settings['top_k'],
+                                                    settings['input'])
+            except (RequestError, ValueError) as e:
+                self.errors += 1
+                response = {'error': str(e)}
+            except Exception as e:
+                self.errors += 1
+                response = {'error': f'erreur interne: {e}'}
+            writer.write(ws_frame(0x1, json.dumps(response, ensure_ascii=False).encode('utf-8')))
+            await writer.drain()
+
+    @staticmethod
+    def update_settings(settings, payload):
+        """Message texte: objet JSON de réglages fusionné dans ceux de la session"""
+        try:
+            update = json.loads(payload.decode('utf-8'))
+        except ValueError as e:
+            raise RequestError(f'JSON invalide: {e}')
+        if not isinstance(update, dict):
+            raise RequestError('réglages attendus: objet JSON {"mode": ..., "top_k": ..., "input": ...}')
+        settings.update(update)
+        return {'settings': settings}
+
+
+def ws_frame(opcode, payload, mask=False):
+    """Trame WebSocket finale (masquée côté client, non masquée côté serveur)"""
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack('>H', length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack('>Q', length)
+    if mask:
+        key = os.urandom(4)
+        return header + key + apply_ws_mask(payload, key)
+    return header + payload
+
+
+def apply_ws_mask(payload, key):
+    """XOR du contenu avec la clé de masquage (4 octets répétés)"""
+    data = np.frombuffer(payload, dtype=np.uint8)
+    tiled = np.resize(np.frombuffer(key, dtype=np.uint8), len(data))
+    return (data ^ tiled).tobytes()
+
+
+async def read_ws_message(reader):
+    """Lit un message complet (trames de continuation réassemblées): (opcode, octets)"""
+    message_opcode = None
+    chunks = []
+    while True:
+        first, second = await reader.readexactly(2)
+        fin, opcode = first & 0x80, first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack('>H', await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack('>Q', await reader.readexactly(8))
+        if length > MAX_BODY_BYTES:
+            raise ConnectionError("message WebSocket trop volumineux")
+        key = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if key is not None:
+            payload = apply_ws_mask(payload, key)
+        if opcode >= 0x8:
+            # Trame de contrôle: jamais fragmentée, peut s'intercaler
+            return opcode, payload
+        if opcode != 0x0:
+            message_opcode = opcode
+        chunks.append(payload)
+        if fin:
+            return message_opcode, b''.join(chunks)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur HTTP/WebSocket de reconnaissance des signes")
+    parser.add_argument('--host', default='127.0.0.1', help="adresse d'écoute")
+    parser.add_argument('--port', type=int, default=8765, help="port d'écoute")
+    parser.add_argument('--engine', default='numpy', choices=['numpy', 'keras', 'int8', 'tflite'],
+                        help="moteur d'inférence")
+    parser.add_argument('--model', help="artefact du modèle (par défaut SIGN_MODEL ou model-bw.signmodel s'il existe)")
+    parser.add_argument('--max-batch', type=int, default=32, help="images par lot au maximum")
+    parser.add_argument('--max-wait', type=float, default=5.0, help="attente maximale pour compléter un lot (ms)")
+    parser.add_argument('--no-flip', action='store_true', help="pas d'effet miroir pour input=frame")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    from inference_session import InferenceSession, artifact_for
+
+    session = InferenceSession(engine=args.engine, artifact_path=artifact_for(args.engine, args.model))
+    print(f"✓ Modèle chargé (moteur {args.engine}, {session.num_classes} sorties)")
+
+    batcher = MicroBatcher(session, args.max_batch, args.max_wait / 1000).start()
+    app = RecognitionServer(session, batcher, flip=not args.no_flip)
+    server = await asyncio.start_server(app.handle_connection, args.host, args.port)
+    print(f"✓ Serveur à l'écoute sur http://{args.host}:{args.port} "
+          f"(lots de {args.max_batch} max, attente {args.max_wait} ms)")
+    print("  POST /predict  |  GET /health  |  WebSocket /ws   (Ctrl+C pour arrêter)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+        print(f"\nStatistiques: {app.health()['batching']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("🌐 SERVEUR DE RECONNAISSANCE")
+    print("="*60)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("✓ Serveur arrêté")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Générateur de Charge - Reconnaissance Langue des Signes
+Envoie des requêtes concurrentes à recognition_server.py et mesure le débit
+
+Chaque client garde sa connexion ouverte (HTTP keep-alive ou WebSocket) et
+envoie une requête dès la réponse précédente reçue. Les masques viennent d'un
+dossier d'images (--images) ou sont synthétiques, envoyés compactés (512
+octets) ou en PNG. Le rapport donne le débit, les latences p50/p95/p99 vues
+par les clients et la taille moyenne des lots côté serveur.
+
+Utilisation:
+    python server_load_generator.py --spawn                     # lance aussi le serveur
+    python server_load_generator.py --port 8765 --concurrency 64 --protocol ws
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from preprocessing import IMAGE_SIZE, binarize_roi, pack_mask
+from recognition_server import read_ws_message, ws_frame
+
+
+def synthetic_masks(count, seed=0):
+    """Masques 64x64 (0/255): ellipses de tailles et d'orientations variées"""
+    rng = np.random.default_rng(seed)
+    masks = []
+    for _ in range(count):
+        mask = np.zeros((IMAGE_SIZE, IMAGE_SIZE), dtype=np.uint8)
+        center = tuple(int(v) for v in rng.integers(16, 48, size=2))
+        axes = tuple(int(v) for v in rng.integers(6, 24, size=2))
+        cv2.ellipse(mask, center, axes, int(rng.integers(0, 180)), 0, 360, 255, -1)
+        masks.append(mask)
+    return masks
+
+
+def image_masks(directory, limit):
+    """Masques binarisés des images d'un dossier (parcours récursif)"""
+    from batch_recognition import list_images
+
+    masks = []
+    for path in list_images(directory)[:limit]:
+        image = cv2.imread(path)
+        if image is not None:
+            masks.append(binarize_roi(image))
+    return masks
+
+
+def encode_payloads(masks, kind):
+    if kind == 'packed':
+        return [pack_mask(mask).tobytes() for mask in masks]
+    return [cv2.imencode('.png', mask)[1].tobytes() for mask in masks]
+
+
+async def read_http_response(reader):
+    """Lit une réponse HTTP (Content-Length): (statut, corps)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connexion fermée par le serveur")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def http_get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+        await writer.drain()
+        _, body = await read_http_response(reader)
+        return json.loads(body)
+    finally:
+        writer.close()
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.batch_sizes = []
+
+
+async def http_client(host, port, payloads, args, deadline, stats, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    path = f"/predict?mode={args.mode}&top_k={args.top_k}&input={args.input}"
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            body = payloads[i % len(payloads)]
+            i += 1
+            start = time.perf_counter()
+            writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                          f"Content-Type: application/octet-stream\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+            await writer.drain()
+            status, response = await read_http_response(reader)
+            stats.latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                stats.errors += 1
+    finally:
+        writer.close()
+
+
+async def ws_client(host, port, payloads, args, deadline, stats, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode('ascii')
+    writer.write((f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode('latin-1'))
+    await writer.drain()
+    status_line = await reader.readline()
+    if b' 101 ' not in status_line:
+        raise ConnectionError(f"handshake WebSocket refusé: {status_line!r}")
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+
+    settings = {'mode': args.mode, 'top_k': args.top_k, 'input': args.input}
+    writer.write(ws_frame(0x1, json.dumps(settings).encode('utf-8'), mask=True))
+    await writer.drain()
+    await read_ws_message(reader)
+
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            payload = payloads[i % len(payloads)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(ws_frame(0x2, payload, mask=True))
+            await writer.drain()
+            _, message = await read_ws_message(reader)
+            stats.latencies.append((time.perf_counter() - start) * 1000)
+            if 'error' in json.loads(message):
+                stats.errors += 1
+        writer.write(ws_frame(0x8, b'\x03\xe8', mask=True))
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_load(args, payloads):
+    client = ws_client if args.protocol == 'ws' else http_client
+    stats = LoadStats()
+    before = await http_get_json(args.host, args.port, '/health')
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    results = await asyncio.gather(
+        *(client(args.host, args.port, payloads, args, deadline, stats, i) for i in range(args.concurrency)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = [r for r in results if isinstance(r, Exception)]
+
+    after = await http_get_json(args.host, args.port, '/health')
+    requests = after['batching']['requests'] - before['batching']['requests']
+    batches = after['batching']['batches'] - before['batching']['batches']
+    return stats, elapsed, failures, requests / batches if batches else 0.0
+
+
+def wait_for_server(host, port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            return asyncio.run(http_get_json(host, port, '/health'))
+        except (OSError, ValueError):
+            time.sleep(0.2)
+    raise TimeoutError(f"serveur injoignable sur {host}:{port}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Générateur de charge pour recognition_server.py")
+    parser.add_argument('--host', default='127.0.0.1', help="adresse du serveur")
+    parser.add_argument('--port', type=int, default=8765, help="port du serveur")
+    parser.add_argument('--protocol', default='http', choices=['http', 'ws'], help="HTTP keep-alive ou WebSocket")
+    parser.add_argument('--concurrency', type=int, default=32, help="clients simultanés")
+    parser.add_argument('--duration', type=float, default=10.0, help="durée de la mesure (s)")
+    parser.add_argument('--mode', default='lettres', choices=['tous', 'chiffres', 'lettres', 'actions'])
+    parser.add_argument('--top-k', type=int, default=3, help="prédictions par réponse")
+    parser.add_argument('--input', default='packed', choices=['packed', 'mask'],
+                        help="masques compactés (512 octets) ou PNG")
+    parser.add_argument('--images', help="dossier d'images à envoyer (sinon masques synthétiques)")
+    parser.add_argument('--samples', type=int, default=256, help="nombre de masques différents")
+    parser.add_argument('--spawn', action='store_true', help="lance recognition_server.py pendant la mesure")
+    parser.add_argument('--engine', default='numpy', help="moteur du serveur lancé par --spawn")
+    parser.add_argument('--max-wait', type=float, default=5.0, help="attente de lot du serveur lancé (ms)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("📈 GÉNÉRATEUR DE CHARGE")
+    print("="*60)
+
+    masks = image_masks(args.images, args.samples) if args.images else synthetic_masks(args.samples)
+    if not masks:
+        print(f"✗ Erreur: aucune image dans {args.images}")
+        return 1
+    payloads = encode_payloads(masks, args.input)
+    print(f"✓ {len(payloads)} masques ({args.input}, {np.mean([len(p) for p in payloads]):.0f} octets en moyenne)")
+
+    server = None
+    if args.spawn:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recognition_server.py')
+        server = subprocess.Popen([sys.executable, script, '--host', args.host, '--port', str(args.port),
+                                   '--engine', args.engine, '--max-wait', str(args.max_wait)])
+    try:
+        health = wait_for_server(args.host, args.port)
+        print(f"✓ Serveur joignable (moteur {health['engine']})")
+        print(f"\nMesure: {args.concurrency} clients {args.protocol}, {args.duration:.0f} s, mode {args.mode}...")
+        stats, elapsed, failures, mean_batch = asyncio.run(run_load(args, payloads))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = np.asarray(stats.latencies) if stats.latencies else np.zeros(1)
+    print("\n" + "="*60)
+    print("📊 RÉSULTATS")
+    print("="*60)
+    print(f"  • Requêtes:         {len(stats.latencies)} ({stats.errors} erreurs, {len(failures)} clients en échec)")
+    print(f"  • Débit:            {len(stats.latencies) / elapsed:.1f} requêtes/s")
+    print(f"  • Latence p50:      {np.percentile(latencies, 50):.2f} ms")
+    print(f"  • Latence p95:      {np.percentile(latencies, 95):.2f} ms")
+    print(f"  • Latence p99:      {np.percentile(latencies, 99):.2f} ms")
+    print(f"  • Latence max:      {latencies.max():.2f} ms")
+    print(f"  • Lot moyen serveur: {mean_batch:.1f} images")
+    for failure in failures[:3]:
+        print(f"  ✗ {failure!r}")
+    print("="*60)
+    return 1 if failures or stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
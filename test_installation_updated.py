@@ -150,6 +150,25 @@ except Exception as e:
     print(f"   ✗ Erreur: {e}")
 print()
 
+# Test de l'artefact unique (model_artifact.py)
+print("[TEST BONUS] Artefact du modèle...")
+try:
+    import time
+    from model_artifact import default_artifact_path, load_artifact
+    
+    artifact_path = default_artifact_path()
+    if artifact_path is None:
+        print("   ℹ️  Aucun artefact (créez-le avec: python model_artifact.py)")
+    else:
+        start = time.perf_counter()
+        artifact = load_artifact(artifact_path)
+        artifact.check_preprocessing()
+        print(f"   ✓ {artifact_path} valide ({artifact.num_classes} classes, "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms)")
+except Exception as e:
+    print(f"   ✗ Erreur: {e}")
+print()
+
 print("="*60)
 print("RÉSUMÉ DU TEST")
 print("="*60)
@@ -9,13 +9,38 @@ Architecture:
 - Softmax pour classification multi-classes
 
 Compatible avec TensorFlow 2.20 et Keras 3.x
+
+Reprise et arrêt anticipé:
+- à chaque époque, checkpoints/last.keras (poids + état de l'optimiseur) et
+  checkpoints/state.json (époque, meilleure val_loss, patience) sont mis à jour
+- python training_model_updated.py --resume reprend à l'époque suivante
+- l'entraînement s'arrête si val_loss ne s'améliore plus pendant --patience époques
+- la meilleure époque (checkpoints/best.weights.h5) est exportée vers les
+  fichiers chargés par la démo et l'interface, même après un Ctrl+C
+- checkpoints/training_log.csv: durée, débit et métriques de chaque époque
 """
 
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
+import argparse
+import csv
+import json
+import math
 import os
+import time
+
+import numpy as np
+
+from model_artifact import ARTIFACT_PATH, save_artifact
+
+parser = argparse.ArgumentParser(description="Entraînement du modèle CNN")
+parser.add_argument('--resume', action='store_true', help="reprend depuis checkpoints/last.keras")
+parser.add_argument('--epochs', type=int, default=10, help="nombre total d'époques")
+parser.add_argument('--patience', type=int, default=3, help="époques sans amélioration de val_loss avant l'arrêt")
+parser.add_argument('--checkpoint-dir', default='checkpoints', help="dossier des checkpoints")
+args = parser.parse_args()
 
 print("="*60)
 print("🧠 ENTRAÎNEMENT DU MODÈLE CNN")
@@ -25,17 +50,212 @@ print("="*60)
 TRAIN_DIR = 'DataSet/train'
 TEST_DIR = 'DataSet/test'
 IMAGE_SIZE = (64, 64)
-BATCH_SIZE = 5
-EPOCHS = 10
+BATCH_SIZE = int(os.environ.get('SIGN_BATCH_SIZE', 5))
+EPOCHS = args.epochs
+CHECKPOINT_DIR = args.checkpoint_dir
 NUM_CLASSES = 45  # Nombre total de classes dans le dataset
 
+# Format des données: 'directory' (JPEG via flow_from_directory),
+# 'tfdata' (JPEG via tf.data: lecture parallèle, cache, augmentation par lot)
+# ou 'packed' (tableaux np.memmap produits par pack_dataset.py)
+DATA_FORMAT = os.environ.get('SIGN_DATA_FORMAT', 'directory')
+PACKED_DIR = 'DataSet/packed'
+
+
+class PackedSequence(keras.utils.PyDataset):
+    """Lots lus depuis un split compacté (np.memmap), sans décodage JPEG"""
+
+    def __init__(self, split, batch_size, augment=None, shuffle=False, **kwargs):
+        super().__init__(**kwargs)
+        self.split = split
+        self.batch_size = batch_size
+        self.augment = augment
+        self.shuffle = shuffle
+        self.samples = len(split)
+        self.num_classes = split.num_classes
+        self.order = np.arange(self.samples)
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(self.samples / self.batch_size)
+
+    def __getitem__(self, idx):
+        indices = self.order[idx * self.batch_size:(idx + 1) * self.batch_size]
+        x, y = self.split.batch(indices)
+        if self.augment is not None:
+            # Mêmes transformations aléatoires que l'ImageDataGenerator d'origine
+            for i in range(len(x)):
+                x[i] = self.augment.random_transform(x[i])
+        return x, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.order)
+
+
+def random_shear(images, degrees):
+    """Cisaillement aléatoire par image, appliqué au lot entier en une opération
+
+    Même convention que ImageDataGenerator(shear_range=...): angle en degrés,
+    transformation centrée, remplissage 'nearest'.
+    """
+    shape = tf.shape(images)
+    height = tf.cast(shape[1], tf.float32)
+    shear = tf.random.uniform([shape[0]], -degrees, degrees) * (math.pi / 180)
+    center_y = (height - 1) / 2
+    sin, cos = tf.sin(shear), tf.cos(shear)
+    zeros, ones = tf.zeros_like(shear), tf.ones_like(shear)
+    # Transformation sortie -> entrée: [a0, a1, a2, b0, b1, b2, c0, c1]
+    transforms = tf.stack([ones, -sin, sin * center_y,
+                           zeros, cos, (1 - cos) * center_y,
+                           zeros, zeros], axis=1)
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3],
+        fill_value=0.0, interpolation='BILINEAR', fill_mode='NEAREST')
+
+
+def make_tfdata_dataset(directory, training):
+    """Pipeline tf.data: lecture parallèle -> cache -> mélange -> lot -> augmentation -> prefetch"""
+    dataset = keras.utils.image_dataset_from_directory(
+        directory,
+        labels='inferred',
+        label_mode='categorical',
+        color_mode='grayscale',
+        image_size=IMAGE_SIZE,
+        interpolation='nearest',
+        batch_size=None,
+        shuffle=False
+    )
+    samples = len(dataset.file_paths)
+    num_classes = len(dataset.class_names)
+
+    # uint8 en cache: 4 fois moins de mémoire que des float32
+    dataset = dataset.map(lambda x, y: (tf.cast(x, tf.uint8), y), num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.cache()
+    if training:
+        dataset = dataset.shuffle(min(samples, 10000), reshuffle_each_iteration=True)
+    dataset = dataset.batch(BATCH_SIZE)
+
+    augment = keras.Sequential([
+        layers.RandomFlip('horizontal'),
+        layers.RandomZoom((-0.2, 0.2), (-0.2, 0.2), fill_mode='nearest'),
+    ])
+
+    def prepare(x, y):
+        x = tf.cast(x, tf.float32) / 255.0
+        if training:
+            x = random_shear(x, 0.2)
+            x = augment(x, training=True)
+        return x, y
+
+    dataset = dataset.map(prepare, num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.prefetch(tf.data.AUTOTUNE)
+    return dataset, samples, num_classes
+
+
+class ThroughputLogger(keras.callbacks.Callback):
+    """Affiche le débit d'entraînement (images/s) à chaque époque"""
+
+    def __init__(self, batch_size):
+        super().__init__()
+        self.batch_size = batch_size
+        self.images_per_sec = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.batches = 0
+        self.start = self.end = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.batches += 1
+        self.end = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Temps d'entraînement seul (la validation est exclue)
+        elapsed = max(self.end - self.start, 1e-9)
+        rate = self.batches * self.batch_size / elapsed
+        self.images_per_sec.append(rate)
+        self.last_elapsed = elapsed
+        print(f"\n⏱️  Époque {epoch + 1}: {elapsed:.1f} s, {rate:.1f} images/s")
+
+
+class TrainingCheckpoint(keras.callbacks.Callback):
+    """Checkpoint par époque, meilleure époque, arrêt anticipé et journal des époques
+
+    L'état (époque, meilleure val_loss, patience) est enregistré avec le
+    modèle pour qu'une reprise continue exactement où l'entraînement s'est arrêté.
+    """
+
+    LOG_FIELDS = ['epoch', 'seconds', 'images_per_sec', 'loss', 'accuracy', 'val_loss', 'val_accuracy']
+
+    def __init__(self, directory, patience, throughput, state=None):
+        super().__init__()
+        self.directory = directory
+        self.patience = patience
+        self.throughput = throughput
+        self.state = state or {'epoch': 0, 'best_val_loss': None, 'best_epoch': None,
+                               'best_metrics': None, 'wait': 0}
+        self.last_path = os.path.join(directory, 'last.keras')
+        self.best_path = os.path.join(directory, 'best.weights.h5')
+        self.state_path = os.path.join(directory, 'state.json')
+        self.log_path = os.path.join(directory, 'training_log.csv')
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def load_state(directory):
+        with open(os.path.join(directory, 'state.json'), 'r') as f:
+            return json.load(f)
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        val_loss = logs.get('val_loss')
+        metrics = {k: float(v) for k, v in logs.items()}
+
+        improved = val_loss is not None and (self.state['best_val_loss'] is None
+                                             or val_loss < self.state['best_val_loss'])
+        if improved:
+            self.state.update(best_val_loss=float(val_loss), best_epoch=epoch + 1,
+                              best_metrics=metrics, wait=0)
+            self.model.save_weights(self.best_path)
+            print(f"✓ Meilleure époque: {epoch + 1} (val_loss {val_loss:.4f})")
+        else:
+            self.state['wait'] += 1
+        self.state['epoch'] = epoch + 1
+
+        # Modèle complet (optimiseur compris) puis état: écritures atomiques
+        tmp_path = os.path.join(self.directory, 'last.tmp.keras')
+        self.model.save(tmp_path)
+        os.replace(tmp_path, self.last_path)
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+        new_log = not os.path.exists(self.log_path)
+        with open(self.log_path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_log:
+                writer.writerow(self.LOG_FIELDS)
+            writer.writerow([epoch + 1, round(self.throughput.last_elapsed, 2),
+                             round(self.throughput.images_per_sec[-1], 1)]
+                            + [round(metrics.get(k, float('nan')), 5) for k in self.LOG_FIELDS[3:]])
+
+        if self.state['wait'] >= self.patience:
+            print(f"\n⏹️  Arrêt anticipé: val_loss sans amélioration depuis {self.patience} époques")
+            self.model.stop_training = True
+
+
 # Vérifier que les répertoires existent
 print("\n[1/5] Vérification des répertoires...")
-if not os.path.exists(TRAIN_DIR):
+if DATA_FORMAT == 'packed':
+    TRAIN_DIR = TEST_DIR = PACKED_DIR
+    if not os.path.exists(os.path.join(PACKED_DIR, 'index.json')):
+        print(f"✗ Erreur: {PACKED_DIR} n'existe pas")
+        print("Lancez d'abord: python pack_dataset.py")
+        exit(1)
+elif not os.path.exists(TRAIN_DIR):
     print(f"✗ Erreur: {TRAIN_DIR} n'existe pas")
     print("Assurez-vous d'avoir créé le dataset avec data_set_capture.py")
     exit(1)
-if not os.path.exists(TEST_DIR):
+elif not os.path.exists(TEST_DIR):
     print(f"✗ Erreur: {TEST_DIR} n'existe pas")
     exit(1)
 
@@ -68,12 +288,28 @@ model.summary()
 
 # Compilation du modèle
 print("\n[3/5] Compilation du modèle...")
-model.compile(
-    optimizer='adam',
-    loss='categorical_crossentropy',
-    metrics=['accuracy']
-)
-print("✓ Modèle compilé (optimizer=adam, loss=categorical_crossentropy)")
+checkpoint_state = None
+if args.resume and os.path.exists(os.path.join(CHECKPOINT_DIR, 'last.keras')):
+    # Poids et état de l'optimiseur de la dernière époque terminée
+    model = keras.models.load_model(os.path.join(CHECKPOINT_DIR, 'last.keras'))
+    checkpoint_state = TrainingCheckpoint.load_state(CHECKPOINT_DIR)
+    print(f"✓ Reprise depuis {CHECKPOINT_DIR}/last.keras (époque {checkpoint_state['epoch']} terminée)")
+else:
+    if args.resume:
+        print(f"⚠️ Aucun checkpoint dans {CHECKPOINT_DIR}: entraînement depuis le début")
+    elif os.path.exists(os.path.join(CHECKPOINT_DIR, 'state.json')):
+        # Nouvel entraînement: l'ancien état et l'ancien journal ne s'appliquent plus
+        print(f"⚠️ Checkpoints précédents de {CHECKPOINT_DIR} remplacés (utilisez --resume pour reprendre)")
+        for name in ('state.json', 'training_log.csv', 'best.weights.h5', 'last.keras'):
+            if os.path.exists(os.path.join(CHECKPOINT_DIR, name)):
+                os.remove(os.path.join(CHECKPOINT_DIR, name))
+    model.compile(
+        optimizer='adam',
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    print("✓ Modèle compilé (optimizer=adam, loss=categorical_crossentropy)")
+initial_epoch = checkpoint_state['epoch'] if checkpoint_state else 0
 
 # Étape 2: Préparation des données avec augmentation
 print("\n[4/5] Préparation des générateurs de données...")
@@ -89,57 +325,115 @@ train_datagen = ImageDataGenerator(
 # Générateur pour les données de test (sans augmentation)
 test_datagen = ImageDataGenerator(rescale=1./255)
 
-# Chargement des données d'entraînement
-print("\nChargement du training set...")
-training_set = train_datagen.flow_from_directory(
-    TRAIN_DIR,
-    target_size=IMAGE_SIZE,
-    batch_size=BATCH_SIZE,
-    color_mode='grayscale',
-    class_mode='categorical'
-)
+if DATA_FORMAT == 'packed':
+    from pack_dataset import load_split
 
-# Chargement des données de test
-print("Chargement du test set...")
-test_set = test_datagen.flow_from_directory(
-    TEST_DIR,
-    target_size=IMAGE_SIZE,
-    batch_size=BATCH_SIZE,
-    color_mode='grayscale',
-    class_mode='categorical'
-)
+    # Lecture par np.memmap: les augmentations restent identiques, sans rescale
+    print(f"\nChargement des splits compactés depuis {PACKED_DIR}...")
+    augment = ImageDataGenerator(shear_range=0.2, zoom_range=0.2, horizontal_flip=True)
+    training_set = PackedSequence(load_split(PACKED_DIR, 'train'), BATCH_SIZE,
+                                  augment=augment, shuffle=True)
+    test_set = PackedSequence(load_split(PACKED_DIR, 'test'), BATCH_SIZE)
+    train_samples, test_samples = training_set.samples, test_set.samples
+    num_classes = training_set.num_classes
+    class_names = training_set.split.classes
+elif DATA_FORMAT == 'tfdata':
+    print("\nChargement du training set (tf.data)...")
+    training_set, train_samples, num_classes = make_tfdata_dataset(TRAIN_DIR, training=True)
+    print("Chargement du test set (tf.data)...")
+    test_set, test_samples, _ = make_tfdata_dataset(TEST_DIR, training=False)
+    from pack_dataset import list_classes
+    class_names = list_classes(TRAIN_DIR)
+else:
+    # Chargement des données d'entraînement
+    print("\nChargement du training set...")
+    training_set = train_datagen.flow_from_directory(
+        TRAIN_DIR,
+        target_size=IMAGE_SIZE,
+        batch_size=BATCH_SIZE,
+        color_mode='grayscale',
+        class_mode='categorical'
+    )
+
+    # Chargement des données de test
+    print("Chargement du test set...")
+    test_set = test_datagen.flow_from_directory(
+        TEST_DIR,
+        target_size=IMAGE_SIZE,
+        batch_size=BATCH_SIZE,
+        color_mode='grayscale',
+        class_mode='categorical'
+    )
+    train_samples, test_samples = training_set.samples, test_set.samples
+    num_classes = training_set.num_classes
+    class_names = sorted(training_set.class_indices, key=training_set.class_indices.get)
 
-print(f"\n✓ Training set: {training_set.samples} images")
-print(f"✓ Test set: {test_set.samples} images")
-print(f"✓ Nombre de classes détectées: {training_set.num_classes}")
+print(f"\n✓ Training set: {train_samples} images")
+print(f"✓ Test set: {test_samples} images")
+print(f"✓ Nombre de classes détectées: {num_classes}")
+if num_classes != NUM_CLASSES:
+    # L'artefact refusera un modèle dont les sorties ne correspondent pas aux classes
+    print(f"⚠️ NUM_CLASSES = {NUM_CLASSES} mais {num_classes} classes dans le dataset: "
+          f"{ARTIFACT_PATH} ne pourra pas être créé")
+
+# Une époque = un passage complet sur le dataset
+STEPS_PER_EPOCH = math.ceil(train_samples / BATCH_SIZE)
+VALIDATION_STEPS = math.ceil(test_samples / BATCH_SIZE)
 
 # Étape 3: Entraînement du modèle
 print("\n[5/5] Entraînement du modèle...")
 print(f"Époques: {EPOCHS}")
-print(f"Steps par époque: 1000")
-print(f"Validation steps: 30")
+print(f"Format des données: {DATA_FORMAT} (lots de {BATCH_SIZE})")
+print(f"Steps par époque: {STEPS_PER_EPOCH}")
+print(f"Validation steps: {VALIDATION_STEPS}")
 print("\nCela peut prendre plusieurs minutes/heures selon votre GPU...")
 print("="*60 + "\n")
 
 # Entraîner le modèle
-history = model.fit(
-    training_set,
-    steps_per_epoch=1000,
-    epochs=EPOCHS,
-    validation_data=test_set,
-    validation_steps=30,
-    verbose=1
-)
+throughput = ThroughputLogger(BATCH_SIZE)
+checkpoint = TrainingCheckpoint(CHECKPOINT_DIR, args.patience, throughput, checkpoint_state)
+if checkpoint.state['wait'] >= args.patience:
+    print("ℹ️  Arrêt anticipé déjà atteint: export de la meilleure époque")
+elif initial_epoch >= EPOCHS:
+    print(f"ℹ️  {EPOCHS} époques déjà terminées: export de la meilleure époque")
+else:
+    if initial_epoch:
+        print(f"Reprise à l'époque {initial_epoch + 1}/{EPOCHS}")
+    try:
+        model.fit(
+            training_set,
+            steps_per_epoch=STEPS_PER_EPOCH,
+            epochs=EPOCHS,
+            initial_epoch=initial_epoch,
+            validation_data=test_set,
+            validation_steps=VALIDATION_STEPS,
+            callbacks=[throughput, checkpoint],
+            verbose=1
+        )
+    except KeyboardInterrupt:
+        print(f"\n⚠️ Interrompu après l'époque {checkpoint.state['epoch']}: "
+              f"relancez avec --resume pour continuer")
+
+best = checkpoint.state
+if best['best_epoch'] is None:
+    print("✗ Aucune époque terminée: rien à exporter")
+    exit(1)
+
+# La meilleure époque est exportée, pas la dernière
+model.load_weights(checkpoint.best_path)
 
 # Afficher les résultats finaux
 print("\n" + "="*60)
 print("✅ ENTRAÎNEMENT TERMINÉ!")
 print("="*60)
-print(f"\nRésultats finaux (époque {EPOCHS}):")
-print(f"  • Précision training:   {history.history['accuracy'][-1]*100:.2f}%")
-print(f"  • Précision validation: {history.history['val_accuracy'][-1]*100:.2f}%")
-print(f"  • Loss training:        {history.history['loss'][-1]:.4f}")
-print(f"  • Loss validation:      {history.history['val_loss'][-1]:.4f}")
+print(f"\nMeilleure époque: {best['best_epoch']} (sur {best['epoch']} terminées)")
+print(f"  • Précision training:   {best['best_metrics']['accuracy']*100:.2f}%")
+print(f"  • Précision validation: {best['best_metrics']['val_accuracy']*100:.2f}%")
+print(f"  • Loss training:        {best['best_metrics']['loss']:.4f}")
+print(f"  • Loss validation:      {best['best_metrics']['val_loss']:.4f}")
+if throughput.images_per_sec:
+    print(f"  • Débit moyen:          {np.mean(throughput.images_per_sec):.1f} images/s")
+print(f"  • Journal des époques:  {checkpoint.log_path}")
 
 # Sauvegarde du modèle
 print("\n[6/6] Sauvegarde du modèle...")
@@ -158,6 +452,20 @@ print("✓ Poids sauvegardés: model-bw.h5")
 model.save('model-complete.keras')
 print("✓ Modèle complet sauvegardé: model-complete.keras")
 
+# Artefact unique: architecture, poids, noms des classes et prétraitement
+try:
+    save_artifact(
+        ARTIFACT_PATH,
+        json.loads(model_json),
+        {layer.name: layer.get_weights() for layer in model.layers},
+        class_names,
+        metadata={'epochs': best['epoch'], 'best_epoch': best['best_epoch'], 'data_format': DATA_FORMAT,
+                  'val_accuracy': best['best_metrics']['val_accuracy']}
+    )
+    print(f"✓ Artefact du modèle sauvegardé: {ARTIFACT_PATH}")
+except ValueError as e:
+    print(f"✗ Artefact non créé: {e}")
+
 print("\n" + "="*60)
 print("🎉 ENTRAÎNEMENT RÉUSSI!")
 print("="*60)
@@ -165,6 +473,7 @@ print("\nFichiers générés:")
 print("  • model-bw.json   - Architecture du modèle")
 print("  • model-bw.h5     - Poids du modèle")
 print("  • model-complete.keras - Modèle complet (optionnel)")
+print(f"  • {ARTIFACT_PATH} - Artefact unique (architecture, poids, classes)")
 print("\nVous pouvez maintenant utiliser ce modèle avec:")
 print("  • demo_signes_WORKING.py")
 print("  • app_interface_elegante.py")